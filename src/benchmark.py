@@ -0,0 +1,465 @@
+# Benchmarks of the simulation entry points, checked against fixed budgets
+
+import argparse
+import csv
+import math
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import replace
+from typing import List, NamedTuple, Set, Tuple
+import numpy as np
+from utils.argument_parser import SimulationArgs, default_arguments
+from utils.solvers import (
+    DEFAULT_FIXED_STEP,
+    IMPLICIT_METHODS,
+    SOLVER_METHODS,
+    SolverSettings,
+)
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cold start budgets (s): cumulative `-X importtime` of the module in a fresh
+# interpreter. The frontend starts a new process for every run.
+STARTUP_BUDGETS = {
+    "main": 1.0,
+    "sweep": 1.0,
+}
+# Only needed once a plot or DataFrame is produced
+LAZY_MODULES = ("pandas", "matplotlib")
+
+# Tunings the integrators are compared on, as changes to the default arguments
+REFERENCE_TUNINGS = {
+    "default": {},
+    "light_flyweights": {"flyweight_mass": 0.5},
+    "stiff_primary": {"primary_spring_rate": 120},
+    "incline": {"angle_of_incline": 5.0},
+}
+# Integrator of the reference runs, tight enough to be treated as exact
+REFERENCE_SOLVER = SolverSettings("DOP853", rtol=1e-7, atol=1e-9)
+# s. A run ending earlier than its reference by more than this was stopped by
+# its solver failing, e.g. LSODA on the free shift, rather than by an event.
+INCOMPLETE_RUN_MARGIN = 0.01
+
+
+class StartupTime(NamedTuple):
+    module: str
+    seconds: float
+    budget: float
+    eager_modules: List[str]  # Entries of LAZY_MODULES imported anyway
+
+    @property
+    def within_budget(self) -> bool:
+        return self.seconds <= self.budget and not self.eager_modules
+
+
+def parse_import_time(stderr: str, module: str) -> Tuple[float, Set[str]]:
+    """
+    Reads `-X importtime` output, returning the cumulative import time of
+    module in seconds and the names of every module imported.
+    """
+    seconds = None
+    imported = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        if not cumulative.strip().isdigit():
+            continue  # Column header
+        imported.add(name)
+        if name == module:
+            seconds = int(cumulative) / 1e6
+    if seconds is None:
+        raise ValueError(f"No import time reported for {module}")
+    return seconds, imported
+
+
+def measure_startup(module: str, repeats: int = 3) -> StartupTime:
+    """Imports module in fresh interpreters, keeping the fastest of repeats."""
+    best = None
+    for _ in range(repeats):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=SOURCE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        seconds, imported = parse_import_time(completed.stderr, module)
+        if best is None or seconds < best[0]:
+            best = (seconds, imported)
+
+    seconds, imported = best
+    eager_modules = [name for name in LAZY_MODULES if name in imported]
+    return StartupTime(module, seconds, STARTUP_BUDGETS[module], eager_modules)
+
+
+def run_startup_benchmark(repeats: int) -> bool:
+    results = [measure_startup(module, repeats) for module in STARTUP_BUDGETS]
+    for result in results:
+        status = "ok" if result.within_budget else "OVER BUDGET"
+        print(
+            f"{result.module:<10} {result.seconds * 1000:8.1f} ms "
+            f"(budget {result.budget * 1000:.0f} ms) {status}"
+        )
+        if result.eager_modules:
+            print(f"{'':<10} imports {', '.join(result.eager_modules)} eagerly")
+    return all(result.within_budget for result in results)
+
+
+class SolverRun(NamedTuple):
+    tuning: str
+    method: str
+    wall_time: float  # s
+    nfev: int  # Over both phases
+    njev: int
+    final_time: float  # s, earlier than the simulated time if a run stopped
+    completed: bool  # Whether the run got as far as the reference
+    distance_error: float  # m, final position against the reference, nan if incomplete
+    velocity_error: (
+        float  # m/s, final velocity against the reference, nan if incomplete
+    )
+    peak_memory: float  # MiB allocated at the peak, nan when not measured
+
+
+def solver_options(
+    method: str, total_sim_time: float, step: float = DEFAULT_FIXED_STEP
+):
+    """Simulation options running both phases with method at the production tolerances."""
+    from main import SimulationOptions
+
+    return SimulationOptions(
+        total_sim_time=total_sim_time,
+        phase1_solver=SolverSettings(method, rtol=1e-4, atol=1e-6, step=step),
+        phase2_solver=SolverSettings(method, step=step),
+    )
+
+
+def timed_run(args: SimulationArgs, options, measure_memory: bool):
+    """Runs a simulation, returning its result, wall time and peak memory."""
+    from main import run_simulation
+
+    # Rejected trial steps may overflow, which is harmless
+    with np.errstate(all="ignore"):
+        start = time.perf_counter()
+        result = run_simulation(args, options=options)
+        wall_time = time.perf_counter() - start
+
+        peak_memory = math.nan
+        if measure_memory:
+            # Traced separately, as tracing slows the run down
+            tracemalloc.start()
+            run_simulation(args, options=options)
+            peak_memory = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+    return result, wall_time, peak_memory
+
+
+def run_solver_benchmark(
+    methods: List[str],
+    tunings: List[str],
+    total_sim_time: float,
+    step: float = DEFAULT_FIXED_STEP,
+    measure_memory: bool = True,
+) -> List[SolverRun]:
+    """Runs every tuning under every method and compares it with a reference run."""
+    from main import SimulationOptions
+
+    runs = []
+    for tuning in tunings:
+        args = replace(default_arguments(), **REFERENCE_TUNINGS[tuning])
+        reference, _, _ = timed_run(
+            args,
+            SimulationOptions(
+                total_sim_time=total_sim_time,
+                phase1_solver=REFERENCE_SOLVER,
+                phase2_solver=REFERENCE_SOLVER,
+            ),
+            measure_memory=False,
+        )
+
+        for method in methods:
+            result, wall_time, peak_memory = timed_run(
+                args, solver_options(method, total_sim_time, step), measure_memory
+            )
+            stats = result.solver_stats.values()
+            completed = result.time[-1] >= reference.time[-1] - INCOMPLETE_RUN_MARGIN
+            # The final states of an incomplete run are not comparable
+            distance_error = velocity_error = math.nan
+            if completed:
+                distance_error = abs(
+                    result.car_position[-1] - reference.car_position[-1]
+                )
+                velocity_error = abs(
+                    result.car_velocity[-1] - reference.car_velocity[-1]
+                )
+            runs.append(
+                SolverRun(
+                    tuning=tuning,
+                    method=method,
+                    wall_time=wall_time,
+                    nfev=sum(phase["nfev"] for phase in stats),
+                    njev=sum(phase["njev"] for phase in stats),
+                    final_time=float(result.time[-1]),
+                    completed=bool(completed),
+                    distance_error=distance_error,
+                    velocity_error=velocity_error,
+                    peak_memory=peak_memory,
+                )
+            )
+            print_solver_run(runs[-1])
+    return runs
+
+
+def print_solver_run(run: SolverRun):
+    if run.completed:
+        error = f"error {run.distance_error:.2e} m {run.velocity_error:.2e} m/s"
+    else:
+        error = f"{'INCOMPLETE, solver failed':<32}"
+    print(
+        f"{run.tuning:<18} {run.method:<7} {run.wall_time:8.2f} s "
+        f"{run.nfev:>9} nfev {run.njev:>6} njev  t_end {run.final_time:6.2f} s  "
+        f"{error}  peak {run.peak_memory:7.2f} MiB"
+    )
+
+
+def compare_with_default(runs: List[SolverRun]) -> List[Tuple[str, float, float]]:
+    """
+    (method, wall time ratio, nfev ratio) of every other method against the
+    default RK45, over the tunings both of them completed.
+    """
+    runs = [run for run in runs if run.completed]
+    default = {run.tuning: run for run in runs if run.method == "RK45"}
+    comparisons = []
+    for method in dict.fromkeys(run.method for run in runs):
+        paired = [
+            (run, default[run.tuning])
+            for run in runs
+            if run.method == method and run.tuning in default
+        ]
+        if method == "RK45" or not paired:
+            continue
+        comparisons.append(
+            (
+                method,
+                sum(run.wall_time for run, _ in paired)
+                / sum(base.wall_time for _, base in paired),
+                sum(run.nfev for run, _ in paired)
+                / sum(base.nfev for _, base in paired),
+            )
+        )
+    return comparisons
+
+
+def print_solver_summary(runs: List[SolverRun]):
+    for run in runs:
+        if not run.completed:
+            print(
+                f"{run.method:<7} failed on {run.tuning} at {run.final_time:.2f} s "
+                "and is left out of the comparison there"
+            )
+    for method, time_ratio, nfev_ratio in compare_with_default(runs):
+        verdict = ""
+        if method in IMPLICIT_METHODS:
+            pays_off = "pays off" if time_ratio < 1 else "does not pay off"
+            verdict = f": the analytic Jacobian {pays_off}"
+        print(
+            f"{method:<7} {time_ratio:5.2f}x the wall time and {nfev_ratio:5.2f}x "
+            f"the evaluations of RK45{verdict}"
+        )
+
+
+class QuasiStaticRun(NamedTuple):
+    tuning: str
+    dynamic_time: float  # s of wall time, integrating the motion of the shift
+    quasi_static_time: float  # s of wall time, holding it at its equilibrium
+    speedup: float
+    velocity_error: float  # m/s, largest over the run
+    distance_error: float  # m, final position
+    engine_speed_error: float  # rpm, largest over the run
+    engine_speed_rms_error: float  # rpm, as the transients are short
+    shift_distance_error: float  # m, largest over the run
+
+
+def run_quasi_static_benchmark(
+    tunings: List[str], total_sim_time: float
+) -> List[QuasiStaticRun]:
+    """
+    Runs every tuning with the full dynamic model and with the quasi-static
+    shift, comparing them at the samples of the dynamic run.
+    """
+    from main import SimulationOptions
+    from utils.frontend_output import FormattedSimulationResult
+
+    runs = []
+    for tuning in tunings:
+        args = replace(default_arguments(), **REFERENCE_TUNINGS[tuning])
+        dynamic, dynamic_time, _ = timed_run(
+            args, SimulationOptions(total_sim_time=total_sim_time), False
+        )
+        quasi_static, quasi_static_time, _ = timed_run(
+            args,
+            SimulationOptions(total_sim_time=total_sim_time, quasi_static=True),
+            False,
+        )
+
+        # Only where both runs got to, should one have stopped
+        compared = dynamic.time <= quasi_static.time[-1]
+        time = dynamic.time[compared]
+
+        def errors(expected, actual):
+            return np.interp(time, quasi_static.time, actual) - expected[compared]
+
+        def largest_error(expected, actual):
+            return np.max(np.abs(errors(expected, actual)))
+
+        engine_speed_errors = errors(
+            FormattedSimulationResult.from_result(dynamic).engine_angular_velocities,
+            FormattedSimulationResult.from_result(
+                quasi_static
+            ).engine_angular_velocities,
+        )
+
+        runs.append(
+            QuasiStaticRun(
+                tuning=tuning,
+                dynamic_time=dynamic_time,
+                quasi_static_time=quasi_static_time,
+                speedup=dynamic_time / quasi_static_time,
+                velocity_error=largest_error(
+                    dynamic.car_velocity, quasi_static.car_velocity
+                ),
+                distance_error=abs(
+                    quasi_static.car_position[-1] - dynamic.car_position[-1]
+                ),
+                engine_speed_error=np.max(np.abs(engine_speed_errors)),
+                engine_speed_rms_error=np.sqrt(np.mean(engine_speed_errors**2)),
+                shift_distance_error=largest_error(
+                    dynamic.shift_distance, quasi_static.shift_distance
+                ),
+            )
+        )
+        print_quasi_static_run(runs[-1])
+    return runs
+
+
+def print_quasi_static_run(run: QuasiStaticRun):
+    print(
+        f"{run.tuning:<18} {run.dynamic_time:6.2f} s -> "
+        f"{run.quasi_static_time:6.3f} s ({run.speedup:5.1f}x)  "
+        f"error {run.velocity_error:.2e} m/s {run.distance_error:.2e} m "
+        f"{run.engine_speed_error:6.1f} rpm (RMS {run.engine_speed_rms_error:5.1f}) "
+        f"shift {run.shift_distance_error:.2e} m"
+    )
+
+
+def write_runs(runs: List[NamedTuple], filename: str):
+    with open(filename, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=type(runs[0])._fields)
+        writer.writeheader()
+        for run in runs:
+            writer.writerow(run._asdict())
+
+
+def get_benchmark_arguments(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the simulator against its budgets"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    startup = commands.add_parser(
+        "startup", help="Cold start import time of the entry points"
+    )
+    startup.add_argument(
+        "--repeats", type=int, default=3, help="Fresh interpreters per module"
+    )
+
+    solvers = commands.add_parser(
+        "solvers",
+        help="Wall time, work, accuracy and memory of each integrator",
+    )
+    solvers.add_argument(
+        "--methods",
+        nargs="+",
+        choices=SOLVER_METHODS,
+        default=list(SOLVER_METHODS),
+        help="Integrators to compare (default: all)",
+    )
+    solvers.add_argument(
+        "--tunings",
+        nargs="+",
+        choices=list(REFERENCE_TUNINGS),
+        default=list(REFERENCE_TUNINGS),
+        help="Reference tunings to run (default: all)",
+    )
+    solvers.add_argument(
+        "--total_sim_time",
+        type=float,
+        default=15,
+        help="Simulated time in seconds (default: 15 s)",
+    )
+    solvers.add_argument(
+        "--step",
+        type=float,
+        default=DEFAULT_FIXED_STEP,
+        help=f"Step of the fixed step RK4 method (default: {DEFAULT_FIXED_STEP} s)",
+    )
+    solvers.add_argument(
+        "--no_memory",
+        action="store_true",
+        help="Skip the second, traced run measuring peak memory",
+    )
+    solvers.add_argument(
+        "--output", default=None, help="CSV file receiving one row per run"
+    )
+
+    quasi_static = commands.add_parser(
+        "quasi_static",
+        help="Speedup and accuracy of the quasi-static shift against the full model",
+    )
+    quasi_static.add_argument(
+        "--tunings",
+        nargs="+",
+        choices=list(REFERENCE_TUNINGS),
+        default=list(REFERENCE_TUNINGS),
+        help="Reference tunings to run (default: all)",
+    )
+    quasi_static.add_argument(
+        "--total_sim_time",
+        type=float,
+        default=15,
+        help="Simulated time in seconds (default: 15 s)",
+    )
+    quasi_static.add_argument(
+        "--output", default=None, help="CSV file receiving one row per tuning"
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    benchmark_args = get_benchmark_arguments()
+    if benchmark_args.command == "startup":
+        passed = run_startup_benchmark(benchmark_args.repeats)
+    elif benchmark_args.command == "solvers":
+        runs = run_solver_benchmark(
+            benchmark_args.methods,
+            benchmark_args.tunings,
+            benchmark_args.total_sim_time,
+            step=benchmark_args.step,
+            measure_memory=not benchmark_args.no_memory,
+        )
+        print_solver_summary(runs)
+        if benchmark_args.output is not None:
+            write_runs(runs, benchmark_args.output)
+        passed = True
+    elif benchmark_args.command == "quasi_static":
+        runs = run_quasi_static_benchmark(
+            benchmark_args.tunings, benchmark_args.total_sim_time
+        )
+        if benchmark_args.output is not None:
+            write_runs(runs, benchmark_args.output)
+        passed = True
+    sys.exit(0 if passed else 1)
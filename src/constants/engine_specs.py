@@ -1,7 +1,6 @@
-from scipy.interpolate import interp1d
-import matplotlib.pyplot as plt
 import numpy as np
 from utils.conversions import rpm_to_rad_s
+from utils.engine_curve import EngineCurve
 
 # Given engine specifications (torque in ft*lbs)
 engineSpecs = [
@@ -30,15 +29,13 @@ angular_velocities = [point["angular_velocity"] for point in engineData]
 torques = [point["torque"] for point in engineData]
 powers = [point["power"] for point in engineData]
 
-torque_curve = interp1d(
-    angular_velocities, torques, kind="cubic", fill_value="extrapolate"
-)
+torque_curve = EngineCurve(angular_velocities, torques)
 
 
 if __name__ == "__main__":
-    power_curve = interp1d(
-        angular_velocities, powers, kind="cubic", fill_value="extrapolate"
-    )
+    import matplotlib.pyplot as plt
+
+    power_curve = EngineCurve(angular_velocities, powers)
 
     x = np.linspace(180, 420, 1000)
     plt.plot(x, torque_curve(x))
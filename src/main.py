@@ -1,211 +1,696 @@
-import sys
+import argparse
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Callable, List, Optional, Tuple
 import numpy as np
 from scipy.integrate import solve_ivp
-from simulations.load_simulation import LoadSimulator
-from utils.system_state import SystemState
-from utils.simulation_result import SimulationResult
-from simulations.engine_simulation import EngineSimulator
-from simulations.primary_pulley import PrimaryPulley
-from simulations.secondary_pulley import SecondaryPulley
-from simulations.belt_simulator import BeltSimulator
-from simulations.cvt_shift import CvtShift
-from constants.engine_specs import torque_curve
+from simulations.drivetrain import Drivetrain, build_drivetrain
+from simulations.quasi_static_shift import QuasiStaticShift
+from utils.system_state import StateView, SystemState
+from utils.simulation_result import COLUMN_UNITS, SimulationResult
 from constants.car_specs import (
-    ENGINE_INERTIA,
     GEARBOX_RATIO,
     WHEEL_RADIUS,
     MAX_SHIFT,
 )
-from utils.conversions import rpm_to_rad_s, deg_to_rad
-from utils.argument_parser import get_arguments
+from utils.conversions import rpm_to_rad_s
+from utils.argument_parser import SimulationArgs, build_parser
 from utils.theoretical_models import TheoreticalModels as tm
+from utils.shift_geometry import using_geometry_table
+from utils.baked_ramp import DEFAULT_CACHE_DIR, DEFAULT_RESOLUTION
+from utils.checkpoint import Checkpoint
 from utils.simulation_constraints import (
     car_velocity_constraint_event,
-    get_shift_steady_event,
-    shift_constraint_event,
+    get_shift_release_event,
+    is_pinned,
+    pinned_state,
+    shift_lower_stop_event,
+    shift_upper_stop_event,
 )
-from utils.frontend_output import FormattedSimulationResult
-
-
-# Parse arguments
-args = get_arguments()
-
-# Initialize simulators
-engine_simulator = EngineSimulator(torque_curve=torque_curve, inertia=ENGINE_INERTIA)
-load_simulator = LoadSimulator(
-    car_mass=args.vehicle_weight + args.driver_weight,
-    incline_angle=deg_to_rad(args.angle_of_incline),
-)
-primary_simulator = PrimaryPulley(
-    spring_coeff_comp=args.primary_spring_rate,
-    initial_compression=args.primary_spring_pretension,
-    flyweight_mass=args.flyweight_mass,
-    ramp_type=args.primary_ramp_geometry,
+from utils.frontend_output import (
+    FORMATTED_OUTPUT_UNITS,
+    ChunkFormatter,
+    FormattedSimulationResult,
 )
-secondary_simulator = SecondaryPulley(
-    spring_coeff_tors=args.secondary_torsion_spring_rate,
-    spring_coeff_comp=args.secondary_compression_spring_rate,
-    initial_rotation=deg_to_rad(args.secondary_rotational_spring_pretension),
-    initial_compression=args.secondary_linear_spring_pretension,
-    ramp_type=args.secondary_helix_geometry,
-)
-primary_belt = BeltSimulator(primary=True)
-secondary_belt = BeltSimulator(primary=False)
-cvt_shift = CvtShift(
-    engine_simulator,
-    primary_simulator,
-    secondary_simulator,
-    primary_belt,
-    secondary_belt,
+from utils.print_progress import ProgressChannel, ProgressReporter
+from utils.result_cache import (
+    DEFAULT_RESULT_CACHE_DIR,
+    load_cached_result,
+    result_cache_key,
+    store_result,
 )
+from utils.result_stream import DEFAULT_CHUNK_SIZE, StepSampler, open_result_stream
+from utils.solvers import SolverSettings, with_step_callback
+from utils.trajectory import Trajectory
 
 total_sim_time = 15  # seconds
 
+# Files written by each choice of --output
+RAW_OUTPUT_PATH = "simulation_output.csv"
+FORMATTED_OUTPUT_PATH = "front_end_output.csv"  # Read by the frontend
+OUTPUT_WRITERS = {
+    "raw": (RAW_OUTPUT_PATH, None),
+    "formatted": (None, FORMATTED_OUTPUT_PATH),
+    "both": (RAW_OUTPUT_PATH, FORMATTED_OUTPUT_PATH),
+    "none": (None, None),
+}
+# Extension of the memory-mappable binary files written instead with --binary
+BINARY_EXTENSION = ".npy"
 
-# Define the system of differential equations
-def evaluate_cvt_system(t, y):
-    state = SystemState.from_array(y)
 
-    # Print progress
-    progress_percent = (t / total_sim_time) * 100
-    # Print every 0.1% progress
-    if progress_percent % 0.1 < 0.01:
-        sys.stdout.write(
-            f"\rProgress: {progress_percent:.1f}% [{'=' * int(progress_percent // 2)}{' ' * (50 - int(progress_percent // 2))}]"
-        )
-        sys.stdout.flush()
-
-    # TODO: Remove this (should be handled by constraints)
-    shift_velocity = state.shift_velocity
-    shift_distance = state.shift_distance
-    if shift_distance < 0:
-        state.shift_distance = 0
-        state.shift_velocity = max(0, shift_velocity)
-
-    elif shift_distance > MAX_SHIFT:
-        state.shift_distance = MAX_SHIFT
-        state.shift_velocity = min(0, shift_velocity)
-
-    # ---------------------------
-    # CAR + ENGINE DYNAMICS BELOW
-    # ---------------------------
-
-    # Some ratios
-    # print(tm.outer_prim_radius(state.shift_distance), state.shift_distance)
-    cvt_ratio = tm.current_cvt_ratio(state.shift_distance)
-    wheel_to_engine_ratio = (cvt_ratio * GEARBOX_RATIO) / WHEEL_RADIUS
-    engine_velocity = state.car_velocity * wheel_to_engine_ratio
-
-    # Vehicle acceleration
-    engine_power = engine_simulator.get_power(engine_velocity)
-    car_acceleration = load_simulator.calculate_acceleration(
-        state.car_velocity, engine_power
+class CombinedSolution:
+    def __init__(self, t, y):
+        self.t = t
+        self.y = y
+
+
+@dataclass
+class SimulationOptions:
+    """How a run is integrated and reported, as opposed to what is simulated."""
+
+    total_sim_time: float = total_sim_time  # seconds
+    # Integrators of the free shift (phase 1) and of the shift pinned against
+    # an end-stop (phase 2), given the Jacobian if they are implicit
+    phase1_solver: SolverSettings = field(
+        default_factory=lambda: SolverSettings(rtol=1e-4, atol=1e-6)
     )
+    phase2_solver: SolverSettings = field(default_factory=SolverSettings)
+    # Keep the interpolants of the solver, returning its own steps and a
+    # trajectory to resample, instead of states on a fixed time grid
+    dense_output: bool = False
+    # Hold the shift at its equilibrium instead of integrating its motion,
+    # using phase1_solver, when only the car and engine speeds matter
+    quasi_static: bool = False
+    exact_geometry: bool = False  # Exact formulas instead of the lookup table
+    ramp_resolution: Optional[int] = DEFAULT_RESOLUTION  # None for exact ramps
+    ramp_cache_dir: Optional[str] = None  # Disk cache for the baked ramps
+    # Disk cache of whole results, looked up before simulating when set
+    result_cache_dir: Optional[str] = None
+    # Continue a run from one of its checkpoints rather than from rest. The
+    # result then only holds the samples after the checkpoint.
+    resume_from: Optional[Checkpoint] = None
+    progress: bool = False  # Progress bar on stdout
+    # Publishes the status of the run to progress_<ID>.json when set
+    progress_run_id: Optional[str] = None
+    # Raw and frontend output written here when set, as binary .npy files
+    # with a JSON header when the path ends in .npy and as CSV otherwise
+    output_path: Optional[str] = None
+    formatted_output_path: Optional[str] = None
+    # Write the outputs while the run goes, this many samples at a time,
+    # instead of once it has finished
+    stream_chunk_size: Optional[int] = None
 
-    # ------------------
-    # PULLEY STUFF BELOW
-    # ------------------
-    shift_acceleration = cvt_shift.calculate_shift_acceleration(state)
-
-    return [
-        car_acceleration,
-        state.car_velocity,
-        shift_acceleration,
-        state.shift_velocity,
-    ]
-
-
-# PHASE 2: Simplified model (shift is locked at full shift)
-def evaluate_full_shift_system(t, y):
-    state = SystemState.from_array(y)
-    # Force the shifting variables to remain constant at full shift.
-    state.shift_distance = MAX_SHIFT
-    state.shift_velocity = 0
-
-    # Use constant CVT ratio for full shift
-    cvt_ratio = tm.current_cvt_ratio(MAX_SHIFT)
-    wheel_to_engine_ratio = (cvt_ratio * GEARBOX_RATIO) / WHEEL_RADIUS
-    engine_velocity = state.car_velocity * wheel_to_engine_ratio
-
-    engine_power = engine_simulator.get_power(engine_velocity)
-    car_acceleration = load_simulator.calculate_acceleration(
-        state.car_velocity, engine_power
+
+def run_simulation(
+    args: SimulationArgs, *, options: SimulationOptions = None
+) -> SimulationResult:
+    """
+    Runs the simulation for one set of arguments. Nothing is printed or
+    written unless the options ask for it.
+    """
+    if options is None:
+        options = SimulationOptions()
+
+    # Binary files record what was simulated alongside the samples
+    metadata = {"arguments": asdict(args), "total_sim_time": options.total_sim_time}
+    cache_key = None
+    # Runs with dense output keep their interpolants, which are not cached,
+    # and resumed runs only hold part of the result
+    cacheable = not options.dense_output and options.resume_from is None
+    if options.result_cache_dir is not None and cacheable:
+        cache_key = result_cache_key(args, result_settings(options))
+        result = load_cached_result(options.result_cache_dir, cache_key)
+        if result is not None:
+            reporter = progress_reporter(options)
+            if reporter is not None:
+                reporter.sim_time = float(result.time[-1])
+                reporter.finish()
+            write_outputs(result, options, metadata)
+            return result
+
+    streams = []
+    if options.stream_chunk_size is not None:
+        streams = open_output_streams(options, metadata)
+
+    def sink(time, y):
+        for stream in streams:
+            stream.append(time, y)
+
+    try:
+        with using_geometry_table(not options.exact_geometry):
+            drivetrain = build_drivetrain(
+                args,
+                ramp_resolution=options.ramp_resolution,
+                ramp_cache_dir=options.ramp_cache_dir,
+            )
+            integrate_run = (
+                integrate_quasi_static if options.quasi_static else integrate
+            )
+            result = integrate_run(drivetrain, options, sink=sink if streams else None)
+    finally:
+        # Also when the run fails, leaving readable files up to where it got
+        for stream in streams:
+            stream.close()
+
+    if cache_key is not None:
+        store_result(options.result_cache_dir, cache_key, result)
+    if not streams:
+        write_outputs(result, options, metadata)
+    return result
+
+
+def result_settings(options: SimulationOptions) -> dict:
+    """The options that change the result of a run, as opposed to its reporting."""
+    return {
+        "total_sim_time": options.total_sim_time,
+        "phase1_solver": asdict(options.phase1_solver),
+        "phase2_solver": asdict(options.phase2_solver),
+        "exact_geometry": options.exact_geometry,
+        "ramp_resolution": options.ramp_resolution,
+        "quasi_static": options.quasi_static,
+    }
+
+
+def progress_reporter(options: SimulationOptions) -> Optional[ProgressReporter]:
+    """Reports the progress of a run as the options ask, if they ask at all."""
+    if not options.progress and options.progress_run_id is None:
+        return None
+    channel = None
+    if options.progress_run_id is not None:
+        channel = ProgressChannel(options.progress_run_id)
+    return ProgressReporter(
+        options.total_sim_time, channel=channel, show=options.progress
     )
 
-    return [
-        car_acceleration,
-        state.car_velocity,
-        0,
-        0,
-    ]
-
-
-time_eval_phase1 = np.linspace(0, total_sim_time, 10000)
-initial_state = SystemState(
-    car_velocity=rpm_to_rad_s(1800)
-    / (GEARBOX_RATIO * tm.current_cvt_ratio(0))
-    * WHEEL_RADIUS,
-    car_position=0.0,
-    shift_velocity=0.0,
-    shift_distance=0.0,
-)
 
-# Solve the system over the desired time span
-solution_phase1 = solve_ivp(
-    evaluate_cvt_system,
-    (0, total_sim_time),
-    initial_state.to_array(),
-    t_eval=time_eval_phase1,
-    events=[
-        get_shift_steady_event(cvt_shift),
-        car_velocity_constraint_event,
-        shift_constraint_event,
-    ],
-    atol=1e-6,
-    rtol=1e-4,
-)
+def write_outputs(result: SimulationResult, options: SimulationOptions, metadata):
+    """Writes the finished result to the output paths of the options."""
+    if options.output_path is not None:
+        if is_binary_path(options.output_path):
+            result.write_npy(options.output_path, metadata)
+        else:
+            result.write_csv(options.output_path)
+    if options.formatted_output_path is not None:
+        formatted = FormattedSimulationResult.from_result(result)
+        if is_binary_path(options.formatted_output_path):
+            formatted.write_formatted_npy(options.formatted_output_path, metadata)
+        else:
+            formatted.write_formatted_csv(options.formatted_output_path)
+
+
+def open_output_streams(options: SimulationOptions, metadata: dict) -> list:
+    """Streams writing the outputs asked for by options as the run goes."""
+    streams = []
+    if options.output_path is not None:
+        streams.append(
+            open_result_stream(
+                options.output_path,
+                lambda time, y: SimulationResult(time=time, y=y).columns(),
+                COLUMN_UNITS,
+                metadata,
+                options.stream_chunk_size,
+            )
+        )
+    if options.formatted_output_path is not None:
+        binary = is_binary_path(options.formatted_output_path)
+        streams.append(
+            open_result_stream(
+                options.formatted_output_path,
+                ChunkFormatter(binary=binary),
+                FORMATTED_OUTPUT_UNITS,
+                metadata,
+                options.stream_chunk_size,
+            )
+        )
+    return streams
+
+
+def is_binary_path(path: str) -> bool:
+    return path.endswith(BINARY_EXTENSION)
+
+
+def binary_path(path: Optional[str]) -> Optional[str]:
+    """path with its extension replaced by that of the binary files."""
+    if path is None:
+        return None
+    return os.path.splitext(path)[0] + BINARY_EXTENSION
+
+
+def integrate(
+    drivetrain: Drivetrain,
+    options: SimulationOptions,
+    sink: Optional[Callable[[np.ndarray, np.ndarray], None]] = None,
+) -> SimulationResult:
+    """
+    Integrates the model for an already built drivetrain as a hybrid system.
+    The shift is either free or pinned against one of its end-stops. Contact
+    with an end-stop and release from it are events ending a segment, after
+    which integration continues in the other mode. The state each later
+    segment starts from is kept as a checkpoint of the result.
+
+    sink(time, y) is given the samples of the result in order as the solver
+    steps past them, before the run has finished.
+    """
+    engine_simulator = drivetrain.engine_simulator
+    load_simulator = drivetrain.load_simulator
+    cvt_shift = drivetrain.cvt_shift
+    total_sim_time = options.total_sim_time
+
+    # Progress is reported from a wrapper, keeping the model itself silent
+    reporter = progress_reporter(options)
+
+    def with_progress(fun):
+        return reporter.wrap(fun) if reporter is not None else fun
+
+    # Define the system of differential equations
+    def evaluate_cvt_system(t, y):
+        state = SystemState.from_array(y)
+        # Trial steps may overshoot an end-stop before its event ends the
+        # segment, so the forces are continued past it at their boundary value.
+        # A diverging trial step (NaN) lands on full shift and is rejected.
+        state.shift_distance = max(0.0, min(MAX_SHIFT, state.shift_distance))
+
+        # ---------------------------
+        # CAR + ENGINE DYNAMICS BELOW
+        # ---------------------------
+
+        # Ratios, engine speed and torque shared by every component
+        snapshot = cvt_shift.snapshot(state)
+
+        # Vehicle acceleration
+        car_acceleration = load_simulator.calculate_acceleration(
+            state.car_velocity, snapshot.engine_power
+        )
+
+        # ------------------
+        # PULLEY STUFF BELOW
+        # ------------------
+        shift_acceleration = cvt_shift.calculate_shift_acceleration(state, snapshot)
+
+        return [
+            car_acceleration,
+            state.car_velocity,
+            shift_acceleration,
+            state.shift_velocity,
+        ]
+
+    # Jacobian of evaluate_cvt_system, for the implicit methods
+    def cvt_system_jacobian(t, y):
+        state = SystemState.from_array(y)
+        shift_distance_free = float(0 <= state.shift_distance <= MAX_SHIFT)
+        state.shift_distance = max(0.0, min(MAX_SHIFT, state.shift_distance))
+
+        snapshot = cvt_shift.snapshot(state)
+        partials = cvt_shift.get_partial_derivatives(state, snapshot)
+        power_v, _, power_d = partials["engine_power"]
+        shift_v, shift_s, shift_d = partials["shift_acceleration"]
+        acceleration_v, acceleration_power = (
+            load_simulator.calculate_acceleration_partials(
+                state.car_velocity, snapshot.engine_power
+            )
+        )
+
+        # Rows are the derivatives of [car_acceleration, car_velocity,
+        # shift_acceleration, shift_velocity]
+        return np.array(
+            [
+                [
+                    acceleration_v + acceleration_power * power_v,
+                    0.0,
+                    0.0,
+                    acceleration_power * power_d * shift_distance_free,
+                ],
+                [1.0, 0.0, 0.0, 0.0],
+                [
+                    shift_v,
+                    0.0,
+                    shift_s,
+                    shift_d * shift_distance_free,
+                ],
+                [0.0, 0.0, 1.0, 0.0],
+            ]
+        )
+
+    # PHASE 2: Simplified model (shift is pinned against an end-stop)
+    def get_pinned_system(stop):
+        # Constant CVT ratio of the pinned shift
+        cvt_ratio = tm.current_cvt_ratio(stop)
+        wheel_to_engine_ratio = (cvt_ratio * GEARBOX_RATIO) / WHEEL_RADIUS
 
-if solution_phase1.t_events[0].size > 0:
-    # The full shift steady event was triggered.
-    event_time = solution_phase1.t_events[0][0]
-    event_state = solution_phase1.y_events[0][0]
-
-    # Define a new t_eval for phase 2 (you can adjust the number of points as needed)
-    num_phase2_points = 1000
-    time_eval_phase2 = np.linspace(event_time, total_sim_time, num_phase2_points)
-
-    # -----------------------------------------------------------
-    # PHASE 2: Run simulation with shifting dynamics turned off
-    # -----------------------------------------------------------
-    solution_phase2 = solve_ivp(
-        evaluate_full_shift_system,
-        (event_time, total_sim_time),
-        event_state,
-        t_eval=time_eval_phase2,
+        def evaluate_pinned_system(t, y):
+            state = StateView(y)
+            engine_velocity = state.car_velocity * wheel_to_engine_ratio
+
+            engine_power = engine_simulator.get_power(engine_velocity)
+            car_acceleration = load_simulator.calculate_acceleration(
+                state.car_velocity, engine_power
+            )
+
+            return [
+                car_acceleration,
+                state.car_velocity,
+                0,
+                0,
+            ]
+
+        def pinned_system_jacobian(t, y):
+            state = StateView(y)
+            engine_velocity = state.car_velocity * wheel_to_engine_ratio
+
+            engine_power = engine_simulator.get_power(engine_velocity)
+            power_v = (
+                engine_simulator.get_torque_slope(engine_velocity) * engine_velocity
+                + engine_simulator.get_torque(engine_velocity)
+            ) * wheel_to_engine_ratio
+            acceleration_v, acceleration_power = (
+                load_simulator.calculate_acceleration_partials(
+                    state.car_velocity, engine_power
+                )
+            )
+
+            jacobian = np.zeros((4, 4))
+            jacobian[0, 0] = acceleration_v + acceleration_power * power_v
+            jacobian[1, 0] = 1.0
+            return jacobian
+
+        return evaluate_pinned_system, pinned_system_jacobian
+
+    # The free shift is sampled finely, the pinned shift more coarsely
+    free_samples = np.linspace(0, total_sim_time, 10000)
+    pinned_samples = np.linspace(0, total_sim_time, 1000)
+
+    resumed = options.resume_from is not None
+    if resumed:
+        t = options.resume_from.time
+        y = np.array(options.resume_from.y, dtype=float)
+        pinned_at = options.resume_from.pinned_at
+    else:
+        # The shift starts at rest against the engaged end-stop
+        t = 0.0
+        y = pinned_state(initial_state().to_array(), 0.0)
+        pinned_at = 0.0 if is_pinned(cvt_shift, y, 0.0) else None
+    checkpoints = []
+    solver_stats = {}
+    segment_t = []
+    segment_y = []
+    breakpoints = [t]
+    interpolants = []
+
+    while True:
+        if pinned_at is None:
+            phase = "phase1"
+            fun, jacobian = evaluate_cvt_system, cvt_system_jacobian
+            events = [shift_lower_stop_event, shift_upper_stop_event]
+            samples = free_samples
+            solver = options.phase1_solver
+        else:
+            phase = "phase2"
+            fun, jacobian = get_pinned_system(pinned_at)
+            events = [get_shift_release_event(cvt_shift, pinned_at)]
+            samples = pinned_samples
+            solver = options.phase2_solver
+        events.append(car_velocity_constraint_event)
+
+        # Samples at the start of a later segment were taken by the one before,
+        # which for a resumed run is the last segment of the original
+        first_segment = not segment_t and not resumed
+        if options.dense_output:
+            t_eval = None
+        elif first_segment:
+            t_eval = samples[samples >= t]
+        else:
+            t_eval = samples[samples > t]
+
+        solve_ivp_options = solver.solve_ivp_options(jacobian)
+        sampler = None
+        if sink is not None:
+            start = (t, y) if options.dense_output and first_segment else None
+            sampler = StepSampler(sink, t_eval, start)
+            solve_ivp_options = with_step_callback(solve_ivp_options, sampler)
+
+        # Solve the system until the end of the simulation or the next event
+        solution = solve_ivp(
+            with_progress(fun),
+            (t, total_sim_time),
+            y,
+            t_eval=t_eval,
+            events=events,
+            dense_output=options.dense_output,
+            **solve_ivp_options,
+        )
+        add_solver_statistics(solver_stats, phase, solution)
+        kept = slice(None)
+        if options.dense_output:
+            breakpoints.append(solution.t[-1])
+            interpolants.append(solution.sol)
+            if not first_segment:
+                kept = slice(1, None)
+        segment_t.append(np.asarray(solution.t, dtype=float)[kept])
+        segment_y.append(np.asarray(solution.y, dtype=float).reshape(4, -1)[:, kept])
+        if sampler is not None:
+            sampler.finish(segment_t[-1], segment_y[-1])
+
+        if solution.status != 1:
+            break  # Reached the end of the simulation, or the solver failed
+
+        event = min(
+            (i for i, times in enumerate(solution.t_events) if times.size > 0),
+            key=lambda i: solution.t_events[i][0],
+        )
+        t = solution.t_events[event][0]
+        y = solution.y_events[event][0]
+        if events[event] is car_velocity_constraint_event:
+            break
+        elif pinned_at is None:
+            # The shift hits an end-stop and stops there, staying pinned unless
+            # it is already accelerating away from it
+            stop = 0.0 if events[event] is shift_lower_stop_event else MAX_SHIFT
+            y = pinned_state(y, stop)
+            pinned_at = stop if is_pinned(cvt_shift, y, stop) else None
+        else:
+            y = pinned_state(y, pinned_at)
+            pinned_at = None
+        checkpoints.append(Checkpoint(t, y.copy(), pinned_at))
+
+    if reporter is not None:
+        reporter.finish("failed" if solution.status == -1 else "finished")
+
+    combined_solution = CombinedSolution(
+        np.concatenate(segment_t), np.concatenate(segment_y, axis=1)
+    )
+    trajectory = None
+    if options.dense_output:
+        trajectory = Trajectory(breakpoints, interpolants)
+    return SimulationResult(
+        combined_solution,
+        solver_stats=solver_stats,
+        trajectory=trajectory,
+        checkpoints=checkpoints,
+    )
+
+
+def integrate_quasi_static(
+    drivetrain: Drivetrain,
+    options: SimulationOptions,
+    sink: Optional[Callable[[np.ndarray, np.ndarray], None]] = None,
+) -> SimulationResult:
+    """
+    Integrates the reduced model of a quasi-static shift, which is always at
+    an equilibrium (see QuasiStaticShift), leaving the car velocity and
+    position as the only states. Within a step, the shift moves on from where
+    it was at the end of the last accepted step. The shift velocity of the
+    result is differentiated from its samples.
+
+    sink(time, y) is given every sample once the run has finished.
+    """
+    if options.dense_output:
+        raise ValueError("Quasi-static runs are only sampled on a fixed time grid")
+    load_simulator = drivetrain.load_simulator
+    cvt_shift = drivetrain.cvt_shift
+    shift = QuasiStaticShift(cvt_shift)
+    total_sim_time = options.total_sim_time
+    reporter = progress_reporter(options)
+
+    # Without the transients of the shift, the grid of the pinned shift suffices
+    samples = np.linspace(0, total_sim_time, 1000)
+    if options.resume_from is not None:
+        t = options.resume_from.time
+        y = np.array(options.resume_from.y, dtype=float)
+        samples = samples[samples > t]
+    else:
+        t = 0.0
+        y = np.array(initial_state().to_array(), dtype=float)
+    shift_distance = float(y[3])
+    # Shift distance at the start of every accepted step
+    step_times = [t]
+    step_shift_distances = [shift_distance]
+
+    def evaluate_reduced_system(t, y):
+        state = StateView(y)
+        snapshot = cvt_shift.snapshot(
+            SystemState(
+                car_velocity=state.car_velocity,
+                shift_distance=shift.equilibrium(state.car_velocity, shift_distance),
+            )
+        )
+        car_acceleration = load_simulator.calculate_acceleration(
+            state.car_velocity, snapshot.engine_power
+        )
+        return [car_acceleration, state.car_velocity]
+
+    def accept_step(solver):
+        nonlocal shift_distance
+        shift_distance = float(shift.equilibrium(solver.y[0], shift_distance))
+        step_times.append(solver.t)
+        step_shift_distances.append(shift_distance)
+
+    solution = solve_ivp(
+        (
+            reporter.wrap(evaluate_reduced_system)
+            if reporter is not None
+            else evaluate_reduced_system
+        ),
+        (t, total_sim_time),
+        y[:2],
+        t_eval=samples,
         events=[car_velocity_constraint_event],
+        **with_step_callback(options.phase1_solver.solve_ivp_options(), accept_step),
     )
+    solver_stats = {}
+    add_solver_statistics(solver_stats, "quasi_static", solution)
+    if reporter is not None:
+        reporter.finish("failed" if solution.status == -1 else "finished")
 
-    phase1_indices = solution_phase1.t <= event_time
-    combined_t = np.concatenate(
-        [solution_phase1.t[phase1_indices], solution_phase2.t[1:]]
+    # Each sample moves the shift on from the start of the step it is in
+    time = np.asarray(solution.t, dtype=float)
+    car_velocity, car_position = np.asarray(solution.y, dtype=float).reshape(2, -1)
+    step = np.searchsorted(step_times, time, side="left") - 1
+    previous = np.asarray(step_shift_distances)[np.clip(step, 0, None)]
+    shift_distances = np.asarray(shift.equilibrium(car_velocity, previous), dtype=float)
+    if len(time) > 1:
+        shift_velocity = np.gradient(shift_distances, time)
+    else:
+        shift_velocity = np.zeros_like(time)
+
+    combined_solution = CombinedSolution(
+        time, np.vstack([car_velocity, car_position, shift_velocity, shift_distances])
     )
-    combined_y = np.hstack(
-        [solution_phase1.y[:, phase1_indices], solution_phase2.y[:, 1:]]
+    if sink is not None:
+        sink(combined_solution.t, combined_solution.y)
+    return SimulationResult(combined_solution, solver_stats=solver_stats)
+
+
+def initial_state() -> SystemState:
+    """The car at 1800 rpm in the lowest ratio, with the shift at rest."""
+    return SystemState(
+        car_velocity=rpm_to_rad_s(1800)
+        / (GEARBOX_RATIO * tm.current_cvt_ratio(0))
+        * WHEEL_RADIUS,
+        car_position=0.0,
+        shift_velocity=0.0,
+        shift_distance=0.0,
     )
-else:
-    # Otherwise, use the phase 1 solution entirely.
-    combined_t = solution_phase1.t
-    combined_y = solution_phase1.y
 
 
-class CombinedSolution:
-    def __init__(self, t, y):
-        self.t = t
-        self.y = y
+def add_solver_statistics(solver_stats: dict, phase: str, solution):
+    """Adds the work of one segment to the totals of its phase."""
+    totals = solver_stats.setdefault(phase, {"nfev": 0, "njev": 0, "nlu": 0})
+    for key, value in solver_statistics(solution).items():
+        totals[key] += value
+
+
+def solver_statistics(solution) -> dict:
+    """Work done by solve_ivp, as plain integers."""
+    return {
+        "nfev": int(solution.nfev),
+        "njev": int(solution.njev),
+        "nlu": int(solution.nlu),
+    }
 
 
-combined_solution = CombinedSolution(combined_t, combined_y)
+# Options of main.py on top of the simulation arguments
+MAIN_OPTIONS = ("output", "binary", "stream", "run_id", "no_cache", "quasi_static")
 
-result = SimulationResult(combined_solution)
-result.write_csv("simulation_output.csv")
-FormattedSimulationResult.from_csv().write_formatted_csv()
+
+def get_main_arguments(
+    argv: List[str] = None,
+) -> Tuple[SimulationArgs, argparse.Namespace]:
+    """
+    The simulation arguments of the command line, and the options of main.py
+    itself (output, binary, stream, run_id, no_cache and quasi_static) as a
+    namespace.
+    """
+    parser = build_parser()
+    parser.add_argument(
+        "--output",
+        choices=list(OUTPUT_WRITERS),
+        default="both",
+        help=f"Files to write: {RAW_OUTPUT_PATH}, {FORMATTED_OUTPUT_PATH} "
+        "(read by the frontend), both or none (default: both)",
+    )
+    parser.add_argument(
+        "--binary",
+        action="store_true",
+        help=f"Write the files as memory-mappable {BINARY_EXTENSION} arrays with "
+        "a JSON header instead of CSV, keeping full precision",
+    )
+    parser.add_argument(
+        "--stream",
+        type=int,
+        nargs="?",
+        const=DEFAULT_CHUNK_SIZE,
+        default=None,
+        metavar="CHUNK_SIZE",
+        help="Write the files while the simulation runs, CHUNK_SIZE samples at "
+        f"a time (default: {DEFAULT_CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "--run_id",
+        default=None,
+        help="Publish the progress of the run to progress_RUN_ID.json, "
+        "replaced atomically as the run goes",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="Simulate even if the result of the same run is cached, "
+        "without storing it",
+    )
+    parser.add_argument(
+        "--quasi_static",
+        action="store_true",
+        help="Hold the shift at its equilibrium instead of simulating its "
+        "motion, which is much faster when only the car and engine speeds matter",
+    )
+    arguments = vars(parser.parse_args(argv))
+    main_options = argparse.Namespace(
+        **{name: arguments.pop(name) for name in MAIN_OPTIONS}
+    )
+    return SimulationArgs(**arguments), main_options
+
+
+if __name__ == "__main__":
+    # Parse arguments
+    args, main_options = get_main_arguments()
+    output_path, formatted_output_path = OUTPUT_WRITERS[main_options.output]
+    if main_options.binary:
+        output_path = binary_path(output_path)
+        formatted_output_path = binary_path(formatted_output_path)
+
+    # The frontend output is formatted from the result in memory
+    run_simulation(
+        args,
+        options=SimulationOptions(
+            progress=True,
+            output_path=output_path,
+            formatted_output_path=formatted_output_path,
+            stream_chunk_size=main_options.stream,
+            quasi_static=main_options.quasi_static,
+            progress_run_id=main_options.run_id,
+            ramp_cache_dir=DEFAULT_CACHE_DIR,
+            result_cache_dir=(
+                None if main_options.no_cache else DEFAULT_RESULT_CACHE_DIR
+            ),
+        ),
+    )
@@ -0,0 +1,445 @@
+import numpy as np
+from itertools import groupby
+from typing import List, Optional
+from dataclasses import fields, replace
+from scipy.integrate import RK45
+from simulations.drivetrain import build_drivetrain
+from constants.car_specs import (
+    GEARBOX_RATIO,
+    WHEEL_RADIUS,
+    MAX_SHIFT,
+)
+from utils.argument_parser import SimulationArgs
+from utils.baked_ramp import DEFAULT_RESOLUTION
+from utils.checkpoint import Checkpoint
+from utils.conversions import rpm_to_rad_s
+from utils.shift_geometry import using_geometry_table
+from utils.simulation_constraints import pinned_state, release_margin
+from utils.simulation_result import SimulationResult
+from utils.solvers import SolverSettings
+from utils.system_state import StateView, SystemState
+from utils.theoretical_models import TheoreticalModels as tm
+
+EVENT_BISECTIONS = 50
+# Step size control of scipy's RK45, which every lane follows on its own
+SAFETY = 0.9
+MIN_FACTOR = 0.2
+MAX_FACTOR = 10
+ERROR_EXPONENT = -1 / (RK45.error_estimator_order + 1)
+
+
+class _LaneGroup:
+    """Simulators sharing ramp geometries, with array-valued tuning parameters."""
+
+    def __init__(
+        self,
+        lanes: np.ndarray,
+        args_list: List[SimulationArgs],
+        ramp_resolution: Optional[int],
+        ramp_cache_dir: Optional[str],
+    ):
+        self.lanes = lanes
+
+        shared = ("primary_ramp_geometry", "secondary_helix_geometry")
+        lane_args = replace(
+            args_list[0],
+            **{
+                f.name: np.array(
+                    [getattr(args, f.name) for args in args_list], dtype=float
+                )
+                for f in fields(SimulationArgs)
+                if f.name not in shared
+            },
+        )
+        drivetrain = build_drivetrain(
+            lane_args, ramp_resolution=ramp_resolution, ramp_cache_dir=ramp_cache_dir
+        )
+        self.engine_simulator = drivetrain.engine_simulator
+        self.load_simulator = drivetrain.load_simulator
+        self.cvt_shift = drivetrain.cvt_shift
+
+
+class BatchCvtSimulator:
+    """
+    Integrates many tunings at once by stacking their states into a (4, N)
+    array and evaluating every simulator over NumPy arrays of parameters. One
+    evaluation costs about as much for hundreds of lanes as for one, so the
+    batch pays off for large sweeps.
+
+    Each lane is integrated as main.integrate would integrate it alone: by
+    RK45 with its own time, step size and tolerances, following the hybrid
+    model in which its shift is free or pinned against an end-stop. An
+    evaluation advances every lane by one stage, so lanes stiffer than the
+    others do not shorten their steps, and an event only restarts the lane
+    it happened in. A lane follows run_simulation to within the tolerances of
+    its solvers, though times of events sensitive to rounding, such as
+    reaching full shift, may differ by more. All lanes are sampled on a
+    single time grid.
+    """
+
+    def __init__(
+        self,
+        args_list: List[SimulationArgs],
+        total_sim_time: float = 15,
+        num_points: int = 1000,
+        phase1_solver: Optional[SolverSettings] = None,
+        phase2_solver: Optional[SolverSettings] = None,
+        ramp_resolution: Optional[int] = DEFAULT_RESOLUTION,
+        ramp_cache_dir: Optional[str] = None,
+        exact_geometry: bool = False,
+    ):
+        if not args_list:
+            raise ValueError("At least one set of simulation arguments is required")
+        # Tolerances of the free and pinned shift, as in SimulationOptions
+        if phase1_solver is None:
+            phase1_solver = SolverSettings(rtol=1e-4, atol=1e-6)
+        if phase2_solver is None:
+            phase2_solver = SolverSettings()
+        for solver in (phase1_solver, phase2_solver):
+            if solver.method != "RK45":
+                raise ValueError("The batch is only integrated with RK45")
+
+        self.args_list = list(args_list)
+        self.n = len(self.args_list)
+        self.total_sim_time = total_sim_time
+        self.time = np.linspace(0, total_sim_time, num_points)
+        self.phase1_solver = phase1_solver
+        self.phase2_solver = phase2_solver
+        self.exact_geometry = exact_geometry
+
+        # Lanes can only share simulators when they share ramp geometries
+        def ramp_key(i):
+            args = self.args_list[i]
+            return (args.primary_ramp_geometry, args.secondary_helix_geometry)
+
+        self.groups = []
+        for _, lanes in groupby(sorted(range(self.n), key=ramp_key), key=ramp_key):
+            lanes = np.array(list(lanes))
+            group_args = [self.args_list[i] for i in lanes]
+            self.groups.append(
+                _LaneGroup(lanes, group_args, ramp_resolution, ramp_cache_dir)
+            )
+
+        self.reset()
+
+    def reset(self):
+        """Frees every shift and clears the recorded events."""
+        self.pinned_at = np.full(self.n, np.nan)  # End-stop of pinned lanes
+        self.stopped = np.zeros(self.n, dtype=bool)
+        self.full_shift_time = np.full(self.n, np.nan)
+        self.stop_time = np.full(self.n, np.nan)
+        self.checkpoints = [[] for _ in range(self.n)]
+        self.nfev = 0
+
+    @property
+    def pinned(self) -> np.ndarray:
+        return ~np.isnan(self.pinned_at)
+
+    def initial_state(self) -> np.ndarray:
+        initial_state = SystemState(
+            car_velocity=rpm_to_rad_s(1800)
+            / (GEARBOX_RATIO * tm.current_cvt_ratio(0))
+            * WHEEL_RADIUS,
+            car_position=0.0,
+            shift_velocity=0.0,
+            shift_distance=0.0,
+        )
+        return np.tile(np.array(initial_state.to_array())[:, None], (1, self.n))
+
+    def evaluate(self, y: np.ndarray) -> np.ndarray:
+        """
+        Batched equivalent of evaluate_cvt_system and the pinned systems, for
+        a (4, N) state. The model does not depend on time, so the lanes may
+        be at different times.
+        """
+        self.nfev += 1
+        state = np.array(y, dtype=float)
+        pinned = self.pinned
+
+        # Trial steps may overshoot an end-stop before its event, as in main
+        state[3] = np.where(pinned, self.pinned_at, np.clip(state[3], 0, MAX_SHIFT))
+
+        car_acceleration = np.empty(self.n)
+        shift_acceleration = np.empty(self.n)
+        # Stopped lanes have zero velocity, their (discarded) values may divide by zero
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for group in self.groups:
+                lanes = group.lanes
+                lane_state = StateView(state[:, lanes])
+
+                snapshot = group.cvt_shift.snapshot(lane_state)
+                car_acceleration[lanes] = group.load_simulator.calculate_acceleration(
+                    lane_state.car_velocity, snapshot.engine_power
+                )
+                shift_acceleration[lanes] = (
+                    group.cvt_shift.calculate_shift_acceleration(lane_state, snapshot)
+                )
+
+        shifting = ~(pinned | self.stopped)
+        moving = ~self.stopped
+        return np.array(
+            [
+                np.where(moving, car_acceleration, 0),
+                np.where(moving, y[0], 0),
+                np.where(shifting, shift_acceleration, 0),
+                np.where(shifting, y[2], 0),
+            ]
+        )
+
+    def _release_margins(self, state: np.ndarray) -> np.ndarray:
+        """release_margin of every pinned lane, NaN for the others."""
+        pinned = self.pinned
+        margins = np.full(self.n, np.nan)
+        # The parameters of a group are arrays over all of its lanes
+        stops = np.where(pinned, self.pinned_at, 0.0)
+        for group in self.groups:
+            lanes = group.lanes
+            if np.any(pinned[lanes]):
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    margins[lanes] = release_margin(
+                        group.cvt_shift, state[:, lanes], stops[lanes]
+                    )
+        return np.where(pinned, margins, np.nan)
+
+    def _event_values(self, state: np.ndarray) -> np.ndarray:
+        """
+        (4, N) values of the events of every lane: the lower and upper
+        end-stops of a free shift, the release of a pinned one and the car
+        stopping. Events that do not apply to a lane are NaN.
+        """
+        free = ~(self.pinned | self.stopped)
+        return np.array(
+            [
+                np.where(free, state[3], np.nan),
+                np.where(free, state[3] - MAX_SHIFT, np.nan),
+                self._release_margins(state),
+                np.where(self.stopped, np.nan, state[0]),
+            ]
+        )
+
+    # Directions of the events of _event_values, as for solve_ivp
+    EVENT_DIRECTIONS = np.array([-1, 1, 1, -1])[:, None]
+
+    def _crossed(self, g_old: np.ndarray, g_new: np.ndarray) -> np.ndarray:
+        """Events crossing zero in their direction, the way solve_ivp finds them."""
+        up = (g_old <= 0) & (g_new >= 0)
+        down = (g_old >= 0) & (g_new <= 0)
+        return np.where(self.EVENT_DIRECTIONS > 0, up, down)
+
+    def _tolerances(self):
+        """(rtol, atol) of every lane, by whether its shift is pinned."""
+        pinned = self.pinned
+        rtol = np.where(pinned, self.phase2_solver.rtol, self.phase1_solver.rtol)
+        atol = np.where(pinned, self.phase2_solver.atol, self.phase1_solver.atol)
+        return rtol, atol
+
+    def _initial_step(self, t, y, f, lanes):
+        """
+        scipy's select_initial_step for lanes, each starting a segment at t
+        from y with the derivative f.
+        """
+        rtol, atol = self._tolerances()
+        interval = self.total_sim_time - t
+        scale = atol + np.abs(y) * rtol
+        # Lanes that are not starting a segment may give meaningless values
+        with np.errstate(divide="ignore", invalid="ignore"):
+            d0 = np.sqrt(np.mean((y / scale) ** 2, axis=0))
+            d1 = np.sqrt(np.mean((f / scale) ** 2, axis=0))
+            h0 = np.where((d0 < 1e-5) | (d1 < 1e-5), 1e-6, 0.01 * d0 / d1)
+            h0 = np.minimum(h0, interval)
+            f1 = self.evaluate(y + h0 * f)
+            d2 = np.sqrt(np.mean(((f1 - f) / scale) ** 2, axis=0)) / h0
+            h1 = np.where(
+                (d1 <= 1e-15) & (d2 <= 1e-15),
+                np.maximum(1e-6, h0 * 1e-3),
+                (0.01 / np.maximum(d1, d2)) ** -ERROR_EXPONENT,
+            )
+        return np.minimum(np.minimum(100 * h0, h1), interval)[lanes]
+
+    @staticmethod
+    def _dense(t_old, h, y_old, Q, t):
+        """RK45's dense output of the steps from t_old over h, at t."""
+        x = (t - t_old) / h
+        powers = np.cumprod(np.repeat(x[None], Q.shape[-1], axis=0), axis=0)
+        return y_old + h * np.einsum("ink,kn->in", Q, powers)
+
+    def _locate_events(self, t_old, h, y_old, Q, y, event, lanes):
+        """
+        Times within their last step at which event crosses zero in lanes, by
+        vectorized bisection on the dense output of the steps.
+        """
+        direction = self.EVENT_DIRECTIONS[event, 0]
+        lo = t_old[lanes]
+        hi = t_old[lanes] + h[lanes]
+        state = y.copy()
+        for _ in range(EVENT_BISECTIONS):
+            mid = (lo + hi) / 2
+            state[:, lanes] = self._dense(
+                t_old[lanes], h[lanes], y_old[:, lanes], Q[:, lanes], mid
+            )
+            crossed = self._event_values(state)[event, lanes] * direction >= 0
+            hi = np.where(crossed, mid, hi)
+            lo = np.where(crossed, lo, mid)
+        return hi
+
+    def _handle_event(self, t: float, state: np.ndarray, event: int, lane: int):
+        """Switches the mode of lane as main.integrate does at the event."""
+        if event == 3:
+            self.stopped[lane] = True
+            self.stop_time[lane] = t
+            return
+        if event == 2:
+            state[:, lane] = pinned_state(state[:, lane], self.pinned_at[lane])
+            self.pinned_at[lane] = np.nan
+        else:
+            # The shift hits an end-stop and stops there, staying pinned unless
+            # it is already accelerating away from it
+            stop = 0.0 if event == 0 else MAX_SHIFT
+            state[:, lane] = pinned_state(state[:, lane], stop)
+            self.pinned_at[lane] = stop
+            if self._release_margins(state)[lane] > 0:
+                self.pinned_at[lane] = np.nan
+            elif stop == MAX_SHIFT and np.isnan(self.full_shift_time[lane]):
+                self.full_shift_time[lane] = t
+        self.checkpoints[lane].append(
+            Checkpoint(
+                t,
+                state[:, lane].copy(),
+                None if np.isnan(self.pinned_at[lane]) else self.pinned_at[lane],
+            )
+        )
+
+    def run(self, y0: Optional[np.ndarray] = None) -> List[SimulationResult]:
+        """
+        Integrates every lane and returns one SimulationResult per tuning, with
+        the checkpoints of its segments. Per lane, the first time the shift is
+        pinned at full shift and the time the car stops are recorded in
+        full_shift_time and stop_time (NaN when it never happened).
+        """
+        with using_geometry_table(not self.exact_geometry):
+            return self._run(y0)
+
+    def _run(self, y0: Optional[np.ndarray]) -> List[SimulationResult]:
+        self.reset()
+        y = self.initial_state() if y0 is None else np.array(y0, dtype=float)
+        # Every shift starts at rest against the engaged end-stop
+        y = pinned_state(y, 0.0)
+        self.pinned_at[:] = 0.0
+        self.pinned_at[self._release_margins(y) > 0] = np.nan
+
+        end_time = self.total_sim_time
+        t = np.zeros(self.n)
+        f = self.evaluate(y)
+        h_abs = self._initial_step(t, y, f, np.arange(self.n))
+        step_rejected = np.zeros(self.n, dtype=bool)
+        event_values = self._event_values(y)
+        samples = np.empty((4, self.n, self.time.size))
+        samples[:, :, 0] = y
+        next_sample = np.ones(self.n, dtype=int)
+        K = np.empty((RK45.n_stages + 1, 4, self.n))
+
+        while True:
+            active = ~self.stopped & (t < end_time)
+            if not np.any(active):
+                break
+
+            min_step = 10 * np.abs(np.nextafter(t, np.inf) - t)
+            if np.any(active & (h_abs < min_step)):
+                lane = np.flatnonzero(active & (h_abs < min_step))[0]
+                raise RuntimeError(
+                    f"Batch integration failed in lane {lane}: "
+                    "Required step size is less than spacing between numbers."
+                )
+            t_new = np.minimum(t + h_abs, end_time)
+            h = t_new - t
+
+            # One RK45 step of every lane, each with its own step size
+            K[0] = f
+            for s in range(1, RK45.n_stages):
+                dy = np.tensordot(RK45.A[s, :s], K[:s], axes=1) * h
+                K[s] = self.evaluate(y + dy)
+            y_new = y + h * np.tensordot(RK45.B, K[:-1], axes=1)
+            K[-1] = self.evaluate(y_new)
+
+            rtol, atol = self._tolerances()
+            scale = atol + np.maximum(np.abs(y), np.abs(y_new)) * rtol
+            error = h * np.tensordot(RK45.E, K, axes=1) / scale
+            error_norm = np.sqrt(np.mean(error**2, axis=0))
+            accepted = active & (error_norm < 1)
+
+            with np.errstate(divide="ignore"):
+                factor = SAFETY * error_norm**ERROR_EXPONENT
+            grown = np.where(
+                error_norm == 0, MAX_FACTOR, np.minimum(MAX_FACTOR, factor)
+            )
+            grown = np.where(step_rejected, np.minimum(1, grown), grown)
+            shrunk = np.maximum(MIN_FACTOR, factor)
+            h_abs = np.where(
+                accepted, h * grown, np.where(active, h_abs * shrunk, h_abs)
+            )
+            step_rejected = np.where(accepted, False, step_rejected | active)
+            if not np.any(accepted):
+                continue
+
+            # Each accepted step ends at its lane's earliest event, if any
+            Q = np.einsum("sin,sk->ink", K, RK45.P)
+            t_old, y_old = t, y
+            t = np.where(accepted, t_new, t)
+            y = np.where(accepted, y_new, y)
+            f = np.where(accepted, K[-1], f)
+            new_event_values = self._event_values(y)
+            crossed = self._crossed(event_values, new_event_values) & accepted
+            event_values = np.where(accepted, new_event_values, event_values)
+            event = np.full(self.n, -1)
+            event_time = np.full(self.n, np.inf)
+            for candidate in range(len(crossed)):
+                lanes = np.flatnonzero(crossed[candidate])
+                if lanes.size == 0:
+                    continue
+                times = self._locate_events(t_old, h, y_old, Q, y, candidate, lanes)
+                earlier = times < event_time[lanes]
+                event_time[lanes[earlier]] = times[earlier]
+                event[lanes[earlier]] = candidate
+            lanes = np.flatnonzero(event >= 0)
+            t[lanes] = event_time[lanes]
+
+            while True:
+                due = np.flatnonzero(accepted)
+                due = due[next_sample[due] < self.time.size]
+                due = due[self.time[next_sample[due]] <= t[due]]
+                if due.size == 0:
+                    break
+                samples[:, due, next_sample[due]] = self._dense(
+                    t_old[due],
+                    h[due],
+                    y_old[:, due],
+                    Q[:, due],
+                    self.time[next_sample[due]],
+                )
+                next_sample[due] += 1
+
+            if lanes.size == 0:
+                continue
+            y[:, lanes] = self._dense(
+                t_old[lanes], h[lanes], y_old[:, lanes], Q[:, lanes], t[lanes]
+            )
+            for lane in lanes:
+                self._handle_event(t[lane], y, event[lane], lane)
+            # The lanes start their next segment afresh, as solve_ivp does
+            f[:, lanes] = self.evaluate(y)[:, lanes]
+            h_abs[lanes] = self._initial_step(t, y, f, lanes)
+            step_rejected[lanes] = False
+            event_values[:, lanes] = self._event_values(y)[:, lanes]
+
+        return [self._lane_result(samples, lane) for lane in range(self.n)]
+
+    def _lane_result(self, samples: np.ndarray, lane: int) -> SimulationResult:
+        if self.stopped[lane]:
+            count = np.searchsorted(self.time, self.stop_time[lane], side="right")
+        else:
+            count = self.time.size
+        return SimulationResult(
+            time=self.time[:count],
+            y=samples[:, lane, :count],
+            checkpoints=self.checkpoints[lane],
+        )
@@ -1,7 +1,10 @@
 import numpy as np
 import math
+from typing import Tuple
 from utils.theoretical_models import TheoreticalModels as tm
-from constants.car_specs import SHEAVE_ANGLE, BELT_CROSS_SECTIONAL_AREA, BELT_HEIGHT
+from utils.shift_geometry import ShiftGeometry, shift_geometry
+from utils.drivetrain_snapshot import DrivetrainSnapshot
+from constants.car_specs import SHEAVE_ANGLE, BELT_CROSS_SECTIONAL_AREA
 from constants.constants import (
     RUBBER_DENSITY,
     RUBBER_ALUMINUM_STATIC_FRICTION,
@@ -21,11 +24,15 @@ class BeltSimulator:
     def calculate_centrifugal_force(
         self, ω: float, shift_distance: float, wrap_angle: float
     ) -> float:
+        geometry = shift_geometry(shift_distance)
         if self.primary:
-            radius = tm.outer_prim_radius(shift_distance) - BELT_HEIGHT / 2
+            radius = geometry.primary_radius
         else:
-            radius = tm.outer_sec_radius(shift_distance) - BELT_HEIGHT / 2
+            radius = geometry.secondary_radius
 
+        return self._centrifugal_force(ω, radius, wrap_angle)
+
+    def _centrifugal_force(self, ω: float, radius: float, wrap_angle: float) -> float:
         length = radius * wrap_angle
         mass = RUBBER_DENSITY * BELT_CROSS_SECTIONAL_AREA * length
 
@@ -57,6 +64,77 @@ class BeltSimulator:
             centrifugal_force, radial_force, wrap_angle
         )
 
+    def calculate_radial_force_from_snapshot(
+        self, snapshot: DrivetrainSnapshot, clamping_force: float
+    ) -> float:
+        """calculate_radial_force for this belt's side of the snapshot geometry."""
+        geometry = snapshot.geometry
+        if self.primary:
+            radius = geometry.primary_radius
+            wrap_angle = geometry.primary_wrap_angle
+        else:
+            radius = geometry.secondary_radius
+            wrap_angle = geometry.secondary_wrap_angle
+
+        centrifugal_force = self._centrifugal_force(
+            snapshot.engine_velocity, radius, wrap_angle
+        )
+        radial_force = self.radial_force_from_clamping(clamping_force)
+        return self.calculate_net_radial_force(
+            centrifugal_force, radial_force, wrap_angle
+        )
+
+    def radial_force_partials(
+        self, ω: float, radius: float, wrap_angle: float, clamping_force: float
+    ) -> Tuple[float, float, float, float]:
+        """
+        Partial derivatives of the net radial force with respect to ω, the
+        pitch radius, the wrap angle and the clamping force, in that order.
+        """
+        mass_per_angle = RUBBER_DENSITY * BELT_CROSS_SECTIONAL_AREA * radius
+        centrifugal_force = mass_per_angle * wrap_angle * ω**2 * radius
+        radial_force = self.radial_force_from_clamping(clamping_force)
+        spread = 2 * np.sin(wrap_angle / 2)
+        return (
+            2 * mass_per_angle * wrap_angle * ω * radius * spread,
+            2 * centrifugal_force / radius * spread,
+            mass_per_angle * ω**2 * radius * spread
+            + (centrifugal_force + radial_force) * np.cos(wrap_angle / 2),
+            2 * np.tan(SHEAVE_ANGLE / 2) * spread,
+        )
+
+    def radial_force_partials_from_snapshot(
+        self,
+        snapshot: DrivetrainSnapshot,
+        geometry_slope: ShiftGeometry,
+        clamping_force: float,
+    ) -> Tuple[float, float, float]:
+        """
+        Partial derivatives of calculate_radial_force_from_snapshot with respect
+        to ω, the shift distance (through the geometry only, given its
+        derivatives) and the clamping force, in that order.
+        """
+        geometry = snapshot.geometry
+        if self.primary:
+            radius = geometry.primary_radius
+            wrap_angle = geometry.primary_wrap_angle
+            radius_slope = geometry_slope.primary_radius
+            wrap_angle_slope = geometry_slope.primary_wrap_angle
+        else:
+            radius = geometry.secondary_radius
+            wrap_angle = geometry.secondary_wrap_angle
+            radius_slope = geometry_slope.secondary_radius
+            wrap_angle_slope = geometry_slope.secondary_wrap_angle
+
+        force_ω, force_radius, force_wrap, force_clamping = self.radial_force_partials(
+            snapshot.engine_velocity, radius, wrap_angle, clamping_force
+        )
+        return (
+            force_ω,
+            force_radius * radius_slope + force_wrap * wrap_angle_slope,
+            force_clamping,
+        )
+
     def calculate_slack_tension(
         self,
         radial_force: float,
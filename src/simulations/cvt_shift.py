@@ -1,10 +1,12 @@
+import numpy as np
 from utils.system_state import SystemState
-from utils.theoretical_models import TheoreticalModels as tm
+from utils.drivetrain_snapshot import DrivetrainSnapshot
+from utils.shift_geometry import shift_geometry, shift_geometry_derivative
 from simulations.engine_simulation import EngineSimulator
 from simulations.primary_pulley import PrimaryPulley
 from simulations.secondary_pulley import SecondaryPulley
 from simulations.belt_simulator import BeltSimulator
-from constants.car_specs import GEARBOX_RATIO, WHEEL_RADIUS
+from constants.car_specs import GEARBOX_RATIO, WHEEL_RADIUS, MAX_SHIFT
 
 
 class CvtShift:
@@ -22,34 +24,51 @@ class CvtShift:
         self.primary_belt = primary_belt
         self.secondary_belt = secondary_belt
         self.cvt_moving_mass = 0.5  # TODO: Use constants
+        self.raw_friction = 20  # TODO: Update to use calculation
 
-    def get_pulley_forces(self, state: SystemState):
-        # Compute CVT ratio and engine velocity
-        cvt_ratio = tm.current_cvt_ratio(state.shift_distance)
+    def snapshot(self, state: SystemState) -> DrivetrainSnapshot:
+        """Computes the quantities every component needs for this state once."""
+        geometry = shift_geometry(state.shift_distance)
         wheel_to_engine_ratio = (
-            cvt_ratio * GEARBOX_RATIO
+            geometry.cvt_ratio * GEARBOX_RATIO
         ) / WHEEL_RADIUS  # or import these constants
         engine_velocity = state.car_velocity * wheel_to_engine_ratio
-
-        # Engine torque for secondary force calculation
         engine_torque = self.engine_simulator.get_torque(engine_velocity)
 
+        ramp_distance = np.clip(state.shift_distance, 0, MAX_SHIFT)
+        primary_ramp = self.primary_simulator.ramp
+        return DrivetrainSnapshot(
+            shift_distance=state.shift_distance,
+            ramp_distance=ramp_distance,
+            geometry=geometry,
+            engine_velocity=engine_velocity,
+            engine_torque=engine_torque,
+            engine_power=engine_torque * engine_velocity,
+            primary_ramp_height=primary_ramp.height(ramp_distance),
+            primary_ramp_slope=primary_ramp.slope(ramp_distance),
+            secondary_ramp_slope=self.secondary_simulator.ramp.slope(ramp_distance),
+        )
+
+    def get_pulley_forces(
+        self, state: SystemState, snapshot: DrivetrainSnapshot = None
+    ):
+        if snapshot is None:
+            snapshot = self.snapshot(state)
+
         # Calculate forces using the provided simulators
-        primary_force = self.primary_simulator.calculate_net_force(
-            state.shift_distance, engine_velocity
+        primary_force = self.primary_simulator.calculate_net_force_from_snapshot(
+            snapshot
         )
-        secondary_force = self.secondary_simulator.calculate_net_force(
-            engine_torque * cvt_ratio, state.shift_distance
+        secondary_force = self.secondary_simulator.calculate_net_force_from_snapshot(
+            snapshot
         )
 
-        # Calculate wrap angles and convert to radial forces
-        primary_wrap_angle = tm.primary_wrap_angle(state.shift_distance)
-        secondary_wrap_angle = tm.secondary_wrap_angle(state.shift_distance)
-        primary_radial = self.primary_belt.calculate_radial_force(
-            engine_velocity, state.shift_distance, primary_wrap_angle, primary_force
+        # Convert to radial forces using the wrap angles
+        primary_radial = self.primary_belt.calculate_radial_force_from_snapshot(
+            snapshot, primary_force
         )
-        secondary_radial = self.secondary_belt.calculate_radial_force(
-            engine_velocity, state.shift_distance, secondary_wrap_angle, secondary_force
+        secondary_radial = self.secondary_belt.calculate_radial_force_from_snapshot(
+            snapshot, secondary_force
         )
 
         return {
@@ -62,14 +81,28 @@ class CvtShift:
     def frictional_force(
         self, sum_of_radial_forces: float, shift_velocity: float
     ) -> float:
-        raw_friction = 20  # TODO: Update to use calculation
-        friction_magnitude = min(raw_friction, abs(sum_of_radial_forces))
-        if shift_velocity > 0:
-            return -friction_magnitude
-        return friction_magnitude
-
-    def calculate_shift_acceleration(self, state: SystemState) -> float:
-        pulley_forces = self.get_pulley_forces(state)
+        friction_magnitude = np.minimum(self.raw_friction, np.abs(sum_of_radial_forces))
+        return np.where(shift_velocity > 0, -friction_magnitude, friction_magnitude)
+
+    def frictional_force_slope(
+        self, sum_of_radial_forces: float, shift_velocity: float
+    ) -> float:
+        """
+        Derivative of frictional_force with respect to the sum of radial forces.
+        The jump as the shift velocity changes sign has no derivative, so the
+        shift velocity only selects the side.
+        """
+        magnitude_slope = np.where(
+            np.abs(sum_of_radial_forces) < self.raw_friction,
+            np.sign(sum_of_radial_forces),
+            0.0,
+        )
+        return np.where(shift_velocity > 0, -magnitude_slope, magnitude_slope)
+
+    def calculate_shift_acceleration(
+        self, state: SystemState, snapshot: DrivetrainSnapshot = None
+    ) -> float:
+        pulley_forces = self.get_pulley_forces(state, snapshot)
         shift_velocity = state.shift_velocity
 
         sum_of_radial_forces = (
@@ -77,3 +110,115 @@ class CvtShift:
         )
         friction = self.frictional_force(sum_of_radial_forces, shift_velocity)
         return (sum_of_radial_forces + friction) / self.cvt_moving_mass
+
+    def get_partial_derivatives(
+        self, state: SystemState, snapshot: DrivetrainSnapshot = None
+    ):
+        """
+        Partial derivatives of the engine power and the shift acceleration with
+        respect to (car_velocity, shift_velocity, shift_distance), assembled
+        from the partial derivatives of every component by the chain rule.
+        The car position does not enter the model.
+        """
+        if snapshot is None:
+            snapshot = self.snapshot(state)
+        geometry = snapshot.geometry
+        geometry_slope = shift_geometry_derivative(state.shift_distance)
+        ramp_distance = snapshot.ramp_distance
+        # Clipping the ramp distance cuts its dependence on the shift distance
+        ramp_active = (state.shift_distance >= 0) & (state.shift_distance <= MAX_SHIFT)
+
+        # Engine
+        wheel_to_engine_ratio = GEARBOX_RATIO / WHEEL_RADIUS
+        ω = snapshot.engine_velocity
+        ω_v = geometry.cvt_ratio * wheel_to_engine_ratio
+        ω_d = state.car_velocity * wheel_to_engine_ratio * geometry_slope.cvt_ratio
+        torque = snapshot.engine_torque
+        torque_slope = self.engine_simulator.get_torque_slope(ω)
+        power_v = (torque_slope * ω + torque) * ω_v
+        power_d = (torque_slope * ω + torque) * ω_d
+
+        # Primary clamping force
+        flyweight_ω, flyweight_height, flyweight_slope, primary_spring = (
+            self.primary_simulator.net_force_partials(
+                snapshot.primary_ramp_height, snapshot.primary_ramp_slope, ω
+            )
+        )
+        primary_force = self.primary_simulator.calculate_net_force_from_snapshot(
+            snapshot
+        )
+        primary_force_v = flyweight_ω * ω_v
+        primary_ramp = self.primary_simulator.ramp
+        ramp_height_d = primary_ramp.height_derivative(ramp_distance) * ramp_active
+        ramp_slope_d = primary_ramp.slope_derivative(ramp_distance) * ramp_active
+        primary_force_d = (
+            flyweight_ω * ω_d
+            + flyweight_height * ramp_height_d
+            + flyweight_slope * ramp_slope_d
+            + primary_spring
+        )
+
+        # Secondary clamping force, driven by the engine torque through the CVT
+        secondary_ramp = self.secondary_simulator.ramp
+        helix_torque, helix_rotation, helix_slope, helix_radius, secondary_spring = (
+            self.secondary_simulator.net_force_partials(
+                torque * geometry.cvt_ratio,
+                ramp_distance,
+                snapshot.secondary_ramp_slope,
+                geometry.secondary_radius,
+            )
+        )
+        secondary_force = self.secondary_simulator.calculate_net_force_from_snapshot(
+            snapshot
+        )
+        secondary_force_v = helix_torque * torque_slope * ω_v * geometry.cvt_ratio
+        helix_torque_d = (
+            torque_slope * ω_d * geometry.cvt_ratio + torque * geometry_slope.cvt_ratio
+        )
+        helix_slope_d = secondary_ramp.slope_derivative(ramp_distance) * ramp_active
+        secondary_force_d = (
+            helix_torque * helix_torque_d
+            + helix_rotation * ramp_active
+            + helix_slope * helix_slope_d
+            + helix_radius * geometry_slope.secondary_radius
+            + secondary_spring
+        )
+
+        # Radial forces of the belt on each pulley
+        radial_ω, radial_geometry, radial_clamping = (
+            self.primary_belt.radial_force_partials_from_snapshot(
+                snapshot, geometry_slope, primary_force
+            )
+        )
+        primary_radial_v = radial_ω * ω_v + radial_clamping * primary_force_v
+        primary_radial_d = (
+            radial_ω * ω_d + radial_geometry + radial_clamping * primary_force_d
+        )
+        radial_ω, radial_geometry, radial_clamping = (
+            self.secondary_belt.radial_force_partials_from_snapshot(
+                snapshot, geometry_slope, secondary_force
+            )
+        )
+        secondary_radial_v = radial_ω * ω_v + radial_clamping * secondary_force_v
+        secondary_radial_d = (
+            radial_ω * ω_d + radial_geometry + radial_clamping * secondary_force_d
+        )
+
+        # Shift acceleration, with friction following the net radial force
+        sum_of_radial_forces = self.primary_belt.calculate_radial_force_from_snapshot(
+            snapshot, primary_force
+        ) - self.secondary_belt.calculate_radial_force_from_snapshot(
+            snapshot, secondary_force
+        )
+        scale = (
+            1 + self.frictional_force_slope(sum_of_radial_forces, state.shift_velocity)
+        ) / self.cvt_moving_mass
+
+        return {
+            "engine_power": (power_v, 0.0, power_d),
+            "shift_acceleration": (
+                scale * (primary_radial_v - secondary_radial_v),
+                0.0,
+                scale * (primary_radial_d - secondary_radial_d),
+            ),
+        }
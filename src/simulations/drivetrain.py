@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+from simulations.load_simulation import LoadSimulator
+from simulations.engine_simulation import EngineSimulator
+from simulations.primary_pulley import PrimaryPulley
+from simulations.secondary_pulley import SecondaryPulley
+from simulations.belt_simulator import BeltSimulator
+from simulations.cvt_shift import CvtShift
+from constants.engine_specs import torque_curve
+from constants.car_specs import ENGINE_INERTIA
+from utils.argument_parser import SimulationArgs
+from utils.conversions import deg_to_rad
+
+
+@dataclass
+class Drivetrain:
+    """Every simulator of the car, configured from one set of arguments."""
+
+    engine_simulator: EngineSimulator
+    load_simulator: LoadSimulator
+    primary_simulator: PrimaryPulley
+    secondary_simulator: SecondaryPulley
+    primary_belt: BeltSimulator
+    secondary_belt: BeltSimulator
+    cvt_shift: CvtShift
+
+
+def build_drivetrain(
+    args: SimulationArgs, ramp_resolution: int = None, ramp_cache_dir: str = None
+) -> Drivetrain:
+    """
+    Builds the simulators for a set of arguments. The numeric arguments may
+    also be NumPy arrays, one entry per tuning, as long as the ramp geometries
+    are shared. The ramps are baked at ramp_resolution when it is set, using
+    the disk cache in ramp_cache_dir if one is given.
+    """
+    engine_simulator = EngineSimulator(
+        torque_curve=torque_curve, inertia=ENGINE_INERTIA
+    )
+    load_simulator = LoadSimulator(
+        car_mass=args.vehicle_weight + args.driver_weight,
+        incline_angle=deg_to_rad(args.angle_of_incline),
+    )
+    primary_simulator = PrimaryPulley(
+        spring_coeff_comp=args.primary_spring_rate,
+        initial_compression=args.primary_spring_pretension,
+        flyweight_mass=args.flyweight_mass,
+        ramp_type=args.primary_ramp_geometry,
+        ramp_resolution=ramp_resolution,
+        ramp_cache_dir=ramp_cache_dir,
+    )
+    secondary_simulator = SecondaryPulley(
+        spring_coeff_tors=args.secondary_torsion_spring_rate,
+        spring_coeff_comp=args.secondary_compression_spring_rate,
+        initial_rotation=deg_to_rad(args.secondary_rotational_spring_pretension),
+        initial_compression=args.secondary_linear_spring_pretension,
+        ramp_type=args.secondary_helix_geometry,
+        ramp_resolution=ramp_resolution,
+        ramp_cache_dir=ramp_cache_dir,
+    )
+    primary_belt = BeltSimulator(primary=True)
+    secondary_belt = BeltSimulator(primary=False)
+    cvt_shift = CvtShift(
+        engine_simulator,
+        primary_simulator,
+        secondary_simulator,
+        primary_belt,
+        secondary_belt,
+    )
+    return Drivetrain(
+        engine_simulator=engine_simulator,
+        load_simulator=load_simulator,
+        primary_simulator=primary_simulator,
+        secondary_simulator=secondary_simulator,
+        primary_belt=primary_belt,
+        secondary_belt=secondary_belt,
+        cvt_shift=cvt_shift,
+    )
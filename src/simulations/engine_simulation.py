@@ -14,6 +14,10 @@ class EngineSimulator:
         """Get the torque output at a given angular velocity."""
         return self.torque_curve(angular_velocity)
 
+    def get_torque_slope(self, angular_velocity: float) -> float:
+        """Get dT/dω of the torque curve at a given angular velocity."""
+        return self.torque_curve.derivative(angular_velocity)
+
     def get_power(self, angular_velocity: float) -> float:
         """Get the power output at a given angular velocity."""
         return self.get_torque(angular_velocity) * angular_velocity
@@ -1,4 +1,5 @@
-import math
+import numpy as np
+from typing import Tuple
 from constants.constants import GRAVITY, AIR_DENSITY
 from constants.car_specs import (
     FRONTAL_AREA,
@@ -31,7 +32,7 @@ class LoadSimulator:
 
     def calculate_incline_force(self) -> float:
         """Calculate the incline force due to gravity."""
-        return self.car_mass * self.g * math.sin(self.incline_angle)
+        return self.car_mass * self.g * np.sin(self.incline_angle)
 
     def calculate_drag_force(self, velocity: float) -> float:
         """Calculate the drag force on the car."""
@@ -39,10 +40,8 @@ class LoadSimulator:
             self.air_density, velocity, self.frontal_area, self.drag_coefficient
         )
 
-        if velocity < 0:
-            drag_force *= -1
-
-        return drag_force
+        # Drag always opposes the direction of travel
+        return np.copysign(drag_force, velocity)
 
     def calculate_total_load_force(self, velocity: float) -> float:
         """Calculate the total load torque on the wheels due to drag and incline."""
@@ -63,6 +62,22 @@ class LoadSimulator:
         """Calculate the acceleration of the car."""
         engine = power / (velocity * self.car_mass)
         air_resistance = self.calculate_drag_force(velocity) / self.car_mass
-        gravity = self.g * math.sin(self.incline_angle)
+        gravity = self.g * np.sin(self.incline_angle)
         accel = engine - air_resistance - gravity
         return accel
+
+    def calculate_acceleration_partials(
+        self, velocity: float, power: float
+    ) -> Tuple[float, float]:
+        """Partial derivatives of the acceleration with respect to velocity and power."""
+        # The drag magnitude grows with v², and its sign follows v
+        drag_slope = (
+            self.air_density
+            * np.abs(velocity)
+            * self.frontal_area
+            * self.drag_coefficient
+        )
+        return (
+            -power / (velocity**2 * self.car_mass) - drag_slope / self.car_mass,
+            1 / (velocity * self.car_mass),
+        )
@@ -1,6 +1,9 @@
 import numpy as np
+from typing import Tuple
 from utils.theoretical_models import TheoreticalModels as tm
+from utils.drivetrain_snapshot import DrivetrainSnapshot
 from utils.ramp_representation import CircularSegment, LinearSegment, PiecewiseRamp
+from utils.baked_ramp import bake_ramp
 from constants.car_specs import MAX_SHIFT, INITIAL_FLYWEIGHT_RADIUS
 
 
@@ -11,6 +14,8 @@ class PrimaryPulley:
         initial_compression: float,  # m
         flyweight_mass: float,  # kg
         ramp_type: int,
+        ramp_resolution: int = None,  # Bake the ramp into a table when set
+        ramp_cache_dir: str = None,  # Where baked tables are cached on disk
     ):
         self.spring_coeff_comp = spring_coeff_comp
         self.initial_compression = initial_compression
@@ -48,28 +53,48 @@ class PrimaryPulley:
                 )
             )
 
+        if ramp_resolution is not None:
+            self.ramp = bake_ramp(self.ramp, ramp_resolution, ramp_cache_dir)
+
     def calculate_flyweight_force(
         self, shift_distance: float, angular_velocity: float
     ) -> float:
-        if shift_distance < 0:
-            shift_distance = 0
-        if shift_distance > MAX_SHIFT:
-            shift_distance = MAX_SHIFT
+        shift_distance = np.clip(shift_distance, 0, MAX_SHIFT)
 
-        flyweight_radius = self.initial_flyweight_radius + self.ramp.height(
-            shift_distance
+        return self._flyweight_force(
+            self.ramp.height(shift_distance),
+            self.ramp.slope(shift_distance),
+            angular_velocity,
         )
+
+    def _flyweight_force(
+        self, ramp_height: float, ramp_slope: float, angular_velocity: float
+    ) -> float:
+        flyweight_radius = self.initial_flyweight_radius + ramp_height
         centrifugal_force = tm.centrifugal_force(
             self.flyweight_mass,
             angular_velocity,
             flyweight_radius,
         )
 
-        angle = np.arctan(self.ramp.slope(shift_distance))
+        # tan(arctan(slope)) of the ramp angle is the slope itself
+        return centrifugal_force * ramp_slope
 
-        # print(f"Shift distance: {shift_distance:.2f}, Flyweight radius: {flyweight_radius:.2f}, Angular velocity: {angular_velocity:.2f}, Angle: {angle:.2f}")
-        # print(f"Centrifugal force: {centrifugal_force:.2f}, Angle: {np.sin(angle):.5f}")
-        return centrifugal_force * np.tan(angle)
+    def net_force_partials(
+        self, ramp_height: float, ramp_slope: float, angular_velocity: float
+    ) -> Tuple[float, float, float, float]:
+        """
+        Partial derivatives of the net force with respect to the angular
+        velocity, ramp height, ramp slope and shift distance (through the
+        spring), in that order.
+        """
+        flyweight_radius = self.initial_flyweight_radius + ramp_height
+        return (
+            2 * self.flyweight_mass * angular_velocity * flyweight_radius * ramp_slope,
+            self.flyweight_mass * angular_velocity**2 * ramp_slope,
+            self.flyweight_mass * angular_velocity**2 * flyweight_radius,
+            -self.spring_coeff_comp,
+        )
 
     def calculate_spring_comp_force(self, compression: float) -> float:
         return tm.hookes_law_comp(
@@ -86,3 +111,13 @@ class PrimaryPulley:
         spring_force = self.calculate_spring_comp_force(shift_distance)
         # print(f"Centrifugal force: {centrifugal_force:.2f}, Spring force: {spring_force:.2f}")
         return centrifugal_force - spring_force
+
+    def calculate_net_force_from_snapshot(self, snapshot: DrivetrainSnapshot) -> float:
+        """calculate_net_force using the ramp values already in the snapshot."""
+        centrifugal_force = self._flyweight_force(
+            snapshot.primary_ramp_height,
+            snapshot.primary_ramp_slope,
+            snapshot.engine_velocity,
+        )
+        spring_force = self.calculate_spring_comp_force(snapshot.shift_distance)
+        return centrifugal_force - spring_force
@@ -0,0 +1,124 @@
+import numpy as np
+from simulations.cvt_shift import CvtShift
+from utils.system_state import SystemState
+from constants.car_specs import MAX_SHIFT
+
+SHIFT_TOLERANCE = 1e-9  # m, on the equilibrium shift distance
+SCAN_POINTS = 17  # Net forces evaluated at once to bracket the nearest equilibrium
+MAX_ITERATIONS = 50
+
+
+class QuasiStaticShift:
+    """
+    A shift of negligible mass, which is always at an equilibrium of the forces
+    on it instead of oscillating about one. This removes the stiff shift states
+    from the model, leaving the car velocity and position.
+
+    Friction holds the shift wherever the net radial force is within
+    raw_friction, so the equilibrium depends on where the shift was. It only
+    moves once the net force overcomes the friction, and then as far as the
+    nearest distance where the two balance, where calculate_shift_acceleration
+    of the moving shift is zero, or up to the end-stop.
+    """
+
+    def __init__(self, cvt_shift: CvtShift, tolerance: float = SHIFT_TOLERANCE):
+        self.cvt_shift = cvt_shift
+        self.tolerance = tolerance
+
+    def net_radial_force(self, shift_distance, car_velocity):
+        """Net radial force pushing the shift up, before friction."""
+        state = SystemState(
+            car_velocity=car_velocity,
+            car_position=0.0,
+            shift_velocity=0.0,
+            shift_distance=shift_distance,
+        )
+        forces = self.cvt_shift.get_pulley_forces(state)
+        return forces["primary_radial"] - forces["secondary_radial"]
+
+    def equilibrium(self, car_velocity, previous):
+        """
+        Shift distance at car_velocity of the shift previously at previous.
+        Both may be arrays, giving one distance per pair.
+        """
+        car_velocity, previous = np.broadcast_arrays(
+            np.asarray(car_velocity, dtype=float), np.asarray(previous, dtype=float)
+        )
+        shift_distance = np.array(previous)
+        force = self.net_radial_force(previous, car_velocity)
+        friction = self.cvt_shift.raw_friction
+        # Pushed against an end-stop, the shift stays there
+        for moving, stop, limit in (
+            ((force > friction) & (previous < MAX_SHIFT), MAX_SHIFT, friction),
+            ((force < -friction) & (previous > 0.0), 0.0, -friction),
+        ):
+            if np.any(moving):
+                shift_distance[moving] = self._move(
+                    car_velocity[moving], previous[moving], stop, limit
+                )
+        return shift_distance[()]
+
+    def _move(self, car_velocity, start, stop, limit):
+        """
+        Nearest shift distance from start towards stop where the net radial
+        force falls to limit, or stop if there is none.
+        """
+        direction = 1.0 if stop == MAX_SHIFT else -1.0
+
+        def excess(shift_distance, velocity):
+            # Positive while the shift keeps moving towards stop
+            return direction * (self.net_radial_force(shift_distance, velocity) - limit)
+
+        # The first sign change on a grid brackets the nearest equilibrium
+        fractions = np.linspace(0, 1, SCAN_POINTS)[:, None]
+        points = start + fractions * (stop - start)
+        values = excess(points, car_velocity)
+        settled = values <= 0
+        found = np.any(settled, axis=0)
+        shift_distance = np.full(start.shape, stop, dtype=float)
+        if np.any(found):
+            lanes = np.flatnonzero(found)
+            if lanes.size == 1:
+                # A single lane is solved in scalars, which are several times faster
+                lanes = lanes[0]
+            upper = np.argmax(settled[:, lanes], axis=0)
+            shift_distance[lanes] = self._illinois(
+                lambda x: excess(x, car_velocity[lanes]),
+                points[upper - 1, lanes],
+                points[upper, lanes],
+                values[upper - 1, lanes],
+                values[upper, lanes],
+            )
+        return shift_distance
+
+    def _illinois(self, fun, inside, outside, fun_inside, fun_outside):
+        """
+        Regula falsi with the Illinois modification, on brackets where fun is
+        positive at inside and not at outside, for all of them at once.
+        """
+        x = inside
+        # End kept by the last iteration: 1 for inside, -1 for outside
+        kept = np.zeros(inside.shape, dtype=int)
+        for _ in range(MAX_ITERATIONS):
+            x_new = outside - fun_outside * (outside - inside) / (
+                fun_outside - fun_inside
+            )
+            value = fun(x_new)
+            moved_inside = value > 0
+            # An end kept twice in a row has its value halved
+            fun_outside = np.where(
+                moved_inside & (kept == -1), fun_outside / 2, fun_outside
+            )
+            fun_inside = np.where(
+                ~moved_inside & (kept == 1), fun_inside / 2, fun_inside
+            )
+            inside = np.where(moved_inside, x_new, inside)
+            fun_inside = np.where(moved_inside, value, fun_inside)
+            outside = np.where(moved_inside, outside, x_new)
+            fun_outside = np.where(moved_inside, fun_outside, value)
+            kept = np.where(moved_inside, -1, 1)
+            converged = np.max(np.abs(x_new - x)) <= self.tolerance
+            x = x_new
+            if converged:
+                break
+        return x
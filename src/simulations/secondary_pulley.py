@@ -1,11 +1,14 @@
 import numpy as np
+from typing import Tuple
 from utils.theoretical_models import TheoreticalModels as tm
+from utils.shift_geometry import shift_geometry
+from utils.drivetrain_snapshot import DrivetrainSnapshot
 from constants.car_specs import (
-    BELT_HEIGHT,
     MAX_SHIFT,
     HELIX_RADIUS,
 )
 from utils.ramp_representation import LinearSegment, PiecewiseRamp
+from utils.baked_ramp import bake_ramp
 
 
 class SecondaryPulley:
@@ -16,6 +19,8 @@ class SecondaryPulley:
         initial_rotation: float,  # rad
         initial_compression: float,  # m
         ramp_type: int,
+        ramp_resolution: int = None,  # Bake the ramp into a table when set
+        ramp_cache_dir: str = None,  # Where baked tables are cached on disk
     ):
         self.spring_coeff_tors = spring_coeff_tors
         self.spring_coeff_comp = spring_coeff_comp
@@ -36,19 +41,57 @@ class SecondaryPulley:
                 LinearSegment(x_start=MAX_SHIFT / 2, x_end=MAX_SHIFT, slope=-0.25)
             )
 
+        if ramp_resolution is not None:
+            self.ramp = bake_ramp(self.ramp, ramp_resolution, ramp_cache_dir)
+
     def calculate_helix_force(
         self, torque: float, spring_torque: float, shift_distance: float
     ) -> float:
-        secondary_radius = tm.outer_sec_radius(shift_distance) - BELT_HEIGHT / 2
+        secondary_radius = shift_geometry(shift_distance).secondary_radius
 
-        if shift_distance < 0:  # TODO: remove
-            shift_distance = 0
-        if shift_distance > MAX_SHIFT:
-            shift_distance = MAX_SHIFT
+        shift_distance = np.clip(shift_distance, 0, MAX_SHIFT)  # TODO: remove
 
-        angle = np.arctan(self.ramp.slope(shift_distance))
+        return self._helix_force(
+            torque, spring_torque, self.ramp.slope(shift_distance), secondary_radius
+        )
 
-        return (torque + spring_torque) / (2 * np.tan(angle) * secondary_radius)
+    def _helix_force(
+        self,
+        torque: float,
+        spring_torque: float,
+        ramp_slope: float,
+        secondary_radius: float,
+    ) -> float:
+        # tan(arctan(slope)) of the helix angle is the slope itself
+        return (torque + spring_torque) / (2 * ramp_slope * secondary_radius)
+
+    def net_force_partials(
+        self,
+        torque: float,
+        ramp_distance: float,
+        ramp_slope: float,
+        secondary_radius: float,
+    ) -> Tuple[float, float, float, float, float]:
+        """
+        Partial derivatives of the net force with respect to the torque, the
+        ramp distance (through the torsion spring), the helix slope, the
+        secondary radius and the shift distance (through the compression
+        spring), in that order.
+        """
+        spring_tors_torque = tm.hookes_law_tors(
+            self.spring_coeff_tors,
+            self.initial_rotation + self._rotation(ramp_distance, ramp_slope),
+        )
+        total_torque = torque + spring_tors_torque
+        denominator = 2 * ramp_slope * secondary_radius
+        return (
+            1 / denominator,
+            self.spring_coeff_tors / (HELIX_RADIUS * secondary_radius),
+            self.spring_coeff_tors * 2 * ramp_distance / HELIX_RADIUS / denominator
+            - total_torque / (denominator * ramp_slope),
+            -total_torque / (denominator * secondary_radius),
+            self.spring_coeff_comp,
+        )
 
     def calculate_spring_comp_force(self, compression: float) -> float:
         return tm.hookes_law_comp(
@@ -56,14 +99,14 @@ class SecondaryPulley:
         )
 
     def calculate_rotation(self, shift_distance: float) -> float:
-        return shift_distance * self.ramp.slope(shift_distance) * 2 / HELIX_RADIUS
+        return self._rotation(shift_distance, self.ramp.slope(shift_distance))
+
+    def _rotation(self, shift_distance: float, ramp_slope: float) -> float:
+        return shift_distance * ramp_slope * 2 / HELIX_RADIUS
 
     def calculate_spring_tors_torque(self, shift_distance: float) -> float:
 
-        if shift_distance < 0:  # TODO: remove
-            shift_distance = 0
-        if shift_distance > MAX_SHIFT:
-            shift_distance = MAX_SHIFT
+        shift_distance = np.clip(shift_distance, 0, MAX_SHIFT)  # TODO: remove
 
         rotation = self.initial_rotation + self.calculate_rotation(shift_distance)
         return tm.hookes_law_tors(self.spring_coeff_tors, rotation)
@@ -78,3 +121,21 @@ class SecondaryPulley:
 
         # print(f"Compression force: {spring_comp_force}, Torsion Force: {spring_tors_torque / self.helix_radius}, Helix Force: {helix_force}, Torque: {torque}")
         return helix_force + spring_comp_force
+
+    def calculate_net_force_from_snapshot(self, snapshot: DrivetrainSnapshot) -> float:
+        """
+        calculate_net_force for the engine torque geared through the CVT, with
+        the helix slope and secondary radius read from the snapshot once.
+        """
+        spring_comp_force = self.calculate_spring_comp_force(snapshot.shift_distance)
+        rotation = self.initial_rotation + self._rotation(
+            snapshot.ramp_distance, snapshot.secondary_ramp_slope
+        )
+        spring_tors_torque = tm.hookes_law_tors(self.spring_coeff_tors, rotation)
+        helix_force = self._helix_force(
+            snapshot.engine_torque * snapshot.cvt_ratio,
+            spring_tors_torque,
+            snapshot.secondary_ramp_slope,
+            snapshot.geometry.secondary_radius,
+        )
+        return helix_force + spring_comp_force
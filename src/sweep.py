@@ -0,0 +1,153 @@
+# Runs the full simulation over a grid of tuning parameters in a process pool
+
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, fields
+from functools import partial
+from typing import Dict, List
+import numpy as np
+from main import SimulationOptions, run_simulation
+from utils.baked_ramp import DEFAULT_CACHE_DIR
+from utils.argument_parser import (
+    SimulationArgs,
+    default_arguments,
+    expand_argument_grid,
+    parse_sweep_values,
+)
+from utils.result_cache import DEFAULT_RESULT_CACHE_DIR
+from utils.simulation_result import SimulationResult
+
+
+def summarize_result(args: SimulationArgs, result: SimulationResult) -> Dict:
+    """Reduces a run to the metrics compared across a sweep."""
+    time = result.time
+    car_velocities = result.car_velocity
+    car_positions = result.car_position
+
+    reached = np.flatnonzero(car_positions >= args.total_distance)
+    if reached.size > 0:
+        i = reached[0]
+        if i == 0:
+            time_to_distance = time[0]
+        else:
+            # Linear interpolation between the samples around the finish line
+            fraction = (args.total_distance - car_positions[i - 1]) / (
+                car_positions[i] - car_positions[i - 1]
+            )
+            time_to_distance = time[i - 1] + fraction * (time[i] - time[i - 1])
+    else:
+        time_to_distance = math.nan
+
+    return {
+        **asdict(args),
+        "time_to_distance": time_to_distance,
+        "final_time": time[-1],
+        "final_position": car_positions[-1],
+        "final_velocity": car_velocities[-1],
+        "top_velocity": car_velocities.max(),
+    }
+
+
+def simulate_point(
+    args: SimulationArgs, use_cache: bool = True, quasi_static: bool = False
+) -> Dict:
+    """
+    Worker entry point: runs one grid point silently and returns its summary.
+    Points simulated before, by any sweep or run, are read from the cache.
+    """
+    options = SimulationOptions(
+        ramp_cache_dir=DEFAULT_CACHE_DIR,
+        result_cache_dir=DEFAULT_RESULT_CACHE_DIR if use_cache else None,
+        quasi_static=quasi_static,
+    )
+    return summarize_result(args, run_simulation(args, options=options))
+
+
+def run_sweep(
+    grid: List[SimulationArgs],
+    max_workers: int = None,
+    chunksize: int = None,
+    use_cache: bool = True,
+    quasi_static: bool = False,
+) -> List[Dict]:
+    """
+    Simulates every grid point across a process pool. Each worker imports the
+    simulator once and then runs its share of the points in-process.
+    """
+    simulate = partial(simulate_point, use_cache=use_cache, quasi_static=quasi_static)
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunksize is None:
+        # A few chunks per worker keeps workers busy without excess messaging
+        chunksize = max(1, len(grid) // (max_workers * 4))
+
+    if max_workers == 1:
+        return [simulate(args) for args in grid]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(simulate, grid, chunksize=chunksize))
+
+
+def get_sweep_arguments():
+    parser = argparse.ArgumentParser(
+        description="Sweep the Baja SAE car simulation over a grid of arguments"
+    )
+    for field in fields(SimulationArgs):
+        parser.add_argument(
+            f"--{field.name}",
+            nargs="+",
+            metavar="VALUE",
+            help=f"Values of {field.name}, as numbers or start:stop:count ranges",
+        )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Grid points sent to a worker at a time (default: automatic)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="Simulate every point even if its result is cached",
+    )
+    parser.add_argument(
+        "--quasi_static",
+        action="store_true",
+        help="Hold the shift at its equilibrium, for sweeps of the car speed",
+    )
+    parser.add_argument(
+        "--output",
+        default="sweep_output.csv",
+        help="CSV file receiving one summary row per grid point",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    sweep_args = get_sweep_arguments()
+    sweep = {
+        field.name: parse_sweep_values(getattr(sweep_args, field.name))
+        for field in fields(SimulationArgs)
+        if getattr(sweep_args, field.name) is not None
+    }
+    grid = expand_argument_grid(default_arguments(), sweep)
+    print(f"Running {len(grid)} simulations")
+
+    rows = run_sweep(
+        grid,
+        max_workers=sweep_args.workers,
+        chunksize=sweep_args.chunksize,
+        use_cache=not sweep_args.no_cache,
+        quasi_static=sweep_args.quasi_static,
+    )
+    pd.DataFrame(rows).to_csv(sweep_args.output, index=False)
@@ -1,5 +1,8 @@
 import argparse
-from dataclasses import dataclass
+import itertools
+from dataclasses import dataclass, fields, replace
+from typing import Dict, List, Sequence
+import numpy as np
 
 
 @dataclass
@@ -20,7 +23,7 @@ class SimulationArgs:
     total_distance: float
 
 
-def get_arguments() -> SimulationArgs:
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Simulate a Baja SAE car")
     parser.add_argument(
         "--flyweight_mass",
@@ -107,5 +110,51 @@ def get_arguments() -> SimulationArgs:
         help="Total distance in meters (default: 100.0 m)",
     )
 
-    args = parser.parse_args()
+    return parser
+
+
+def get_arguments() -> SimulationArgs:
+    args = build_parser().parse_args()
     return SimulationArgs(**vars(args))
+
+
+def default_arguments() -> SimulationArgs:
+    """Returns the arguments used when nothing is passed on the command line."""
+    return SimulationArgs(**vars(build_parser().parse_args([])))
+
+
+def parse_sweep_values(values: Sequence[str]) -> List[float]:
+    """
+    Parses the values swept for one argument. Each entry is either a number or a
+    range written as start:stop:count, which expands to count evenly spaced
+    values including both ends.
+    """
+    parsed = []
+    for value in values:
+        if ":" in value:
+            parts = value.split(":")
+            if len(parts) != 3:
+                raise ValueError(f"Range '{value}' must be written as start:stop:count")
+            start, stop, count = float(parts[0]), float(parts[1]), int(parts[2])
+            if count < 1:
+                raise ValueError(f"Range '{value}' must contain at least one value")
+            parsed.extend(np.linspace(start, stop, count).tolist())
+        else:
+            parsed.append(float(value))
+    return parsed
+
+
+def expand_argument_grid(
+    base: SimulationArgs, sweep: Dict[str, Sequence[float]]
+) -> List[SimulationArgs]:
+    """Builds the cartesian product of the swept values on top of base arguments."""
+    names = {field.name for field in fields(SimulationArgs)}
+    for name in sweep:
+        if name not in names:
+            raise ValueError(f"Unknown simulation argument '{name}'")
+
+    keys = list(sweep)
+    return [
+        replace(base, **dict(zip(keys, combination)))
+        for combination in itertools.product(*(sweep[key] for key in keys))
+    ]
@@ -0,0 +1,231 @@
+# Dense interpolation tables of a PiecewiseRamp, cached on disk by ramp shape
+
+import hashlib
+import os
+from bisect import bisect_left
+from typing import Dict, Optional
+import numpy as np
+from scipy.interpolate import CubicSpline
+from utils.ramp_representation import PiecewiseRamp
+
+DEFAULT_RESOLUTION = 256  # Interpolation intervals per ramp segment
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "cvt_simulator", "ramps"
+)
+CACHE_FORMAT_VERSION = 2  # Bump when the baked layout or method changes
+QUANTITIES = ("height", "slope")
+
+# Ramps already baked in this process, by cache key
+_baked_ramps: Dict[str, "BakedRamp"] = {}
+
+
+class BakedRamp:
+    """
+    A PiecewiseRamp baked into cubic splines of its height and slope, the
+    quantities the pulleys look up. It has the same height and slope lookups
+    as PiecewiseRamp.
+
+    Each segment is splined on its own, over `resolution` equal intervals, so
+    the kinks between segments are kept exactly. max_error holds the worst
+    absolute error of each quantity at the interval midpoints, where the
+    spline error is largest.
+    """
+
+    def __init__(
+        self,
+        x_starts: np.ndarray,
+        x_ends: np.ndarray,
+        coefficients: np.ndarray,
+        resolution: int,
+        max_error: Dict[str, float],
+    ):
+        self.x_starts = x_starts  # Per interval
+        self.x_ends = x_ends
+        self.coefficients = coefficients  # (4 powers, intervals, quantities)
+        self.resolution = resolution
+        self.max_error = max_error
+
+        # Plain Python copies for the scalar path
+        self._x_start_list = x_starts.tolist()
+        self._x_end_list = x_ends.tolist()
+        self._coefficient_list = coefficients.transpose(1, 2, 0).tolist()
+
+    @classmethod
+    def from_ramp(
+        cls, ramp: PiecewiseRamp, resolution: int = DEFAULT_RESOLUTION
+    ) -> "BakedRamp":
+        if resolution < 1:
+            raise ValueError("resolution must be at least 1 interval per segment")
+
+        x_starts, x_ends, coefficients, midpoints = [], [], [], []
+        for segment in ramp.segments:
+            nodes = np.linspace(segment.x_start, segment.x_end, resolution + 1)
+            # Evaluate the segment directly, as the ramp gives shared
+            # boundaries to the earlier segment
+            slope = np.abs(np.broadcast_to(segment.slope(nodes), nodes.shape))
+            values = np.stack([np.abs(segment.height(nodes)), slope], axis=-1)
+            # Not-a-knot needs four nodes, a single interval is a straight line
+            bc_type = "not-a-knot" if resolution > 2 else "natural"
+            spline = CubicSpline(nodes, values, bc_type=bc_type)
+
+            x_starts.append(nodes[:-1])
+            x_ends.append(nodes[1:])
+            coefficients.append(spline.c)
+            midpoints.append((nodes[:-1] + nodes[1:]) / 2)
+
+        baked = cls(
+            np.concatenate(x_starts),
+            np.concatenate(x_ends),
+            np.concatenate(coefficients, axis=1),
+            resolution,
+            max_error={},
+        )
+
+        midpoints = np.concatenate(midpoints)
+        exact = {
+            "height": ramp.height_array(midpoints),
+            "slope": ramp.slope_array(midpoints),
+        }
+        for q, name in enumerate(QUANTITIES):
+            error = np.abs(baked._evaluate_array(midpoints, q) - exact[name])
+            baked.max_error[name] = float(np.max(error))
+        return baked
+
+    def __str__(self):
+        errors = ", ".join(
+            f"{name} {error:.2e}" for name, error in self.max_error.items()
+        )
+        return (
+            f"BakedRamp({len(self.x_starts)} intervals, {self.resolution} per "
+            f"segment; max error {errors})"
+        )
+
+    def save(self, path: str):
+        """Writes the table to an .npz file, atomically replacing any old one."""
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.savez(
+                file,
+                x_starts=self.x_starts,
+                x_ends=self.x_ends,
+                coefficients=self.coefficients,
+                resolution=self.resolution,
+                max_error=[self.max_error[name] for name in QUANTITIES],
+            )
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BakedRamp":
+        with np.load(path) as data:
+            return cls(
+                data["x_starts"],
+                data["x_ends"],
+                data["coefficients"],
+                int(data["resolution"]),
+                max_error=dict(zip(QUANTITIES, data["max_error"].tolist())),
+            )
+
+    def _find_interval(self, x: float) -> int:
+        i = bisect_left(self._x_end_list, x)
+        if i < len(self._x_end_list) and self._x_start_list[i] <= x:
+            return i
+        raise ValueError(f"x={x} is out of ramp range!")
+
+    def _evaluate(self, x, q: int):
+        # np.ndim is slow enough to matter here, so plain floats skip it
+        if not isinstance(x, float) and np.ndim(x) > 0:
+            return self._evaluate_array(x, q)
+
+        x = float(x)
+        i = self._find_interval(x)
+        c3, c2, c1, c0 = self._coefficient_list[i][q]
+        dx = x - self._x_start_list[i]
+        return ((c3 * dx + c2) * dx + c1) * dx + c0
+
+    def _evaluate_array(self, x: np.ndarray, q: int) -> np.ndarray:
+        x = np.asarray(x, dtype=float)
+        indices = np.searchsorted(self.x_ends, x, side="left")
+        last = len(self.x_ends) - 1
+        in_range = (indices <= last) & (self.x_starts[np.minimum(indices, last)] <= x)
+        if not np.all(in_range):
+            raise ValueError(f"x={x[~in_range][0]} is out of ramp range!")
+
+        c3, c2, c1, c0 = self.coefficients[:, indices, q]
+        dx = x - self.x_starts[indices]
+        return ((c3 * dx + c2) * dx + c1) * dx + c0
+
+    def _evaluate_derivative(self, x, q: int):
+        if not isinstance(x, float) and np.ndim(x) > 0:
+            x = np.asarray(x, dtype=float)
+            indices = np.searchsorted(self.x_ends, x, side="left")
+            indices = np.minimum(indices, len(self.x_ends) - 1)
+            c3, c2, c1, _ = self.coefficients[:, indices, q]
+            dx = x - self.x_starts[indices]
+            return (3 * c3 * dx + 2 * c2) * dx + c1
+
+        x = float(x)
+        i = self._find_interval(x)
+        c3, c2, c1, _ = self._coefficient_list[i][q]
+        dx = x - self._x_start_list[i]
+        return (3 * c3 * dx + 2 * c2) * dx + c1
+
+    def height(self, x: float) -> float:
+        return self._evaluate(x, 0)
+
+    def slope(self, x: float) -> float:
+        return self._evaluate(x, 1)
+
+    def height_derivative(self, x: float) -> float:
+        """Derivative of the height spline with respect to x."""
+        return self._evaluate_derivative(x, 0)
+
+    def slope_derivative(self, x: float) -> float:
+        """Derivative of the slope spline with respect to x."""
+        return self._evaluate_derivative(x, 1)
+
+    def height_array(self, x: np.ndarray) -> np.ndarray:
+        return self._evaluate_array(x, 0)
+
+    def slope_array(self, x: np.ndarray) -> np.ndarray:
+        return self._evaluate_array(x, 1)
+
+
+def ramp_cache_key(ramp: PiecewiseRamp, resolution: int) -> str:
+    """Hashes everything the baked table depends on."""
+    definition = repr((CACHE_FORMAT_VERSION, resolution, ramp.definition()))
+    return hashlib.sha256(definition.encode()).hexdigest()[:32]
+
+
+def bake_ramp(
+    ramp: PiecewiseRamp,
+    resolution: int = DEFAULT_RESOLUTION,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+) -> BakedRamp:
+    """
+    Bakes a ramp, reusing a table from this process or from cache_dir when the
+    same ramp was baked before at the same resolution. A cache_dir of None
+    skips the disk cache.
+    """
+    key = ramp_cache_key(ramp, resolution)
+    if key in _baked_ramps:
+        return _baked_ramps[key]
+
+    path = os.path.join(cache_dir, f"{key}.npz") if cache_dir else None
+    baked = None
+    if path is not None and os.path.exists(path):
+        try:
+            baked = BakedRamp.load(path)
+        except (OSError, ValueError, KeyError):
+            baked = None  # Unreadable cache entry, bake it again
+
+    if baked is None:
+        baked = BakedRamp.from_ramp(ramp, resolution)
+        if path is not None:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                baked.save(path)
+            except OSError:
+                pass  # The cache is only an optimization
+
+    _baked_ramps[key] = baked
+    return baked
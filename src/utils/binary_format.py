@@ -0,0 +1,74 @@
+# Binary columnar result files: the columns are the rows of one float64 .npy
+# array, which can be memory-mapped, and a JSON header beside it names them
+# and records their units and any metadata of the run.
+
+import json
+import os
+from typing import Dict, Tuple
+import numpy as np
+
+BINARY_FORMAT = "cvt-simulator-columns"
+BINARY_FORMAT_VERSION = 1
+
+
+def header_path(filename: str) -> str:
+    """The JSON header of the .npy file filename."""
+    return os.path.splitext(filename)[0] + ".json"
+
+
+def _to_json(value):
+    # NumPy scalars and arrays found in arguments and solver statistics
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} cannot be written to a JSON header")
+
+
+def write_columns(
+    filename: str,
+    columns: Dict[str, np.ndarray],
+    units: Dict[str, str],
+    metadata: Dict = None,
+):
+    """Writes equal length columns to filename (.npy) and its JSON header."""
+    if not filename.endswith(".npy"):
+        raise ValueError(f"Binary results are written to .npy files, not {filename}")
+    data = np.vstack(
+        [np.asarray(column, dtype=np.float64) for column in columns.values()]
+    )
+    np.save(filename, data)
+    write_header(filename, list(columns), units, metadata)
+
+
+def write_header(filename: str, names, units: Dict[str, str], metadata: Dict = None):
+    """Writes the JSON header of the .npy file filename holding the columns names."""
+    header = {
+        "format": BINARY_FORMAT,
+        "version": BINARY_FORMAT_VERSION,
+        "columns": list(names),
+        "units": {name: units.get(name) for name in names},
+        "metadata": metadata or {},
+    }
+    with open(header_path(filename), "w") as file:
+        json.dump(header, file, indent=2, default=_to_json)
+
+
+def read_columns(filename: str, mmap: bool = True) -> Tuple[np.ndarray, Dict]:
+    """
+    Reads a file written by write_columns, returning the (columns, samples)
+    array and the header. With mmap the array is mapped read-only instead of
+    read, so opening a file costs the same whatever its size.
+    """
+    with open(header_path(filename)) as file:
+        header = json.load(file)
+    if header.get("format") != BINARY_FORMAT:
+        raise ValueError(f"{filename} is not a binary simulation result")
+    if header["version"] > BINARY_FORMAT_VERSION:
+        raise ValueError(
+            f"{filename} uses format version {header['version']}, newer than "
+            f"the supported version {BINARY_FORMAT_VERSION}"
+        )
+
+    data = np.load(filename, mmap_mode="r" if mmap else None)
+    if data.shape[0] != len(header["columns"]):
+        raise ValueError(f"{filename} does not match the columns of its header")
+    return data, header
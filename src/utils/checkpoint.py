@@ -0,0 +1,50 @@
+# States a run can be resumed from, taken where its segments meet
+
+import json
+from dataclasses import dataclass
+from typing import List, Optional
+import numpy as np
+
+
+@dataclass
+class Checkpoint:
+    """
+    The state of a run at the start of one of its segments, after the event
+    ending the segment before, i.e. after the shift hits or leaves an
+    end-stop. The solver starts afresh at every segment, so a run resumed
+    from a checkpoint with SimulationOptions(resume_from=...) continues
+    exactly as the original did. A result keeps the checkpoints of all its
+    segments but the first, and .npy result files keep them in their JSON
+    header.
+    """
+
+    time: float  # s
+    y: np.ndarray  # (4,) state the next segment starts from
+    pinned_at: Optional[float]  # End-stop the shift is pinned against, if any
+
+    def to_dict(self) -> dict:
+        return {
+            "time": float(self.time),
+            "y": [float(value) for value in self.y],
+            "pinned_at": self.pinned_at,
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "Checkpoint":
+        pinned_at = data["pinned_at"]
+        return Checkpoint(
+            time=data["time"],
+            y=np.array(data["y"], dtype=float),
+            pinned_at=None if pinned_at is None else float(pinned_at),
+        )
+
+
+def save_checkpoints(filename: str, checkpoints: List[Checkpoint]):
+    """Writes checkpoints to a JSON file, keeping every float exactly."""
+    with open(filename, "w") as file:
+        json.dump([checkpoint.to_dict() for checkpoint in checkpoints], file)
+
+
+def load_checkpoints(filename: str) -> List[Checkpoint]:
+    with open(filename) as file:
+        return [Checkpoint.from_dict(data) for data in json.load(file)]
@@ -1,5 +1,7 @@
 import math
 
+# Every conversion works elementwise on NumPy arrays as well as on floats
+
 
 def rpm_to_rad_s(rpm):
     return rpm * (2 * math.pi) / 60
@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+from utils.shift_geometry import ShiftGeometry
+
+
+@dataclass
+class DrivetrainSnapshot:
+    """
+    Quantities shared by the drivetrain components during one evaluation of
+    the model. CvtShift.snapshot computes them once per state and every
+    component reads them from here instead of recomputing them.
+    """
+
+    shift_distance: float  # As given by the state
+    ramp_distance: float  # Clamped to [0, MAX_SHIFT] for the ramp lookups
+    geometry: ShiftGeometry
+    engine_velocity: float  # rad/s
+    engine_torque: float  # Nm
+    engine_power: float  # W
+    primary_ramp_height: float
+    primary_ramp_slope: float
+    secondary_ramp_slope: float
+
+    @property
+    def cvt_ratio(self) -> float:
+        return self.geometry.cvt_ratio
@@ -0,0 +1,59 @@
+from bisect import bisect_right
+from typing import Sequence
+import numpy as np
+from scipy.interpolate import CubicSpline
+
+
+class EngineCurve:
+    """
+    Cubic interpolation of an engine curve (e.g. torque against angular
+    velocity), equivalent to interp1d(kind="cubic", fill_value="extrapolate").
+
+    The not-a-knot spline is converted once to per-segment polynomial
+    coefficients, so a scalar call is a bisect over the breakpoints and a
+    Horner evaluation on plain floats. Outside the data the first and last
+    segments are extrapolated, as interp1d does.
+    """
+
+    def __init__(self, x: Sequence[float], y: Sequence[float]):
+        # interp1d's cubic kind is a not-a-knot spline, CubicSpline's default
+        spline = CubicSpline(x, y)
+        self.breakpoints = spline.x
+        self.coefficients = spline.c  # (4, segments), highest power first
+
+        # Plain Python copies for the scalar path
+        self._inner_breakpoints = spline.x[1:-1].tolist()
+        self._breakpoint_list = spline.x.tolist()
+        self._coefficient_list = spline.c.T.tolist()
+
+    def __call__(self, x):
+        # np.ndim is slow enough to matter here, so plain floats skip it
+        if not isinstance(x, float) and np.ndim(x) > 0:
+            return self._evaluate_array(np.asarray(x, dtype=float))
+
+        x = float(x)
+        i = bisect_right(self._inner_breakpoints, x)
+        c3, c2, c1, c0 = self._coefficient_list[i]
+        dx = x - self._breakpoint_list[i]
+        return ((c3 * dx + c2) * dx + c1) * dx + c0
+
+    def _evaluate_array(self, x: np.ndarray) -> np.ndarray:
+        i = np.searchsorted(self.breakpoints[1:-1], x, side="right")
+        c3, c2, c1, c0 = self.coefficients[:, i]
+        dx = x - self.breakpoints[i]
+        return ((c3 * dx + c2) * dx + c1) * dx + c0
+
+    def derivative(self, x):
+        """Slope of the curve at x, e.g. dT/dω for a torque curve."""
+        if not isinstance(x, float) and np.ndim(x) > 0:
+            x = np.asarray(x, dtype=float)
+            i = np.searchsorted(self.breakpoints[1:-1], x, side="right")
+            c3, c2, c1, _ = self.coefficients[:, i]
+            dx = x - self.breakpoints[i]
+            return (3 * c3 * dx + 2 * c2) * dx + c1
+
+        x = float(x)
+        i = bisect_right(self._inner_breakpoints, x)
+        c3, c2, c1, _ = self._coefficient_list[i]
+        dx = x - self._breakpoint_list[i]
+        return (3 * c3 * dx + 2 * c2) * dx + c1
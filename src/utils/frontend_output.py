@@ -1,6 +1,7 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-from utils.simulation_result import SimulationResult
+import numpy as np
+from scipy.integrate import cumulative_trapezoid
+from utils.binary_format import write_columns
+from utils.simulation_result import COLUMN_UNITS, SimulationResult
 from constants.car_specs import (
     GEARBOX_RATIO,
     WHEEL_RADIUS,
@@ -9,13 +10,22 @@ from constants.car_specs import (
 from utils.theoretical_models import TheoreticalModels as tm
 from utils.conversions import rad_s_to_rpm, meter_s_to_km_h, rad_to_deg
 
+# Units of the columns computed by FormattedSimulationResult
+FORMATTED_UNITS = {
+    "engine_angular_position": "deg",
+    "secondary_angular_position": "deg",
+    "engine_angular_velocity": "rpm",
+}
+# Units of the columns of write_formatted_npy
+FORMATTED_OUTPUT_UNITS = {**COLUMN_UNITS, **FORMATTED_UNITS}
+
 
 class FormattedSimulationResult(SimulationResult):
-    def __init__(self, solution=None, time=None, states=None):
+    def __init__(self, solution=None, time=None, states=None, y=None):
         """
         Initialize using the base SimulationResult and then compute additional columns.
         """
-        super().__init__(solution=solution, time=time, states=states)
+        super().__init__(solution=solution, time=time, states=states, y=y)
         self.compute_updated_metrics()
 
     def compute_updated_metrics(self):
@@ -24,67 +34,99 @@ class FormattedSimulationResult(SimulationResult):
         - Engine angular position
         - Secondary angular position
         - Engine angular velocity (RPM)
+        Every column is computed over whole sample arrays, integrating the
+        angular positions with the trapezoidal rule.
         """
-        self.engine_angular_positions = []
-        self.secondary_angular_positions = []
-        self.engine_angular_velocities = []
-        self.car_velocities = []
-        self.shift_distance_percents = []
-
-        current_engine_angle = 0.0
-        current_secondary_angle = 0.0
-
-        for i, t in enumerate(self.time):
-            dt = t - self.time[i - 1] if i > 0 else 0
-            state = self.states[i]
-
-            cvt_ratio = tm.current_cvt_ratio(state.shift_distance)
-            wheel_to_engine_ratio = (cvt_ratio * GEARBOX_RATIO) / WHEEL_RADIUS
-            engine_velocity = state.car_velocity * wheel_to_engine_ratio
-
-            engine_rpm = rad_s_to_rpm(engine_velocity)
-            current_engine_angle += engine_velocity * dt
-            current_secondary_angle += engine_velocity / cvt_ratio * dt
-            car_km_per_hour = meter_s_to_km_h(state.car_velocity)
-            shift_distance_percent = state.shift_distance / MAX_SHIFT
-
-            # Append the calculated values.
-            self.engine_angular_positions.append(rad_to_deg(current_engine_angle))
-            self.secondary_angular_positions.append(rad_to_deg(current_secondary_angle))
-            self.engine_angular_velocities.append(engine_rpm)
-            self.car_velocities.append(car_km_per_hour)
-            self.shift_distance_percents.append(shift_distance_percent)
+        cvt_ratio = tm.current_cvt_ratio(self.shift_distance)
+        wheel_to_engine_ratio = (cvt_ratio * GEARBOX_RATIO) / WHEEL_RADIUS
+        engine_velocity = self.car_velocity * wheel_to_engine_ratio
+
+        if len(self.time) > 0:
+            self.engine_angular_positions = rad_to_deg(
+                cumulative_trapezoid(engine_velocity, self.time, initial=0)
+            )
+            self.secondary_angular_positions = rad_to_deg(
+                cumulative_trapezoid(engine_velocity / cvt_ratio, self.time, initial=0)
+            )
+        else:
+            # scipy needs a sample, result streams format none to get the columns
+            self.engine_angular_positions = np.zeros(0)
+            self.secondary_angular_positions = np.zeros(0)
+        self.engine_angular_velocities = rad_s_to_rpm(engine_velocity)
+        self.car_velocities = meter_s_to_km_h(self.car_velocity)
+        self.shift_distance_percents = self.shift_distance / MAX_SHIFT
+
+    @staticmethod
+    def from_result(result: SimulationResult):
+        """Formats a result held in memory, sharing its sample arrays."""
+        formatted = FormattedSimulationResult(time=result.time, y=result.y)
+        formatted.solver_stats = result.solver_stats
+        formatted.checkpoints = result.checkpoints
+        return formatted
 
     @staticmethod
-    def from_csv(filename="simulation_output.csv"):
+    def from_csv(filename="simulation_output.csv", chunksize=None):
         """
         Reads the simulation states from a CSV file and returns an FormattedSimulationResult instance.
         """
-        base_result = SimulationResult.from_csv(filename)
-        return FormattedSimulationResult(
-            time=base_result.time, states=base_result.states
+        return FormattedSimulationResult.from_result(
+            SimulationResult.from_csv(filename, chunksize=chunksize)
         )
 
-    def write_formatted_csv(self, filename="front_end_output.csv"):
+    @staticmethod
+    def from_npy(filename="simulation_output.npy", mmap=True):
         """
-        Writes the original simulation data along with the additional computed columns to a CSV file.
+        Reads a file written by write_npy or write_formatted_npy and formats
+        its states, which stay memory-mapped with mmap.
         """
-        data = {
+        return FormattedSimulationResult.from_result(
+            SimulationResult.from_npy(filename, mmap=mmap)
+        )
+
+    def frontend_columns(self) -> dict:
+        """The columns of the frontend CSV, in its units."""
+        return {
             "time": self.time,
             "car_velocity": self.car_velocities,
-            "car_position": [state.car_position for state in self.states],
+            "car_position": self.car_position,
             "shift_distance": self.shift_distance_percents,
             "engine_angular_position": self.engine_angular_positions,
             "secondary_angular_position": self.secondary_angular_positions,
             "engine_angular_velocity": self.engine_angular_velocities,
         }
-        df = pd.DataFrame(data)
+
+    def binary_columns(self) -> dict:
+        """The states in SI units followed by the computed columns."""
+        return {
+            **self.columns(),
+            "engine_angular_position": self.engine_angular_positions,
+            "secondary_angular_position": self.secondary_angular_positions,
+            "engine_angular_velocity": self.engine_angular_velocities,
+        }
+
+    def write_formatted_npy(self, filename="front_end_output.npy", metadata=None):
+        """
+        Writes the binary columns to a .npy file and its JSON header. Unlike
+        the CSV, no state is converted, so the states read back exactly.
+        """
+        metadata = {"solver_stats": self.solver_stats, **(metadata or {})}
+        write_columns(filename, self.binary_columns(), FORMATTED_OUTPUT_UNITS, metadata)
+
+    def write_formatted_csv(self, filename="front_end_output.csv"):
+        """
+        Writes the original simulation data along with the additional computed columns to a CSV file.
+        """
+        import pandas as pd
+
+        df = pd.DataFrame(self.frontend_columns())
         df.to_csv(filename, index=False)
 
     def plot_updates(self):
         """
         Optionally, plot the new computed columns for quick visualization.
         """
+        import matplotlib.pyplot as plt
+
         fig, axs = plt.subplots(2, 3, figsize=(12, 8), sharex=True)
 
         axs[0, 0].plot(self.time, self.engine_angular_positions)
@@ -119,6 +161,46 @@ class FormattedSimulationResult(SimulationResult):
         plt.show()
 
 
+class ChunkFormatter:
+    """
+    Formats consecutive chunks of the samples of a run, as a result stream
+    writes them. The angular positions are carried over from the last sample
+    of the previous chunk, so the chunks join up as one formatted run.
+    """
+
+    def __init__(self, binary: bool = False):
+        self.binary = binary  # binary_columns instead of frontend_columns
+        # Time, states and angular positions of the last sample formatted
+        self._last = None
+
+    def __call__(self, time: np.ndarray, y: np.ndarray) -> dict:
+        first = 0
+        if self._last is not None and len(time) > 0:
+            last_time, last_y, _, _ = self._last
+            time = np.concatenate([[last_time], time])
+            y = np.hstack([last_y, y])
+            first = 1
+
+        formatted = FormattedSimulationResult(time=time, y=y)
+        if first:
+            _, _, engine_angle, secondary_angle = self._last
+            formatted.engine_angular_positions += engine_angle
+            formatted.secondary_angular_positions += secondary_angle
+        if len(time) > 0:
+            self._last = (
+                time[-1],
+                formatted.y[:, -1:],
+                formatted.engine_angular_positions[-1],
+                formatted.secondary_angular_positions[-1],
+            )
+
+        if self.binary:
+            columns = formatted.binary_columns()
+        else:
+            columns = formatted.frontend_columns()
+        return {name: column[first:] for name, column in columns.items()}
+
+
 if __name__ == "__main__":
     result = FormattedSimulationResult.from_csv("simulation_output.csv")
     result.write_formatted_csv()
@@ -1,15 +1,8 @@
 from matplotlib import pyplot as plt
 import numpy as np
-from simulations.load_simulation import LoadSimulator
 from utils.simulation_result import SimulationResult
-from simulations.engine_simulation import EngineSimulator
-from simulations.primary_pulley import PrimaryPulley
-from simulations.secondary_pulley import SecondaryPulley
-from simulations.belt_simulator import BeltSimulator
-from simulations.cvt_shift import CvtShift
-from constants.engine_specs import torque_curve
+from simulations.drivetrain import Drivetrain, build_drivetrain
 from constants.car_specs import (
-    ENGINE_INERTIA,
     GEARBOX_RATIO,
     FRONTAL_AREA,
     DRAG_COEFFICIENT,
@@ -17,50 +10,15 @@ from constants.car_specs import (
     MAX_SHIFT,
 )
 from constants.constants import AIR_DENSITY
-from utils.conversions import deg_to_rad
 from utils.argument_parser import get_arguments
 from utils.theoretical_models import TheoreticalModels as tm
 
-# Parse arguments
-args = get_arguments()
-
-# Initialize simulators
-engine_simulator = EngineSimulator(torque_curve=torque_curve, inertia=ENGINE_INERTIA)
-load_simulator = LoadSimulator(
-    car_mass=args.vehicle_weight + args.driver_weight,
-    incline_angle=deg_to_rad(args.angle_of_incline),
-)
-primary_simulator = PrimaryPulley(
-    spring_coeff_comp=args.primary_spring_rate,
-    initial_compression=args.primary_spring_pretension,
-    flyweight_mass=args.flyweight_mass,
-    ramp_type=args.primary_ramp_geometry,
-)
-secondary_simulator = SecondaryPulley(
-    spring_coeff_tors=args.secondary_torsion_spring_rate,
-    spring_coeff_comp=args.secondary_compression_spring_rate,
-    initial_rotation=deg_to_rad(args.secondary_rotational_spring_pretension),
-    initial_compression=args.secondary_linear_spring_pretension,
-    ramp_type=args.secondary_helix_geometry,
-)
-primary_belt = BeltSimulator(primary=True)
-secondary_belt = BeltSimulator(primary=False)
-cvt_shift = CvtShift(
-    engine_simulator,
-    primary_simulator,
-    secondary_simulator,
-    primary_belt,
-    secondary_belt,
-)
-
-result = SimulationResult.from_csv("simulation_output.csv")
-
 
 def plotVelocity(result: SimulationResult, ax=None):
     vMax = (3277.6296 / (0.5 * FRONTAL_AREA * DRAG_COEFFICIENT * AIR_DENSITY)) ** (
         1 / 3
     )
-    car_velocities = [state.car_velocity for state in result.states]
+    car_velocities = result.car_velocity
     if ax is None:
         ax = plt.gca()
     ax.plot(result.time, car_velocities, label="Car Velocity")
@@ -73,7 +31,7 @@ def plotVelocity(result: SimulationResult, ax=None):
 
 
 def plotPosition(result: SimulationResult, ax=None):
-    car_positions = [state.car_position for state in result.states]
+    car_positions = result.car_position
     if ax is None:
         ax = plt.gca()
     ax.plot(result.time, car_positions, label="Car Position")
@@ -84,14 +42,14 @@ def plotPosition(result: SimulationResult, ax=None):
     ax.grid()
 
 
-def plotVehicleAccel(result: SimulationResult, ax=None):
+def plotVehicleAccel(result: SimulationResult, drivetrain: Drivetrain, ax=None):
     vehicle_accels = []
     for state in result.states:
         cvt_ratio = tm.current_cvt_ratio(state.shift_distance)
         wheel_to_engine_ratio = (cvt_ratio * GEARBOX_RATIO) / WHEEL_RADIUS
         actual_engine_velocity = state.car_velocity * wheel_to_engine_ratio
-        engine_power = engine_simulator.get_power(actual_engine_velocity)
-        car_acceleration = load_simulator.calculate_acceleration(
+        engine_power = drivetrain.engine_simulator.get_power(actual_engine_velocity)
+        car_acceleration = drivetrain.load_simulator.calculate_acceleration(
             state.car_velocity, engine_power
         )
         vehicle_accels.append(car_acceleration)
@@ -105,14 +63,14 @@ def plotVehicleAccel(result: SimulationResult, ax=None):
     ax.grid()
 
 
-def plotPrimaryClampingForce(result: SimulationResult, ax=None):
+def plotPrimaryClampingForce(result: SimulationResult, drivetrain: Drivetrain, ax=None):
     primary_clamping_forces = []
     engine_angular_velocities = []
     for state in result.states:
         cvt_ratio = tm.current_cvt_ratio(state.shift_distance)
         wheel_to_engine_ratio = (cvt_ratio * GEARBOX_RATIO) / WHEEL_RADIUS
         actual_engine_velocity = state.car_velocity * wheel_to_engine_ratio
-        primary_force = primary_simulator.calculate_net_force(
+        primary_force = drivetrain.primary_simulator.calculate_net_force(
             state.shift_distance, actual_engine_velocity
         )
         primary_clamping_forces.append(primary_force)
@@ -131,15 +89,17 @@ def plotPrimaryClampingForce(result: SimulationResult, ax=None):
     ax.grid()
 
 
-def plotSecondaryClampingForce(result: SimulationResult, ax=None):
+def plotSecondaryClampingForce(
+    result: SimulationResult, drivetrain: Drivetrain, ax=None
+):
     secondary_clamping_forces = []
     engine_angular_velocities = []
     for state in result.states:
         cvt_ratio = tm.current_cvt_ratio(state.shift_distance)
         wheel_to_engine_ratio = (cvt_ratio * GEARBOX_RATIO) / WHEEL_RADIUS
         actual_engine_velocity = state.car_velocity * wheel_to_engine_ratio
-        engine_power = engine_simulator.get_power(actual_engine_velocity)
-        secondary_force = secondary_simulator.calculate_net_force(
+        engine_power = drivetrain.engine_simulator.get_power(actual_engine_velocity)
+        secondary_force = drivetrain.secondary_simulator.calculate_net_force(
             engine_power * cvt_ratio, state.shift_distance
         )
         secondary_clamping_forces.append(secondary_force)
@@ -204,12 +164,14 @@ def plotVehicleEngineSpeed(result: SimulationResult, ax=None):
     ax.grid()
 
 
-def plot_forces_over_time(result: SimulationResult, ax=None):
-    observables = [cvt_shift.get_pulley_forces(state) for state in result.states]
+def plot_forces_over_time(result: SimulationResult, drivetrain: Drivetrain, ax=None):
+    observables = [
+        drivetrain.cvt_shift.get_pulley_forces(state) for state in result.states
+    ]
     prim_radial = [obs["primary_radial"] for obs in observables]
     sec_radial = [obs["secondary_radial"] for obs in observables]
-    shift_distances = [state.shift_distance for state in result.states]
-    shift_velocities = [state.shift_velocity for state in result.states]
+    shift_distances = result.shift_distance
+    shift_velocities = result.shift_velocity
 
     if ax is None:
         ax = plt.gca()
@@ -248,7 +210,7 @@ def plot_forces_over_time(result: SimulationResult, ax=None):
 
 
 def plotShiftDistance(result: SimulationResult, ax=None):
-    shift_distances = [state.shift_distance for state in result.states]
+    shift_distances = result.shift_distance
     cvt_ratios = [tm.current_cvt_ratio(state.shift_distance) for state in result.states]
     wheel_to_engine_ratios = [
         (cvt_ratio * GEARBOX_RATIO) / WHEEL_RADIUS for cvt_ratio in cvt_ratios
@@ -268,7 +230,7 @@ def plotShiftDistance(result: SimulationResult, ax=None):
 
 
 def plotShiftCurve(result: SimulationResult, ax=None):
-    vehicle_speeds = [state.car_velocity for state in result.states]
+    vehicle_speeds = result.car_velocity
     cvt_ratios = [tm.current_cvt_ratio(state.shift_distance) for state in result.states]
     wheel_to_engine_ratios = [
         (cvt_ratio * GEARBOX_RATIO) / WHEEL_RADIUS for cvt_ratio in cvt_ratios
@@ -314,16 +276,21 @@ def plotShiftCurve(result: SimulationResult, ax=None):
 
 
 if __name__ == "__main__":
+    # Parse arguments
+    args = get_arguments()
+    drivetrain = build_drivetrain(args)
+    result = SimulationResult.from_csv("simulation_output.csv")
+
     # Create a grid of subplots: 2 rows x 4 columns for our eight plots.
     fig, axs = plt.subplots(2, 4, figsize=(24, 12))
 
     # Call each plotting function with its corresponding axis.
     plotVehicleEngineSpeed(result, ax=axs[0, 0])
-    plotVehicleAccel(result, ax=axs[0, 1])
+    plotVehicleAccel(result, drivetrain, ax=axs[0, 1])
     plotVelocity(result, ax=axs[0, 2])
-    plotPrimaryClampingForce(result, ax=axs[0, 3])
-    plotSecondaryClampingForce(result, ax=axs[1, 0])
-    plot_forces_over_time(result, ax=axs[1, 1])
+    plotPrimaryClampingForce(result, drivetrain, ax=axs[0, 3])
+    plotSecondaryClampingForce(result, drivetrain, ax=axs[1, 0])
+    plot_forces_over_time(result, drivetrain, ax=axs[1, 1])
     plotShiftDistance(result, ax=axs[1, 2])
     plotShiftCurve(result, ax=axs[1, 3])
     plt.tight_layout()
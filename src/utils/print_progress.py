@@ -1,30 +1,164 @@
-import csv
+import json
 import os
+import re
 import sys
+import time
 
-filePath = "progress_percent.csv"
-lockFile = "progress.lock"
+# Characters allowed in a run ID, which names the files of its channel
+RUN_ID_PATTERN = re.compile(r"[A-Za-z0-9_.-]+")
+# Attempts at replacing a status file a reader holds open (Windows)
+FINAL_REPLACE_ATTEMPTS = 50
+REPLACE_RETRY_DELAY = 0.01  # s
 
 
-def print_progress(progress):
-    progress_str = f"{progress:.1f}"
-
-    with open(lockFile, "w") as f:
-        f.write("locked")
-
-    while True:
+def write_atomically(path: str, text: str, attempts: int = 1) -> bool:
+    """
+    Replaces the file at path with text, so readers see either the old or
+    the new contents but never part of them. Replacing can fail while a
+    reader has the file open on Windows, so it is tried attempts times;
+    returns whether the file was replaced.
+    """
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w", newline="") as file:
+        file.write(text)
+    for attempt in range(attempts):
         try:
-            with open(filePath, "w", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(["Percent"])
-                writer.writerow([progress_str])
-                break
+            os.replace(temporary_path, path)
+            return True
         except PermissionError:
-            # Do not loop if progress is less than 100%
-            if progress < 1:
-                break
+            if attempt + 1 < attempts:
+                time.sleep(REPLACE_RETRY_DELAY)
+    os.remove(temporary_path)
+    return False
+
+
+def progress_path(run_id: str, directory: str = ".") -> str:
+    """The status file of the run run_id."""
+    if not RUN_ID_PATTERN.fullmatch(run_id):
+        raise ValueError(
+            f"Invalid run ID '{run_id}'. Use letters, digits, '_', '.' and '-'"
+        )
+    return os.path.join(directory, f"progress_{run_id}.json")
+
+
+def read_progress(run_id: str, directory: str = "."):
+    """The last status published by the run run_id, or None before the first."""
+    try:
+        with open(progress_path(run_id, directory)) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+class ProgressChannel:
+    """
+    Publishes the status of one run to its own JSON file, read with
+    read_progress, so runs sharing a directory do not interfere. Every
+    status replaces the file atomically, without locks.
+    """
+
+    def __init__(self, run_id: str, directory: str = "."):
+        self.run_id = run_id
+        self.path = progress_path(run_id, directory)
+
+    def publish(self, status: dict, final: bool = False) -> bool:
+        """
+        Writes status, returning whether it was written. Only a final status
+        waits for readers holding the file open; others are dropped, as the
+        next one follows shortly.
+        """
+        attempts = FINAL_REPLACE_ATTEMPTS if final else 1
+        text = json.dumps({"run_id": self.run_id, **status})
+        return write_atomically(self.path, text, attempts)
+
+
+class ProgressReporter:
+    """
+    Reports how far a simulation has got, at most once per `interval` seconds
+    of wall-clock time, so it can sit on the ODE right-hand side cheaply.
+
+    Solvers evaluate the right-hand side at trial times that can move
+    backwards, so only the furthest time seen so far is reported.
+
+    The progress bar is written to stream unless show is False, and the
+    full status to channel when one is given.
+    """
+
+    def __init__(
+        self,
+        total_time: float,
+        interval: float = 0.1,
+        stream=None,
+        channel: ProgressChannel = None,
+        show: bool = True,
+    ):
+        self.total_time = total_time
+        self.interval = interval
+        self.stream = stream if stream is not None else sys.stdout
+        self.channel = channel
+        self.show = show
+        self.sim_time = 0.0
+        self.nfev = 0  # Evaluations through wrap
+        self._start = time.monotonic()
+        self._next_report = 0.0
+
+    def update(self, t: float):
+        if t > self.sim_time:
+            self.sim_time = t
+        now = time.monotonic()
+        if now >= self._next_report:
+            self._next_report = now + self.interval
+            self._write()
+
+    def finish(self, state: str = "finished"):
+        """Writes the final state and ends the progress line."""
+        self._write(state)
+        if self.show:
+            self.stream.write("\n")
+            self.stream.flush()
+
+    def wrap(self, fun):
+        """Wraps an ODE right-hand side fun(t, y) to report its progress."""
+
+        def wrapped(t, y):
+            self.nfev += 1
+            self.update(t)
+            return fun(t, y)
+
+        return wrapped
 
-    os.remove(lockFile)
+    def status(self, state: str = "running") -> dict:
+        """
+        Everything reported: the simulated and wall-clock times in seconds,
+        the evaluations so far and the estimated wall-clock time left, which
+        is None until the simulation has advanced.
+        """
+        wall_time = time.monotonic() - self._start
+        fraction = min(self.sim_time / self.total_time, 1)
+        eta = None
+        if state != "running":
+            eta = 0.0
+        elif fraction > 0:
+            eta = wall_time * (1 - fraction) / fraction
+        return {
+            "state": state,
+            "sim_time": self.sim_time,
+            "total_time": self.total_time,
+            "percent": fraction * 100,
+            "wall_time": wall_time,
+            "nfev": self.nfev,
+            "eta": eta,
+        }
 
-    sys.stdout.write(f"\rProgress: {progress_str}%")
-    sys.stdout.flush()
+    def _write(self, state: str = "running"):
+        status = self.status(state)
+        if self.channel is not None:
+            self.channel.publish(status, final=state != "running")
+        if not self.show:
+            return
+        progress_percent = status["percent"]
+        filled = int(progress_percent // 2)
+        self.stream.write(
+            f"\rProgress: {progress_percent:.1f}% [{'=' * filled}{' ' * (50 - filled)}]"
+        )
+        self.stream.flush()
@@ -1,6 +1,6 @@
 import numpy as np
+from bisect import bisect_left
 from typing import List
-import matplotlib.pyplot as plt
 from constants.car_specs import MAX_SHIFT
 import math
 
@@ -21,6 +21,18 @@ class RampSegment:
         """Returns derivative (slope) at given x."""
         raise NotImplementedError
 
+    def height_derivative(self, x: float) -> float:
+        """Returns d(height)/dx at given x."""
+        raise NotImplementedError
+
+    def slope_derivative(self, x: float) -> float:
+        """Returns d(slope)/dx at given x."""
+        raise NotImplementedError
+
+    def definition(self) -> tuple:
+        """Returns the parameters that fully define the segment."""
+        raise NotImplementedError
+
 
 class LinearSegment(RampSegment):
     """Linear segment: y = mx"""
@@ -35,6 +47,15 @@ class LinearSegment(RampSegment):
     def slope(self, x: float) -> float:
         return self.m
 
+    def height_derivative(self, x: float) -> float:
+        return self.m
+
+    def slope_derivative(self, x: float) -> float:
+        return 0.0
+
+    def definition(self) -> tuple:
+        return ("linear", float(self.x_start), float(self.x_end), float(self.m))
+
 
 class CircularSegment(RampSegment):
     """Circular segment where user defines rotation."""
@@ -66,71 +87,174 @@ class CircularSegment(RampSegment):
         self.theta_end = np.pi + theta_end
         self.radius = radius
 
+        # Constants of the x mapping, fixed once the segment is defined
+        self.start_offset = self.helpful_guy(self.theta_start)
+        self.end_offset = self.helpful_guy(self.theta_end)
+        self.starting_height = self.f(self.start_offset)
+
     # Convert from an angle to the x distance from axis
     def helpful_guy(self, theta: float) -> float:
         return -math.sqrt(self.radius / (1 + np.tan(theta) ** 2))
 
     # Equation of a circle in the third quadrant
     def f(self, x: float) -> float:
-        return -math.sqrt(self.radius - x**2)
+        return -np.sqrt(self.radius - x**2)
 
     def f_prime(self, x: float) -> float:
-        return x / math.sqrt(self.radius - x**2)
+        return x / np.sqrt(self.radius - x**2)
 
-    def map_x(self, x: float) -> float:
-        start_offset = self.helpful_guy(self.theta_start)
-        end_offset = self.helpful_guy(self.theta_end)
+    def f_double_prime(self, x: float) -> float:
+        return self.radius / (self.radius - x**2) ** 1.5
 
+    def map_x(self, x: float) -> float:
         scaled_x = (x - self.x_start) / (self.x_end - self.x_start)
-        adjusted_x = start_offset + scaled_x * (end_offset - start_offset)
+        adjusted_x = self.start_offset + scaled_x * (
+            self.end_offset - self.start_offset
+        )
 
         return adjusted_x
 
     def height(self, x: float) -> float:
         """Finds y-coordinate on the circular arc corresponding to x."""
         adjusted_x = self.map_x(x)
-        starting_height = self.f(self.helpful_guy(self.theta_start))
-        return self.f(adjusted_x) - starting_height + self.y_start
+        return self.f(adjusted_x) - self.starting_height + self.y_start
 
     def slope(self, x: float) -> float:
         """Returns the slope (dy/dx) at position x on the ramp."""
         adjusted_x = self.map_x(x)
         return self.f_prime(adjusted_x)
 
+    def map_x_scale(self) -> float:
+        """Derivative of map_x, constant as the mapping is linear."""
+        return (self.end_offset - self.start_offset) / (self.x_end - self.x_start)
+
+    def height_derivative(self, x: float) -> float:
+        # Unlike slope(), this includes the scale of the x mapping
+        return self.f_prime(self.map_x(x)) * self.map_x_scale()
+
+    def slope_derivative(self, x: float) -> float:
+        return self.f_double_prime(self.map_x(x)) * self.map_x_scale()
+
+    def definition(self) -> tuple:
+        return (
+            "circular",
+            float(self.x_start),
+            float(self.x_end),
+            float(self.radius),
+            float(self.theta_start),
+            float(self.theta_end),
+        )
+
 
 class PiecewiseRamp:
     """Handles multiple ramp segments and ensures continuity automatically."""
 
     def __init__(self):
         self.segments: List[RampSegment] = []
+        # Segment bounds in insertion order, which must run along x
+        self.x_starts = np.empty(0)
+        self.x_ends = np.empty(0)
+        self._x_end_list: List[float] = []
 
     def add_segment(self, segment: RampSegment):
         """Adds a new segment and ensures continuity with previous ones."""
         if self.segments:
             prev_segment = self.segments[-1]
+            if segment.x_start < prev_segment.x_start:
+                raise ValueError("Segments must be added in order of x_start")
             prev_y_end = prev_segment.height(prev_segment.x_end)
             segment.y_start = prev_y_end  # Auto-connect
         else:
             segment.y_start = 0  # Default start height
 
         self.segments.append(segment)
+        self.x_starts = np.append(self.x_starts, segment.x_start)
+        self.x_ends = np.append(self.x_ends, segment.x_end)
+        self._x_end_list.append(segment.x_end)
+
+    def find_segment(self, x: float) -> RampSegment:
+        """
+        Returns the first segment containing x, so the earlier segment wins on a
+        shared boundary.
+        """
+        i = bisect_left(self._x_end_list, x)
+        if i < len(self.segments) and self.segments[i].x_start <= x:
+            return self.segments[i]
+        raise ValueError(f"x={x} is out of ramp range!")
 
     def height(self, x: float) -> float:
         """Computes the height at x, ensuring continuity dynamically."""
-        for segment in self.segments:
-            if segment.x_start <= x <= segment.x_end:
-                return abs(segment.height(x))
-        raise ValueError(f"x={x} is out of ramp range!")
+        # np.ndim is slow enough to matter here, so plain floats skip it
+        if not isinstance(x, float) and np.ndim(x) > 0:
+            return self.height_array(x)
+        return abs(self.find_segment(x).height(x))
 
     def slope(self, x: float) -> float:
         """Finds the appropriate segment and computes slope."""
-        for segment in self.segments:
-            if segment.x_start <= x <= segment.x_end:
-                return abs(segment.slope(x))
-        raise ValueError(f"x={x} is out of ramp range!")
+        if not isinstance(x, float) and np.ndim(x) > 0:
+            return self.slope_array(x)
+        return abs(self.find_segment(x).slope(x))
+
+    def height_derivative(self, x: float) -> float:
+        """Derivative of height() with respect to x, i.e. of the height magnitude."""
+        if not isinstance(x, float) and np.ndim(x) > 0:
+            height = self._evaluate_array(x, "height")
+            derivative = self._evaluate_array(x, "height_derivative")
+            # Where the ramp starts at zero height, it can only grow in magnitude
+            return np.where(
+                height == 0, np.abs(derivative), np.sign(height) * derivative
+            )
+        segment = self.find_segment(x)
+        height = segment.height(x)
+        derivative = segment.height_derivative(x)
+        return abs(derivative) if height == 0 else np.sign(height) * derivative
+
+    def slope_derivative(self, x: float) -> float:
+        """Derivative of slope() with respect to x, i.e. of the slope magnitude."""
+        if not isinstance(x, float) and np.ndim(x) > 0:
+            return np.sign(self._evaluate_array(x, "slope")) * self._evaluate_array(
+                x, "slope_derivative"
+            )
+        segment = self.find_segment(x)
+        return np.sign(segment.slope(x)) * segment.slope_derivative(x)
+
+    def angle(self, x: float) -> float:
+        """Angle of the ramp surface at x, in radians."""
+        return np.arctan(self.slope(x))
+
+    def definition(self) -> tuple:
+        """Identifies the ramp shape, e.g. as a cache key."""
+        return tuple(segment.definition() for segment in self.segments)
+
+    def height_array(self, x: np.ndarray) -> np.ndarray:
+        """Evaluates height over an array of shift distances."""
+        return np.abs(self._evaluate_array(x, "height"))
+
+    def slope_array(self, x: np.ndarray) -> np.ndarray:
+        """Evaluates slope over an array of shift distances."""
+        return np.abs(self._evaluate_array(x, "slope"))
+
+    def _evaluate_array(self, x: np.ndarray, method: str) -> np.ndarray:
+        """Evaluates a segment method over an array, matching find_segment."""
+        x = np.asarray(x, dtype=float)
+        indices = np.searchsorted(self.x_ends, x, side="left")
+        last = len(self.segments) - 1
+        in_range = (indices <= last) & (self.x_starts[np.minimum(indices, last)] <= x)
+        if not np.all(in_range):
+            raise ValueError(f"x={x[~in_range][0]} is out of ramp range!")
+
+        values = np.empty(x.shape)
+        for i, segment in enumerate(self.segments):
+            mask = indices == i
+            if np.any(mask):
+                # LinearSegment.slope returns a scalar, so broadcast on assignment
+                values[mask] = getattr(segment, method)(x[mask])
+        return values
 
 
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
     # Sample primary ramp
     ramp = PiecewiseRamp()
     ramp.add_segment(LinearSegment(x_start=0, x_end=MAX_SHIFT / 6, slope=-0.5))
@@ -146,7 +270,7 @@ if __name__ == "__main__":
 
     # Evaluate ramp
     x_values = np.linspace(0, MAX_SHIFT, 1000)
-    y_values = [-ramp.height(x) for x in x_values]
+    y_values = -ramp.height_array(x_values)
 
     # Plot results
     plt.plot(x_values, y_values)
@@ -158,7 +282,7 @@ if __name__ == "__main__":
     plt.show()
 
     # Evaluate slope
-    slope_values = [ramp.slope(x) for x in x_values]
+    slope_values = ramp.slope_array(x_values)
 
     # Plot results
     plt.plot(x_values, slope_values)
@@ -169,7 +293,7 @@ if __name__ == "__main__":
     plt.show()
 
     # Evaluate angle
-    angle_values = [np.arctan(slope) for slope in slope_values]
+    angle_values = np.arctan(slope_values)
 
     # Plot results
     plt.plot(x_values, angle_values)
@@ -0,0 +1,138 @@
+# Simulation results cached on disk by everything that determines them
+
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from typing import Dict, Optional
+import constants.car_specs as car_specs
+import constants.constants as physical_constants
+import constants.engine_specs as engine_specs
+from utils.argument_parser import SimulationArgs
+from utils.simulation_result import SimulationResult
+
+DEFAULT_RESULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "cvt_simulator", "results"
+)
+# Bump when a change to the model or its integration changes results
+MODEL_VERSION = 1
+DEFAULT_MAX_CACHE_BYTES = 512 * 2**20  # Least recently used entries beyond it go
+# Arguments the simulation never reads, such as the distance sweeps measure
+# the time to. What-if changes to them reuse the cached run as it is.
+UNSIMULATED_ARGUMENTS = ("traction", "total_distance")
+
+
+def model_constants() -> Dict:
+    """The car, engine and physical constants the model is built from."""
+    return {
+        "car_specs": _module_constants(car_specs),
+        "constants": _module_constants(physical_constants),
+        "engine_specs": engine_specs.engineSpecs,
+    }
+
+
+def _module_constants(module) -> Dict:
+    return {
+        name: value
+        for name, value in vars(module).items()
+        if name.isupper() and isinstance(value, (int, float))
+    }
+
+
+def result_cache_key(args: SimulationArgs, settings: Dict) -> str:
+    """
+    Hashes what a result depends on: the simulated arguments, the settings of
+    its integration, the car, engine and physical constants and
+    MODEL_VERSION. The UNSIMULATED_ARGUMENTS are left out, so changing them
+    reuses the cached run.
+    """
+    arguments = {
+        name: value
+        for name, value in asdict(args).items()
+        if name not in UNSIMULATED_ARGUMENTS
+    }
+    definition = json.dumps(
+        {
+            "model_version": MODEL_VERSION,
+            "arguments": arguments,
+            "settings": settings,
+            "model": model_constants(),
+        },
+        sort_keys=True,
+        default=repr,
+    )
+    return hashlib.sha256(definition.encode()).hexdigest()[:32]
+
+
+def _entry_paths(cache_dir: str, key: str):
+    return os.path.join(cache_dir, f"{key}.npy"), os.path.join(cache_dir, f"{key}.json")
+
+
+def load_cached_result(cache_dir: str, key: str) -> Optional[SimulationResult]:
+    """
+    The result stored under key, or None when there is none. Entries are
+    written by SimulationResult.write_npy, as .npy samples with a .json
+    header, and are read back whole in milliseconds.
+    """
+    path, header = _entry_paths(cache_dir, key)
+    try:
+        result = SimulationResult.from_npy(path, mmap=False)
+    except (OSError, ValueError, KeyError):
+        return None  # Missing, evicted meanwhile or unreadable
+    # Mark the entry as recently used
+    try:
+        os.utime(path)
+        os.utime(header)
+    except OSError:
+        pass
+    return result
+
+
+def store_result(
+    cache_dir: str,
+    key: str,
+    result: SimulationResult,
+    max_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+):
+    """
+    Stores result under key, then evicts the least recently used entries
+    until the cache fits in max_bytes, 512 MiB by default. Failures are
+    ignored, as the cache is only an optimization.
+    """
+    path, header = _entry_paths(cache_dir, key)
+    temporary_path = os.path.join(cache_dir, f"{key}.{os.getpid()}.tmp.npy")
+    temporary_header = os.path.splitext(temporary_path)[0] + ".json"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        result.write_npy(temporary_path)
+        # The samples first: an entry without its header is never read
+        os.replace(temporary_path, path)
+        os.replace(temporary_header, header)
+        evict_results(cache_dir, max_bytes)
+    except OSError:
+        for leftover in (temporary_path, temporary_header):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+
+def evict_results(cache_dir: str, max_bytes: int):
+    """Removes the least recently used entries until the rest fit in max_bytes."""
+    entries = {}
+    for entry in os.scandir(cache_dir):
+        key, extension = os.path.splitext(entry.name)
+        if extension not in (".npy", ".json") or "." in key:
+            continue  # Not a complete entry, such as one being written
+        stat = entry.stat()
+        size, last_used = entries.get(key, (0, 0.0))
+        entries[key] = (size + stat.st_size, max(last_used, stat.st_mtime))
+
+    total = sum(size for size, _ in entries.values())
+    for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+        if total <= max_bytes:
+            break
+        for path in _entry_paths(cache_dir, key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Evicted by another process
+        total -= size
@@ -0,0 +1,217 @@
+# Results written while the simulation runs, in chunks of samples, so a long
+# run can be followed from another process and a crash keeps what was done
+
+import struct
+from typing import Callable, Dict, Optional
+import numpy as np
+from utils.binary_format import write_header
+
+DEFAULT_CHUNK_SIZE = 500  # Samples per flush
+
+# Fixed size of the .npy header, so it can be rewritten in place as it grows
+NPY_HEADER_SIZE = 128
+
+
+def _npy_header(num_columns: int, num_samples: int) -> bytes:
+    """
+    .npy header of a (columns, samples) float64 array stored sample after
+    sample (Fortran order), which is how samples are appended to the file.
+    """
+    header = repr(
+        {
+            "descr": "<f8",
+            "fortran_order": True,
+            "shape": (num_columns, num_samples),
+        }
+    )
+    # Magic string, version 1.0 and the length of the padded header
+    prefix_size = 10
+    header = header.ljust(NPY_HEADER_SIZE - prefix_size - 1) + "\n"
+    return (
+        b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+    )
+
+
+class ResultStream:
+    """
+    Writes samples as they are appended, chunk_size at a time. The columns
+    of each chunk come from columns_of(time, y), by name. The file is
+    created, with its header, when the stream is opened.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        columns_of: Callable[[np.ndarray, np.ndarray], Dict[str, np.ndarray]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.filename = filename
+        self.columns_of = columns_of
+        self.chunk_size = chunk_size
+        self.num_samples = 0  # Written to the file
+        self._time = []
+        self._y = []
+        self._buffered = 0
+        self._file = open(filename, "wb")
+
+    def append(self, time: np.ndarray, y: np.ndarray):
+        """Adds the samples y (4, n) at time (n,), writing every full chunk."""
+        self._time.append(np.asarray(time, dtype=float))
+        self._y.append(np.asarray(y, dtype=float).reshape(4, -1))
+        self._buffered += len(self._time[-1])
+        if self._buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered samples, leaving a complete file behind."""
+        if self._buffered == 0:
+            return
+        time = np.concatenate(self._time)
+        y = np.concatenate(self._y, axis=1)
+        self._time, self._y, self._buffered = [], [], 0
+
+        self._write(self.columns_of(time, y))
+        self.num_samples += len(time)
+        self._file.flush()
+
+    def close(self):
+        """Writes the remaining samples and closes the file."""
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # Also on errors, so a failed run leaves the samples it reached
+        self.close()
+
+    def _column_names(self):
+        return list(self.columns_of(np.empty(0), np.empty((4, 0))))
+
+    def _write(self, columns: Dict[str, np.ndarray]):
+        raise NotImplementedError
+
+
+class CsvResultStream(ResultStream):
+    """Streams CSV rows, formatted as write_csv formats them."""
+
+    def __init__(self, filename, columns_of, chunk_size=DEFAULT_CHUNK_SIZE):
+        super().__init__(filename, columns_of, chunk_size)
+        self._file.write(self._to_csv({name: [] for name in self._column_names()}))
+        self._file.flush()
+
+    def _write(self, columns):
+        # Written whole, so only complete rows reach the file
+        self._file.write(self._to_csv(columns, header=False))
+
+    @staticmethod
+    def _to_csv(columns, header=True) -> bytes:
+        import pandas as pd
+
+        return pd.DataFrame(columns).to_csv(index=False, header=header).encode()
+
+
+class NpyResultStream(ResultStream):
+    """
+    Streams to the binary format of write_columns. Samples are stored one
+    after the other, and the header is rewritten after every chunk, so the
+    file can be read (and memory-mapped) at any time. Columns read from it
+    are strided rather than contiguous.
+    """
+
+    def __init__(
+        self,
+        filename,
+        columns_of,
+        units: Dict[str, str],
+        metadata: Optional[Dict] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        if not filename.endswith(".npy"):
+            raise ValueError(
+                f"Binary results are written to .npy files, not {filename}"
+            )
+        super().__init__(filename, columns_of, chunk_size)
+        names = self._column_names()
+        self._num_columns = len(names)
+        write_header(filename, names, units, metadata)
+        self._file.write(_npy_header(self._num_columns, 0))
+        self._file.flush()
+
+    def _write(self, columns):
+        data = np.vstack(list(columns.values())).astype("<f8")
+        self._file.write(np.ascontiguousarray(data.T).tobytes())
+        # Data first, then the sample count covering it
+        self._file.flush()
+        end = self._file.tell()
+        self._file.seek(0)
+        self._file.write(
+            _npy_header(self._num_columns, self.num_samples + data.shape[1])
+        )
+        self._file.seek(end)
+
+
+def open_result_stream(
+    filename: str,
+    columns_of,
+    units: Dict[str, str],
+    metadata: Optional[Dict] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> ResultStream:
+    """A binary stream for .npy files and a CSV stream otherwise."""
+    if filename.endswith(".npy"):
+        return NpyResultStream(filename, columns_of, units, metadata, chunk_size)
+    return CsvResultStream(filename, columns_of, chunk_size)
+
+
+class StepSampler:
+    """
+    Passes the samples of a solve_ivp segment to sink(time, y) as its steps
+    are accepted, given as the step callback of with_step_callback. The
+    samples of a step are held back until the next step is accepted, as a
+    terminal event may end the segment partway through it.
+    """
+
+    def __init__(self, sink, t_eval=None, start=None):
+        """
+        Samples are taken at t_eval, or at every step when it is None. start
+        is a (t, y) sample passed on first, for segments whose initial state
+        is part of the result.
+        """
+        self.sink = sink
+        self.t_eval = t_eval
+        self.passed = 0  # Samples passed to the sink
+        self._index = 0
+        self._pending = None
+        if start is not None:
+            t, y = start
+            self._pass([t], np.reshape(y, (4, 1)))
+
+    def __call__(self, solver):
+        if self._pending is not None:
+            self._pass(*self._pending)
+            self._pending = None
+
+        if self.t_eval is None:
+            self._pending = ([solver.t], solver.y.reshape(4, 1).copy())
+            return
+        end = np.searchsorted(self.t_eval, solver.t, side="right")
+        if end > self._index:
+            times = self.t_eval[self._index : end]
+            self._pending = (times, solver.dense_output()(times).reshape(4, -1))
+            self._index = end
+
+    def finish(self, time: np.ndarray, y: np.ndarray):
+        """
+        Passes on the rest of the samples of the finished segment, given as
+        solve_ivp returned them. The samples passed so far begin them.
+        """
+        self._pending = None
+        self._pass(time[self.passed :], y[:, self.passed :])
+
+    def _pass(self, time, y):
+        self.passed += len(time)
+        self.sink(time, y)
@@ -0,0 +1,256 @@
+# Shift-distance geometry of the CVT, exact or from a precomputed lookup table
+
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import NamedTuple, Optional
+import numpy as np
+from scipy.interpolate import CubicHermiteSpline
+from constants.car_specs import (
+    BELT_ANGLE,
+    BELT_HEIGHT,
+    CENTER_TO_CENTER,
+    INITIAL_SHEAVE_DISPLACEMENT,
+    MAX_SHIFT,
+)
+from utils.theoretical_models import TheoreticalModels as tm
+
+DEFAULT_TOLERANCE = 1e-9  # Relative interpolation error allowed in the table
+INITIAL_INTERVALS = 32
+MAX_INTERVALS = 2**16
+
+
+class ShiftGeometry(NamedTuple):
+    """Every geometric quantity of the CVT at one shift distance."""
+
+    outer_prim_radius: float
+    outer_sec_radius: float
+    primary_radius: float  # Pitch radius, at the middle of the belt
+    secondary_radius: float
+    cvt_ratio: float
+    primary_wrap_angle: float
+    secondary_wrap_angle: float
+
+
+def _geometry_from_values(outer_prim_radius, outer_sec_radius, cvt_ratio, wrap_offset):
+    # abs() rather than np.abs keeps the scalar path free of numpy overhead
+    wrap_magnitude = abs(wrap_offset)
+    return ShiftGeometry(
+        outer_prim_radius,
+        outer_sec_radius,
+        outer_prim_radius - BELT_HEIGHT / 2,
+        outer_sec_radius - BELT_HEIGHT / 2,
+        cvt_ratio,
+        np.pi - wrap_magnitude,
+        np.pi + wrap_magnitude,
+    )
+
+
+def _exact_values(d):
+    """
+    The interpolated quantities straight from TheoreticalModels. The signed
+    wrap offset is used instead of the wrap angles, as it stays smooth where
+    the ratio passes through 1.
+    """
+    outer_prim_radius = tm.outer_prim_radius(d)
+    outer_sec_radius = tm.outer_sec_radius(d)
+    primary_radius = outer_prim_radius - BELT_HEIGHT / 2
+    secondary_radius = outer_sec_radius - BELT_HEIGHT / 2
+    return (
+        outer_prim_radius,
+        outer_sec_radius,
+        secondary_radius / primary_radius,
+        tm.wrap_angle(primary_radius, secondary_radius),
+    )
+
+
+def exact_shift_geometry(d) -> ShiftGeometry:
+    """Evaluates the full geometry with the exact formulas."""
+    return _geometry_from_values(*_exact_values(d))
+
+
+def _exact_derivatives(d: np.ndarray, values) -> np.ndarray:
+    """Derivatives of the interpolated quantities with respect to d."""
+    outer_prim_radius, outer_sec_radius, cvt_ratio, wrap_offset = values
+    primary_radius = outer_prim_radius - BELT_HEIGHT / 2
+    secondary_radius = outer_sec_radius - BELT_HEIGHT / 2
+
+    prim_slope = np.full_like(d, 1 / (2 * np.tan(BELT_ANGLE)))
+    # The square root in outer_sec_radius equals 2s - 2p + πC
+    sec_slope = prim_slope * (
+        1
+        - 2
+        * np.pi
+        * CENTER_TO_CENTER
+        / (2 * outer_sec_radius - 2 * outer_prim_radius + np.pi * CENTER_TO_CENTER)
+    )
+    ratio_slope = (sec_slope * primary_radius - secondary_radius * prim_slope) / (
+        primary_radius**2
+    )
+    offset_slope = (sec_slope - prim_slope) / (
+        CENTER_TO_CENTER * np.cos(wrap_offset / 2)
+    )
+    return np.stack([prim_slope, sec_slope, ratio_slope, offset_slope], axis=-1)
+
+
+def shift_geometry_derivative(d) -> ShiftGeometry:
+    """
+    Derivative of every geometric quantity with respect to the shift distance,
+    from the exact formulas. Everything is constant until the belt engages.
+    """
+    distance = np.asarray(d, dtype=float)
+    values = _exact_values(distance)
+    derivatives = np.moveaxis(_exact_derivatives(distance, values), -1, 0)
+    derivatives = derivatives * (distance > INITIAL_SHEAVE_DISPLACEMENT)
+    if derivatives.ndim == 1:
+        derivatives = derivatives.tolist()
+    prim_slope, sec_slope, ratio_slope, offset_slope = derivatives
+    # The wrap angles move apart by |offset|, so flip with its sign
+    wrap_slope = np.sign(values[3]) * offset_slope
+    return ShiftGeometry(
+        prim_slope,
+        sec_slope,
+        prim_slope,
+        sec_slope,
+        ratio_slope,
+        -wrap_slope,
+        wrap_slope,
+    )
+
+
+class ShiftGeometryTable:
+    """
+    Cubic Hermite interpolation of the shift geometry on a uniform grid.
+
+    Below INITIAL_SHEAVE_DISPLACEMENT the belt is not yet engaged and every
+    quantity is constant, so the grid only spans the engaged range up to
+    MAX_SHIFT. The grid is refined until the worst relative error at the
+    interval midpoints is within the tolerance. Distances beyond MAX_SHIFT
+    fall back to the exact formulas.
+    """
+
+    def __init__(self, tolerance: float = DEFAULT_TOLERANCE):
+        self.tolerance = tolerance
+        self.start = INITIAL_SHEAVE_DISPLACEMENT
+        self.stop = MAX_SHIFT
+        self.engaged = exact_shift_geometry(self.start)
+
+        num_intervals = INITIAL_INTERVALS
+        while True:
+            self._build(num_intervals)
+            self.max_error = self._measure_error()
+            if self.max_error <= tolerance or num_intervals >= MAX_INTERVALS:
+                break
+            num_intervals *= 2
+
+    def _build(self, num_intervals: int):
+        self.num_intervals = num_intervals
+        self.step = (self.stop - self.start) / num_intervals
+        self._inverse_step = 1 / self.step
+        self.nodes = np.linspace(self.start, self.stop, num_intervals + 1)
+        self._node_list = self.nodes.tolist()
+
+        values = _exact_values(self.nodes)
+        spline = CubicHermiteSpline(
+            self.nodes,
+            np.stack(values, axis=-1),
+            _exact_derivatives(self.nodes, values),
+        )
+        # Shape (4 powers, intervals, quantities), highest power first
+        self._coefficient_array = spline.c
+        # Plain floats per interval and quantity for the scalar path
+        self._coefficients = spline.c.transpose(1, 2, 0).tolist()
+
+    def _measure_error(self) -> float:
+        midpoints = (self.nodes[:-1] + self.nodes[1:]) / 2
+        exact = np.stack(_exact_values(midpoints), axis=-1)
+        approximate = np.stack(self._interpolate_array(midpoints), axis=-1)
+        scale = np.max(np.abs(exact), axis=0)
+        return float(np.max(np.abs(approximate - exact) / scale))
+
+    def _interpolate_array(self, d: np.ndarray):
+        index = np.clip(
+            ((d - self.start) * self._inverse_step).astype(int),
+            0,
+            self.num_intervals - 1,
+        )
+        x = (d - self.nodes[index])[:, None]
+        c3, c2, c1, c0 = self._coefficient_array[:, index]
+        values = ((c3 * x + c2) * x + c1) * x + c0
+        return tuple(values.T)
+
+    def _lookup_array(self, d) -> ShiftGeometry:
+        d = np.asarray(d, dtype=float)
+        flat = d.ravel()
+        values = [v.copy() for v in self._interpolate_array(flat)]
+
+        for q, constant in enumerate(_exact_values(self.start)):
+            values[q][flat <= self.start] = constant
+        beyond = flat > self.stop
+        if np.any(beyond):
+            for q, exact in enumerate(_exact_values(flat[beyond])):
+                values[q][beyond] = exact
+
+        return _geometry_from_values(*(v.reshape(d.shape) for v in values))
+
+    def lookup(self, d) -> ShiftGeometry:
+        """Interpolates every geometric quantity at shift distance d."""
+        # np.ndim is slow enough to matter here, so plain floats skip it
+        if not isinstance(d, float) and np.ndim(d) > 0:
+            return self._lookup_array(d)
+        d = float(d)
+        if d <= self.start:
+            return self.engaged
+        if d > self.stop:
+            return exact_shift_geometry(d)
+
+        i = int((d - self.start) * self._inverse_step)
+        if i >= self.num_intervals:
+            i = self.num_intervals - 1
+        x = d - self._node_list[i]
+        values = [
+            ((c3 * x + c2) * x + c1) * x + c0
+            for c3, c2, c1, c0 in self._coefficients[i]
+        ]
+        return _geometry_from_values(*values)
+
+
+@lru_cache(maxsize=None)
+def build_geometry_table(tolerance: float = DEFAULT_TOLERANCE) -> ShiftGeometryTable:
+    """Builds a table once per tolerance and reuses it afterwards."""
+    return ShiftGeometryTable(tolerance)
+
+
+_active_table: Optional[ShiftGeometryTable] = None
+
+
+def use_geometry_table(
+    enabled: bool = True, tolerance: float = DEFAULT_TOLERANCE
+) -> Optional[ShiftGeometryTable]:
+    """
+    Switches shift_geometry between the lookup table and the exact formulas.
+    Returns the table in use, or None when the exact formulas are selected.
+    """
+    global _active_table
+    _active_table = build_geometry_table(tolerance) if enabled else None
+    return _active_table
+
+
+@contextmanager
+def using_geometry_table(enabled: bool = True, tolerance: float = DEFAULT_TOLERANCE):
+    """
+    use_geometry_table for the duration of a with block, restoring the previous
+    selection afterwards.
+    """
+    global _active_table
+    previous = _active_table
+    try:
+        yield use_geometry_table(enabled, tolerance)
+    finally:
+        _active_table = previous
+
+
+def shift_geometry(d) -> ShiftGeometry:
+    """All geometric quantities at shift distance d, from the table when enabled."""
+    if _active_table is not None:
+        return _active_table.lookup(d)
+    return exact_shift_geometry(d)
@@ -2,9 +2,13 @@ from constants.car_specs import (
     MAX_SHIFT,
 )
 from simulations.cvt_shift import CvtShift
-from utils.system_state import SystemState
+from utils.system_state import StateView, SystemState
 import numpy as np
 
+# Below this, the shift acceleration away from an end-stop is taken as zero.
+# The margin keeps a shift that was just pinned from being released at once.
+RELEASE_ACCELERATION = 1e-3  # m/s^2
+
 
 def logistic_clamp(x, lower_bound, upper_bound, slope=5000.0):
     """
@@ -19,31 +23,57 @@ def logistic_clamp(x, lower_bound, upper_bound, slope=5000.0):
     return factor_low * factor_up
 
 
-def update_y(y, state: SystemState):
-    stateArray = state.to_array()
-    for i in range(len(y)):
-        y[i] = stateArray[i]
+def pinned_state(y, stop: float):
+    """The state y with the shift at rest against the end-stop at stop."""
+    pinned = np.array(y, dtype=float)
+    pinned[2] = 0.0
+    pinned[3] = stop
+    return pinned
+
+
+def release_margin(shift_simulator: CvtShift, y, stop: float) -> float:
+    """
+    Shift acceleration away from the end-stop at stop, less
+    RELEASE_ACCELERATION, as the shift starts to leave it. The shift stays
+    pinned while this is negative, i.e. until the net radial force overcomes
+    the friction opposing that motion. A batched (4, N) y takes one stop per
+    lane.
+    """
+    state = SystemState.from_array(pinned_state(y, stop))
+    away = np.where(stop < MAX_SHIFT, 1.0, -1.0)
+    # Only the direction of the shift velocity enters the friction
+    state.shift_velocity = away * np.finfo(float).eps
+    acceleration = shift_simulator.calculate_shift_acceleration(state)
+    return away * acceleration - RELEASE_ACCELERATION
+
+
+def is_pinned(shift_simulator: CvtShift, y, stop: float) -> bool:
+    """Whether a shift coming to rest against the end-stop at stop stays there."""
+    return release_margin(shift_simulator, y, stop) <= 0
+
+
+def shift_lower_stop_event(t, y):
+    """The free shift reaches the engaged end-stop."""
+    state = StateView(y)
+    return state.shift_distance
 
 
-def shift_constraint_event(t, y):
-    state = SystemState.from_array(y)
-    shift_velocity = state.shift_velocity
-    shift_distance = state.shift_distance
+shift_lower_stop_event.terminal = True
+shift_lower_stop_event.direction = -1
 
-    if shift_distance < 0:
-        state.shift_distance = 0
-        state.shift_velocity = max(0, shift_velocity)
 
-    elif shift_distance > MAX_SHIFT:
-        state.shift_distance = MAX_SHIFT
-        state.shift_velocity = min(0, shift_velocity)
+def shift_upper_stop_event(t, y):
+    """The free shift reaches full shift."""
+    state = StateView(y)
+    return state.shift_distance - MAX_SHIFT
 
-    update_y(y, state)
-    return 1
+
+shift_upper_stop_event.terminal = True
+shift_upper_stop_event.direction = 1
 
 
 def car_velocity_constraint_event(t, y):
-    state = SystemState.from_array(y)
+    state = StateView(y)
     return state.car_velocity
 
 
@@ -51,33 +81,23 @@ car_velocity_constraint_event.terminal = True
 car_velocity_constraint_event.direction = -1
 
 
-def get_shift_steady_event(shift_simulator: CvtShift):
+def get_shift_release_event(shift_simulator: CvtShift, stop: float):
     """
-    Returns an event function that triggers only when:
-      1. The system is close enough to full shift (i.e. shift_distance within tol of MAX_SHIFT).
-      2. The desired shift acceleration (as computed by shift_simulator)
-         transitions from negative to positive (i.e. it wants to push further).
+    Returns an event function that triggers when the shift pinned at the
+    end-stop at stop would accelerate away from it.
     """
 
-    def shift_steady_event(t, y):
-        state = SystemState.from_array(y)
-        tol = 1e-5  # Tolerance for proximity to MAX_SHIFT
-
-        # Before we get near full shift, return a fixed negative value.
-        if state.shift_distance < MAX_SHIFT - tol:
-            return -tol
-
-        # Once near full shift, return the computed shift acceleration.
-        # The event will trigger when this value crosses from negative to positive.
-        return shift_simulator.calculate_shift_acceleration(state)
+    def shift_release_event(t, y):
+        return release_margin(shift_simulator, y, stop)
 
-    shift_steady_event.terminal = True
-    shift_steady_event.direction = 1  # Looking for a negative-to-positive crossing.
-    return shift_steady_event
+    shift_release_event.terminal = True
+    shift_release_event.direction = 1
+    return shift_release_event
 
 
-# Export all constraints
+# Events of the free shifting model
 constraints = [
-    shift_constraint_event,
+    shift_lower_stop_event,
+    shift_upper_stop_event,
     car_velocity_constraint_event,
 ]
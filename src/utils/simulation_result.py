@@ -1,69 +1,197 @@
-from utils.system_state import SystemState
-import pandas as pd
-import matplotlib.pyplot as plt
+from collections.abc import Sequence
+import numpy as np
+from utils.binary_format import read_columns, write_columns
+from utils.checkpoint import Checkpoint
+from utils.system_state import STATE_FIELDS, SystemState
+
+# pandas and matplotlib are imported where they are used, as importing them
+# costs more than a short simulation and most runs never need them
+
+# Units of the columns written by SimulationResult
+COLUMN_UNITS = {
+    "time": "s",
+    "car_velocity": "m/s",
+    "car_position": "m",
+    "shift_velocity": "m/s",
+    "shift_distance": "m",
+}
+
+
+def read_csv_columns(filename, columns=None, chunksize=None) -> dict:
+    """
+    Reads the named columns (all when None) of a CSV file straight into
+    float64 arrays. The types are given to the parser rather than inferred,
+    and other columns are skipped while parsing. With chunksize the file is
+    parsed that many rows at a time, so a very large file never needs a
+    DataFrame of its full length.
+    """
+    import pandas as pd
+
+    dtype = float if columns is None else {column: float for column in columns}
+    reader = pd.read_csv(
+        filename, usecols=columns, dtype=dtype, engine="c", chunksize=chunksize
+    )
+    if chunksize is None:
+        return {column: reader[column].to_numpy() for column in reader.columns}
+
+    chunks = {}
+    for chunk in reader:
+        for column in chunk.columns:
+            chunks.setdefault(column, []).append(chunk[column].to_numpy())
+    return {column: np.concatenate(parts) for column, parts in chunks.items()}
+
+
+class StatesView(Sequence):
+    """
+    Read-only sequence of the states of a result. Each SystemState is built
+    when it is accessed, so a run never holds one object per sample.
+    """
+
+    def __init__(self, y: np.ndarray):
+        self._y = y
+
+    def __len__(self):
+        return self._y.shape[1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return SystemState.from_array(self._y[:, index])
 
 
 class SimulationResult:
-    def __init__(self, solution=None, time=None, states=None):
-        """Initialize with solution from solve_ivp and parse it into states, or directly with time and states."""
+    def __init__(
+        self,
+        solution=None,
+        time=None,
+        states=None,
+        solver_stats=None,
+        trajectory=None,
+        y=None,
+        checkpoints=None,
+    ):
+        """
+        Initialize with solution from solve_ivp, or directly with time and
+        either the states or their (4, n) array y.
+        """
+        # Work done by the integrator in each phase, when known
+        self.solver_stats = solver_stats
+        # Continuous solution of the run, kept when it was integrated with dense output
+        self.trajectory = trajectory
+        # States the run can be resumed from, in order
+        self.checkpoints = list(checkpoints) if checkpoints is not None else []
         if solution is not None:
-            self.time = solution.t
-            self.states = self.parse_solution(solution)
-        else:
-            self.time = time
-            self.states = states
+            time, y = solution.t, solution.y
+        elif states is not None:
+            y = [[getattr(state, name) for state in states] for name in STATE_FIELDS]
 
-    @staticmethod
-    def parse_solution(solution):
-        """Parses the solution from solve_ivp into a list of DrivetrainState instances."""
-        states = [SystemState.from_array(state) for state in solution.y.T]
-        return states
+        # One contiguous row per state variable
+        self.time = np.asarray(time, dtype=float)
+        self.y = np.ascontiguousarray(y, dtype=float).reshape(len(STATE_FIELDS), -1)
 
-    @staticmethod
-    def from_csv(filename="simulation_output.csv"):
-        """Reads the solution states from a CSV file and returns a SimulationResult instance."""
-        df = pd.read_csv(filename)
-        time = df["time"].values
-        states = [
-            SystemState(
-                car_velocity=row["car_velocity"],
-                car_position=row["car_position"],
-                shift_velocity=row["shift_velocity"],
-                shift_distance=row["shift_distance"],
+    @property
+    def states(self) -> StatesView:
+        """The samples as SystemStates, for code written against the old lists."""
+        return StatesView(self.y)
+
+    @property
+    def car_velocity(self) -> np.ndarray:
+        return self.y[0]
+
+    @property
+    def car_position(self) -> np.ndarray:
+        return self.y[1]
+
+    @property
+    def shift_velocity(self) -> np.ndarray:
+        return self.y[2]
+
+    @property
+    def shift_distance(self) -> np.ndarray:
+        return self.y[3]
+
+    def column(self, field: str) -> np.ndarray:
+        """Values of the state variable field at every sample."""
+        if field not in STATE_FIELDS:
+            raise ValueError(
+                f"Invalid field '{field}'. Choose from {list(STATE_FIELDS)}"
             )
-            for _, row in df.iterrows()
-        ]
-        return SimulationResult(time=time, states=states)
+        return self.y[STATE_FIELDS.index(field)]
 
-    def write_csv(self, filename="simulation_output.csv"):
-        """Writes the parsed solution states to a CSV file."""
-        data = {
+    def columns(self) -> dict:
+        """The time and every state variable, by name."""
+        return {
             "time": self.time,
-            "car_velocity": [state.car_velocity for state in self.states],
-            "car_position": [state.car_position for state in self.states],
-            "shift_velocity": [state.shift_velocity for state in self.states],
-            "shift_distance": [state.shift_distance for state in self.states],
+            **{field: self.y[i] for i, field in enumerate(STATE_FIELDS)},
         }
-        df = pd.DataFrame(data)
+
+    def resample(self, num_points: int) -> "SimulationResult":
+        """Samples the run at num_points evenly spaced times from its dense output."""
+        if self.trajectory is None:
+            raise ValueError("Resampling needs a run integrated with dense output")
+        return self.trajectory.resample(num_points)
+
+    @staticmethod
+    def from_csv(filename="simulation_output.csv", chunksize=None):
+        """
+        Reads the solution states from a CSV file and returns a SimulationResult
+        instance. See read_csv_columns for chunksize.
+        """
+        columns = read_csv_columns(
+            filename, ["time", *STATE_FIELDS], chunksize=chunksize
+        )
+        return SimulationResult(
+            time=columns["time"], y=[columns[field] for field in STATE_FIELDS]
+        )
+
+    def write_csv(self, filename="simulation_output.csv"):
+        """Writes the parsed solution states to a CSV file."""
+        import pandas as pd
+
+        df = pd.DataFrame(self.columns())
         df.to_csv(filename, index=False)
 
+    @staticmethod
+    def from_npy(filename="simulation_output.npy", mmap=True):
+        """
+        Reads a result written by write_npy. With mmap the samples stay in the
+        file and are paged in as they are used, rather than read up front.
+        """
+        data, header = read_columns(filename, mmap=mmap)
+        expected = ["time", *STATE_FIELDS]
+        if header["columns"][: len(expected)] != expected:
+            raise ValueError(f"{filename} does not start with the columns {expected}")
+        # Rows of the file, so no sample is copied
+        return SimulationResult(
+            time=data[0],
+            y=data[1 : len(expected)],
+            solver_stats=header["metadata"].get("solver_stats"),
+            checkpoints=[
+                Checkpoint.from_dict(checkpoint)
+                for checkpoint in header["metadata"].get("checkpoints", [])
+            ],
+        )
+
+    def write_npy(self, filename="simulation_output.npy", metadata=None):
+        """
+        Writes the samples at full precision to a binary .npy file, with a JSON
+        header beside it holding the units and metadata such as the arguments.
+        """
+        metadata = {
+            "solver_stats": self.solver_stats,
+            "checkpoints": [checkpoint.to_dict() for checkpoint in self.checkpoints],
+            **(metadata or {}),
+        }
+        write_columns(filename, self.columns(), COLUMN_UNITS, metadata)
+
     def plot(self, field="car_velocity"):
         """Plots a selected field over time."""
-        # Mapping field names to their respective data
-        field_data = {
-            "car_velocity": [state.car_velocity for state in self.states],
-            "car_position": [state.car_position for state in self.states],
-            "shift_velocity": [state.shift_velocity for state in self.states],
-            "shift_distance": [state.shift_distance for state in self.states],
-        }
+        import matplotlib.pyplot as plt
 
-        if field not in field_data:
-            raise ValueError(
-                f"Invalid field '{field}'. Choose from {list(field_data.keys())}"
-            )
+        values = self.column(field)
 
         # Plotting
-        plt.plot(self.time, field_data[field])
+        plt.plot(self.time, values)
         plt.xlabel("Time (s)")
         plt.ylabel(field.replace("_", " ").capitalize())
         plt.title(f"{field.replace('_', ' ').capitalize()} Over Time")
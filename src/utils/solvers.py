@@ -0,0 +1,159 @@
+# Integrator backends of the simulation, selectable per phase
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+import numpy as np
+from scipy.integrate import BDF, DOP853, LSODA, RK45, DenseOutput, OdeSolver, Radau
+
+# solve_ivp methods, plus RK4 for FixedStepRK4
+SOLVER_METHODS = ("RK45", "DOP853", "LSODA", "Radau", "BDF", "RK4")
+# solve_ivp methods that use the Jacobian of the system
+IMPLICIT_METHODS = ("Radau", "BDF", "LSODA")
+DEFAULT_FIXED_STEP = 1e-3  # s
+
+
+class HermiteDenseOutput(DenseOutput):
+    """Cubic Hermite interpolant of one step from its end values and slopes."""
+
+    def __init__(self, t_old, t, y_old, y, f_old, f):
+        super().__init__(t_old, t)
+        self.h = t - t_old
+        self.y_old = y_old.copy()
+        self.y = y.copy()
+        self.f_old = f_old.copy()
+        self.f = f.copy()
+
+    def _call_impl(self, t):
+        x = (np.asarray(t) - self.t_old) / self.h
+        if x.ndim == 0:
+            x = x[None]
+            squeeze = True
+        else:
+            squeeze = False
+
+        h00 = (1 + 2 * x) * (1 - x) ** 2
+        h10 = x * (1 - x) ** 2
+        h01 = x**2 * (3 - 2 * x)
+        h11 = x**2 * (x - 1)
+        y = (
+            np.outer(self.y_old, h00)
+            + np.outer(self.f_old * self.h, h10)
+            + np.outer(self.y, h01)
+            + np.outer(self.f * self.h, h11)
+        )
+        return y[:, 0] if squeeze else y
+
+
+class FixedStepRK4(OdeSolver):
+    """
+    The classic fourth order Runge-Kutta method with a fixed step, usable as a
+    solve_ivp method. There is no error control, so the step has to resolve
+    the fastest dynamics of the model. The last step is shortened to end
+    exactly on t_bound.
+    """
+
+    def __init__(
+        self,
+        fun,
+        t0,
+        y0,
+        t_bound,
+        step: float = DEFAULT_FIXED_STEP,
+        vectorized=False,
+    ):
+        super().__init__(fun, t0, y0, t_bound, vectorized)
+        if step <= 0:
+            raise ValueError("step must be positive")
+        self.h = step
+        self.f = self.fun(self.t, self.y)
+        self.y_old = None
+        self.f_old = None
+
+    def _step_impl(self):
+        t = self.t
+        y = self.y
+
+        remaining = abs(self.t_bound - t)
+        if remaining <= self.h:
+            h = remaining * self.direction
+            t_new = self.t_bound
+        else:
+            h = self.h * self.direction
+            t_new = t + h
+
+        k1 = self.f
+        k2 = self.fun(t + h / 2, y + h / 2 * k1)
+        k3 = self.fun(t + h / 2, y + h / 2 * k2)
+        k4 = self.fun(t + h, y + h * k3)
+        y_new = y + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+        self.y_old = y.copy()
+        self.f_old = k1
+        self.t = t_new
+        self.y = y_new
+        self.f = self.fun(t_new, y_new)
+        return True, None
+
+    def _dense_output_impl(self):
+        return HermiteDenseOutput(
+            self.t_old, self.t, self.y_old, self.y, self.f_old, self.f
+        )
+
+
+@dataclass
+class SolverSettings:
+    """The integrator of one phase of the simulation and its tolerances."""
+
+    # One of SOLVER_METHODS. The friction on the shift saturates and flips
+    # sign with its velocity, so the model is nonsmooth and the implicit
+    # methods cost more than they save, even given the analytic Jacobian.
+    # `python benchmark.py solvers --methods RK45 Radau` measures them.
+    method: str = "RK45"
+    rtol: float = 1e-3  # Ignored by RK4
+    atol: float = 1e-6  # Ignored by RK4
+    step: float = DEFAULT_FIXED_STEP  # Only used by RK4
+
+    def __post_init__(self):
+        if self.method not in SOLVER_METHODS:
+            raise ValueError(
+                f"Unknown solver method '{self.method}'. Choose from {SOLVER_METHODS}"
+            )
+
+    def solve_ivp_options(self, jacobian: Optional[Callable] = None) -> Dict:
+        """Keyword arguments for solve_ivp, with the Jacobian if it is used."""
+        if self.method == "RK4":
+            return {"method": FixedStepRK4, "step": self.step}
+
+        options = {"method": self.method, "rtol": self.rtol, "atol": self.atol}
+        if self.method in IMPLICIT_METHODS and jacobian is not None:
+            options["jac"] = jacobian
+        return options
+
+
+# Solver classes of the methods, which can be extended to observe their steps
+METHOD_CLASSES = {
+    "RK45": RK45,
+    "DOP853": DOP853,
+    "LSODA": LSODA,
+    "Radau": Radau,
+    "BDF": BDF,
+    "RK4": FixedStepRK4,
+}
+
+
+def with_step_callback(options: Dict, callback: Callable) -> Dict:
+    """
+    solve_ivp options whose method calls callback(solver) after every
+    accepted step, when its t_old, t, y and dense_output() describe the step.
+    """
+    method = options["method"]
+    base = METHOD_CLASSES[method] if isinstance(method, str) else method
+
+    class ObservedSolver(base):
+        def step(self):
+            message = super().step()
+            if self.status != "failed":
+                callback(self)
+            return message
+
+    return {**options, "method": ObservedSolver}
@@ -1,4 +1,15 @@
+# Names of the state variables, in the order of to_array
+STATE_FIELDS = ("car_velocity", "car_position", "shift_velocity", "shift_distance")
+
+
 class SystemState:
+    """
+    The state of the model. Fields are floats, or arrays holding one value
+    per lane of a batched run.
+    """
+
+    __slots__ = STATE_FIELDS
+
     def __init__(
         self,
         car_velocity=0.0,
@@ -11,6 +22,10 @@ class SystemState:
         self.shift_velocity = shift_velocity
         self.shift_distance = shift_distance
 
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in STATE_FIELDS)
+        return f"SystemState({fields})"
+
     def to_array(self):
         """Converts the state to an array for solve_ivp."""
         return [
@@ -22,10 +37,39 @@ class SystemState:
 
     @staticmethod
     def from_array(array):
-        """Creates a DrivetrainState from an array."""
-        return SystemState(
-            car_velocity=array[0],
-            car_position=array[1],
-            shift_velocity=array[2],
-            shift_distance=array[3],
-        )
+        """
+        Creates a SystemState from a (4,) array, or from a batched (4, N) array
+        whose rows become the fields. Assigning a field never changes the array.
+        """
+        return SystemState(array[0], array[1], array[2], array[3])
+
+
+def _state_field(index: int, name: str):
+    def get(self):
+        return self.array[index]
+
+    def set(self, value):
+        self.array[index] = value
+
+    return property(get, set, doc=f"{name}, read from and written to the array")
+
+
+class StateView:
+    """
+    Named access to a state array, such as the y of solve_ivp, without copying
+    it. A batched (4, N) array gives one row per field. Writing a field writes
+    the array, so views are meant for code that only reads the state.
+    """
+
+    __slots__ = ("array",)
+
+    def __init__(self, array):
+        self.array = array
+
+    car_velocity = _state_field(0, "car_velocity")
+    car_position = _state_field(1, "car_position")
+    shift_velocity = _state_field(2, "shift_velocity")
+    shift_distance = _state_field(3, "shift_distance")
+
+    def to_array(self):
+        return self.array
@@ -1,5 +1,4 @@
 import numpy as np
-import math
 from constants.car_specs import (
     BELT_HEIGHT,
     MIN_PRIM_RADIUS,
@@ -60,7 +59,7 @@ class TheoreticalModels:
             + BELT_HEIGHT
         )
         # print(f"Engage: {engage_distance}, Current: {current_distance}")
-        return max(engage_distance, current_distance)
+        return np.maximum(engage_distance, current_distance)
 
     @staticmethod  # See Enman's excel sheet
     def outer_sec_radius(d: float) -> float:
@@ -68,7 +67,7 @@ class TheoreticalModels:
         return (
             2 * prim_radius
             - np.pi * CENTER_TO_CENTER
-            + math.sqrt(
+            + np.sqrt(
                 (np.pi * CENTER_TO_CENTER) ** 2
                 - 8 * np.pi * CENTER_TO_CENTER * prim_radius
                 + 4 * BELT_LENGTH * CENTER_TO_CENTER
@@ -99,17 +98,13 @@ class TheoreticalModels:
         secondary_radius = TheoreticalModels.outer_sec_radius(d) - BELT_HEIGHT / 2
         wrap_offset = TheoreticalModels.wrap_angle(primary_radius, secondary_radius)
         # print(f"Ratio: {secondary_radius/primary_radius}, wrap: {wrap_offset}")
-        if primary_radius <= secondary_radius:
-            return np.pi - wrap_offset
-        else:
-            return np.pi + wrap_offset
+        # The offset is negative whenever the primary is the larger pulley, so
+        # both branches of the original comparison reduce to the magnitude.
+        return np.pi - np.abs(wrap_offset)
 
     @staticmethod
     def secondary_wrap_angle(d: float):
         primary_radius = TheoreticalModels.outer_prim_radius(d) - BELT_HEIGHT / 2
         secondary_radius = TheoreticalModels.outer_sec_radius(d) - BELT_HEIGHT / 2
         wrap_offset = TheoreticalModels.wrap_angle(primary_radius, secondary_radius)
-        if primary_radius <= secondary_radius:
-            return np.pi + wrap_offset
-        else:
-            return np.pi - wrap_offset
+        return np.pi + np.abs(wrap_offset)
@@ -0,0 +1,56 @@
+import numpy as np
+from utils.simulation_result import SimulationResult
+
+
+class Trajectory:
+    """
+    The continuous solution of a run, stitched from the dense output of each
+    segment integrated by solve_ivp. States are only computed at the times
+    asked for, so any resolution can be sampled after the run.
+    """
+
+    def __init__(self, breakpoints, interpolants):
+        """
+        interpolants[i] covers breakpoints[i] to breakpoints[i + 1]. At a
+        breakpoint the later segment is used, as events may change the state
+        there.
+        """
+        if len(breakpoints) != len(interpolants) + 1:
+            raise ValueError("Expected one more breakpoint than interpolants")
+        self.breakpoints = np.asarray(breakpoints, dtype=float)
+        self.interpolants = list(interpolants)
+
+    @property
+    def t_min(self) -> float:
+        return self.breakpoints[0]
+
+    @property
+    def t_max(self) -> float:
+        return self.breakpoints[-1]
+
+    def __call__(self, t):
+        """States at t, shaped (4,) for a scalar time and (4, n) otherwise."""
+        t = np.asarray(t, dtype=float)
+        scalar = t.ndim == 0
+        t = np.atleast_1d(t)
+        if np.any(t < self.t_min) or np.any(t > self.t_max):
+            raise ValueError(
+                f"Times must lie within [{self.t_min}, {self.t_max}] seconds"
+            )
+
+        segments = np.searchsorted(self.breakpoints, t, side="right") - 1
+        segments = np.minimum(segments, len(self.interpolants) - 1)
+        y = np.empty((4, t.size))
+        for segment in np.unique(segments):
+            mask = segments == segment
+            y[:, mask] = self.interpolants[segment](t[mask])
+        return y[:, 0] if scalar else y
+
+    def sample(self, times) -> SimulationResult:
+        """A result holding the states at times."""
+        times = np.asarray(times, dtype=float)
+        return SimulationResult(time=times, y=self(times), trajectory=self)
+
+    def resample(self, num_points: int) -> SimulationResult:
+        """A result holding num_points states evenly spread over the run."""
+        return self.sample(np.linspace(self.t_min, self.t_max, num_points))
@@ -197,9 +197,12 @@ if __name__ == "__main__":
     # Real data expected columns: 'Timestamp (ms)', 'GPS SPEED', 'RPM PRIM'
     real_df = pd.read_csv("./src/validation/real_data.csv")
 
-    # Simulated data expected columns: 'time', 'car_velocity', 'car_position', 'shift_distance',
-    # 'engine_angular_position', 'secondary_angular_position', 'engine_angular_velocity'
-    sim_df = pd.read_csv("./front_end_output.csv")
+    # Simulated data: only the columns compared, parsed straight as floats
+    sim_df = pd.read_csv(
+        "./front_end_output.csv",
+        usecols=["time", "car_velocity", "car_position", "engine_angular_velocity"],
+        dtype=float,
+    )
 
     # Preprocess real data: adjust the time column.
     real_df["time_s"] = (
@@ -0,0 +1,188 @@
+import unittest
+import numpy as np
+
+from simulations.batch_simulation import BatchCvtSimulator
+from simulations.load_simulation import LoadSimulator
+from simulations.engine_simulation import EngineSimulator
+from simulations.primary_pulley import PrimaryPulley
+from simulations.secondary_pulley import SecondaryPulley
+from simulations.belt_simulator import BeltSimulator
+from simulations.cvt_shift import CvtShift
+from constants.engine_specs import torque_curve
+from constants.car_specs import ENGINE_INERTIA, GEARBOX_RATIO, MAX_SHIFT, WHEEL_RADIUS
+from main import SimulationOptions, run_simulation
+from utils.argument_parser import SimulationArgs
+from utils.conversions import deg_to_rad
+from utils.simulation_result import SimulationResult
+from utils.solvers import SolverSettings
+from utils.system_state import SystemState
+from utils.theoretical_models import TheoreticalModels as tm
+
+
+def make_args(**overrides):
+    args = {
+        "flyweight_mass": 0.6,
+        "primary_ramp_geometry": 1.0,
+        "primary_spring_rate": 60,
+        "primary_spring_pretension": 0.2,
+        "secondary_helix_geometry": 1.0,
+        "secondary_torsion_spring_rate": 30,
+        "secondary_compression_spring_rate": 1,
+        "secondary_rotational_spring_pretension": 45,
+        "secondary_linear_spring_pretension": 0.1,
+        "vehicle_weight": 225.0,
+        "driver_weight": 75.0,
+        "traction": 100.0,
+        "angle_of_incline": 0.0,
+        "total_distance": 200.0,
+    }
+    args.update(overrides)
+    return SimulationArgs(**args)
+
+
+def scalar_derivatives(args, state):
+    engine_simulator = EngineSimulator(
+        torque_curve=torque_curve, inertia=ENGINE_INERTIA
+    )
+    load_simulator = LoadSimulator(
+        car_mass=args.vehicle_weight + args.driver_weight,
+        incline_angle=deg_to_rad(args.angle_of_incline),
+    )
+    cvt_shift = CvtShift(
+        engine_simulator,
+        PrimaryPulley(
+            spring_coeff_comp=args.primary_spring_rate,
+            initial_compression=args.primary_spring_pretension,
+            flyweight_mass=args.flyweight_mass,
+            ramp_type=args.primary_ramp_geometry,
+        ),
+        SecondaryPulley(
+            spring_coeff_tors=args.secondary_torsion_spring_rate,
+            spring_coeff_comp=args.secondary_compression_spring_rate,
+            initial_rotation=deg_to_rad(args.secondary_rotational_spring_pretension),
+            initial_compression=args.secondary_linear_spring_pretension,
+            ramp_type=args.secondary_helix_geometry,
+        ),
+        BeltSimulator(primary=True),
+        BeltSimulator(primary=False),
+    )
+    cvt_ratio = tm.current_cvt_ratio(state.shift_distance)
+    engine_velocity = state.car_velocity * cvt_ratio * GEARBOX_RATIO / WHEEL_RADIUS
+    car_acceleration = load_simulator.calculate_acceleration(
+        state.car_velocity, engine_simulator.get_power(engine_velocity)
+    )
+    shift_acceleration = cvt_shift.calculate_shift_acceleration(state)
+    return [
+        car_acceleration,
+        state.car_velocity,
+        shift_acceleration,
+        state.shift_velocity,
+    ]
+
+
+class TestBatchCvtSimulator(unittest.TestCase):
+
+    def setUp(self):
+        self.args_list = [
+            make_args(flyweight_mass=0.5),
+            make_args(flyweight_mass=0.7, primary_ramp_geometry=2.0),
+            make_args(primary_spring_rate=80, secondary_helix_geometry=2.0),
+            make_args(angle_of_incline=5.0),
+        ]
+        # Exact ramps, like the scalar model of scalar_derivatives
+        self.simulator = BatchCvtSimulator(
+            self.args_list, total_sim_time=0.02, num_points=5, ramp_resolution=None
+        )
+
+    def test_requires_arguments(self):
+        with self.assertRaises(ValueError):
+            BatchCvtSimulator([])
+
+    def test_requires_rk45(self):
+        with self.assertRaises(ValueError):
+            BatchCvtSimulator(
+                self.args_list, phase1_solver=SolverSettings(method="Radau")
+            )
+
+    def test_groups_by_ramp_geometry(self):
+        self.assertEqual(len(self.simulator.groups), 3)
+        lanes = np.sort(np.concatenate([g.lanes for g in self.simulator.groups]))
+        np.testing.assert_array_equal(lanes, np.arange(len(self.args_list)))
+
+    def test_evaluate_matches_scalar_model(self):
+        state = np.array(
+            [
+                [4.0, 6.0, 8.0, 5.0],
+                [1.0, 2.0, 3.0, 4.0],
+                [0.01, -0.02, 0.0, 0.03],
+                [0.005, 0.01, 0.015, 0.02],
+            ]
+        )
+        derivatives = self.simulator.evaluate(state)
+        for lane, args in enumerate(self.args_list):
+            expected = scalar_derivatives(args, SystemState.from_array(state[:, lane]))
+            np.testing.assert_allclose(derivatives[:, lane], expected, rtol=1e-10)
+
+    def test_pinned_lanes_hold_shift(self):
+        self.simulator.pinned_at[:] = 0.0
+        state = np.tile([[5.0], [1.0], [0.0], [0.0]], (1, len(self.args_list)))
+        derivatives = self.simulator.evaluate(state)
+        np.testing.assert_array_equal(derivatives[2:], 0)
+        np.testing.assert_array_equal(derivatives[1], 5.0)
+
+    def test_stopped_lanes_do_not_move(self):
+        self.simulator.stopped[1] = True
+        state = np.tile([[0.0], [1.0], [0.01], [0.02]], (1, len(self.args_list)))
+        derivatives = self.simulator.evaluate(state)
+        np.testing.assert_array_equal(derivatives[:, 1], 0)
+
+    def test_run_returns_result_per_lane(self):
+        results = self.simulator.run()
+        self.assertEqual(len(results), len(self.args_list))
+        for result in results:
+            self.assertIsInstance(result, SimulationResult)
+            self.assertEqual(len(result.time), len(result.states))
+            self.assertGreater(result.states[-1].car_position, 0)
+        self.assertEqual(self.simulator.full_shift_time.shape, (len(self.args_list),))
+
+
+class TestBatchMatchesScalarRun(unittest.TestCase):
+
+    def test_lanes_follow_run_simulation_to_full_shift(self):
+        total_sim_time = 4.5
+        args_list = [make_args(flyweight_mass=0.7), make_args(flyweight_mass=0.65)]
+        # The time grid of main.integrate while the shift is free
+        simulator = BatchCvtSimulator(
+            args_list, total_sim_time=total_sim_time, num_points=10000
+        )
+        results = simulator.run()
+
+        for lane, args in enumerate(args_list):
+            expected = run_simulation(
+                args, options=SimulationOptions(total_sim_time=total_sim_time)
+            )
+            result = results[lane]
+            self.assertEqual(
+                [c.pinned_at for c in result.checkpoints],
+                [c.pinned_at for c in expected.checkpoints],
+            )
+            self.assertEqual(result.checkpoints[-1].pinned_at, MAX_SHIFT)
+            self.assertEqual(
+                simulator.full_shift_time[lane], result.checkpoints[-1].time
+            )
+            # Reaching full shift is sensitive to rounding, its time less exact
+            np.testing.assert_allclose(
+                [c.time for c in result.checkpoints],
+                [c.time for c in expected.checkpoints],
+                atol=0.05,
+            )
+            for column, atol in (("car_velocity", 1e-3), ("shift_distance", 1e-4)):
+                np.testing.assert_allclose(
+                    np.interp(expected.time, result.time, getattr(result, column)),
+                    getattr(expected, column),
+                    atol=atol,
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import numpy as np
+
+from simulations.belt_simulator import BeltSimulator
+from simulations.cvt_shift import CvtShift
+from simulations.engine_simulation import EngineSimulator
+from simulations.primary_pulley import PrimaryPulley
+from simulations.secondary_pulley import SecondaryPulley
+from constants.engine_specs import torque_curve
+from constants.car_specs import ENGINE_INERTIA, MAX_SHIFT
+from utils.system_state import SystemState
+from utils.theoretical_models import TheoreticalModels as tm
+
+
+class TestCvtShift(unittest.TestCase):
+
+    def setUp(self):
+        self.cvt_shift = CvtShift(
+            EngineSimulator(torque_curve=torque_curve, inertia=ENGINE_INERTIA),
+            PrimaryPulley(
+                spring_coeff_comp=60,
+                initial_compression=0.2,
+                flyweight_mass=0.6,
+                ramp_type=1,
+            ),
+            SecondaryPulley(
+                spring_coeff_tors=30,
+                spring_coeff_comp=1,
+                initial_rotation=0.8,
+                initial_compression=0.1,
+                ramp_type=1,
+            ),
+            BeltSimulator(primary=True),
+            BeltSimulator(primary=False),
+        )
+
+    def test_snapshot(self):
+        state = SystemState(car_velocity=5.0, shift_distance=MAX_SHIFT + 0.001)
+        snapshot = self.cvt_shift.snapshot(state)
+
+        self.assertEqual(snapshot.shift_distance, state.shift_distance)
+        self.assertEqual(snapshot.ramp_distance, MAX_SHIFT)
+        self.assertAlmostEqual(
+            snapshot.cvt_ratio, tm.current_cvt_ratio(state.shift_distance)
+        )
+        self.assertAlmostEqual(
+            snapshot.engine_power,
+            self.cvt_shift.engine_simulator.get_power(snapshot.engine_velocity),
+        )
+
+    def test_pulley_forces_match_components(self):
+        for shift_distance in [0.0, 0.01, MAX_SHIFT]:
+            state = SystemState(car_velocity=6.0, shift_distance=shift_distance)
+            snapshot = self.cvt_shift.snapshot(state)
+            forces = self.cvt_shift.get_pulley_forces(state, snapshot)
+
+            primary_force = self.cvt_shift.primary_simulator.calculate_net_force(
+                shift_distance, snapshot.engine_velocity
+            )
+            secondary_force = self.cvt_shift.secondary_simulator.calculate_net_force(
+                snapshot.engine_torque * snapshot.cvt_ratio, shift_distance
+            )
+            secondary_radial = self.cvt_shift.secondary_belt.calculate_radial_force(
+                snapshot.engine_velocity,
+                shift_distance,
+                snapshot.geometry.secondary_wrap_angle,
+                secondary_force,
+            )
+            self.assertAlmostEqual(forces["primary_force"], primary_force)
+            self.assertAlmostEqual(forces["secondary_force"], secondary_force)
+            self.assertAlmostEqual(forces["secondary_radial"], secondary_radial)
+
+    def test_partial_derivatives_match_finite_differences(self):
+        def evaluate(car_velocity, shift_distance):
+            state = SystemState(
+                car_velocity=car_velocity,
+                shift_velocity=0.01,
+                shift_distance=shift_distance,
+            )
+            snapshot = self.cvt_shift.snapshot(state)
+            return np.array(
+                [
+                    snapshot.engine_power,
+                    self.cvt_shift.calculate_shift_acceleration(state, snapshot),
+                ]
+            )
+
+        for car_velocity, shift_distance in [(4.0, 0.002), (6.0, 0.01), (12.0, 0.02)]:
+            state = SystemState(
+                car_velocity=car_velocity,
+                shift_velocity=0.01,
+                shift_distance=shift_distance,
+            )
+            partials = self.cvt_shift.get_partial_derivatives(state)
+            analytic = np.array(
+                [partials["engine_power"], partials["shift_acceleration"]]
+            )
+
+            velocity_step = 1e-6 * car_velocity
+            distance_step = 1e-8
+            by_velocity = (
+                evaluate(car_velocity + velocity_step, shift_distance)
+                - evaluate(car_velocity - velocity_step, shift_distance)
+            ) / (2 * velocity_step)
+            by_distance = (
+                evaluate(car_velocity, shift_distance + distance_step)
+                - evaluate(car_velocity, shift_distance - distance_step)
+            ) / (2 * distance_step)
+
+            np.testing.assert_allclose(analytic[:, 0], by_velocity, rtol=1e-5)
+            np.testing.assert_array_equal(analytic[:, 1], 0)
+            np.testing.assert_allclose(analytic[:, 2], by_distance, rtol=1e-5)
+
+    def test_shift_acceleration_without_snapshot(self):
+        state = SystemState(car_velocity=6.0, shift_velocity=0.01, shift_distance=0.01)
+        self.assertEqual(
+            self.cvt_shift.calculate_shift_acceleration(state),
+            self.cvt_shift.calculate_shift_acceleration(
+                state, self.cvt_shift.snapshot(state)
+            ),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,292 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from main import SimulationOptions, get_main_arguments, run_simulation
+from simulations.drivetrain import build_drivetrain
+from constants.car_specs import MAX_SHIFT
+from utils.argument_parser import default_arguments
+from utils.baked_ramp import BakedRamp
+from utils.print_progress import read_progress
+from utils.conversions import deg_to_rad
+from utils.simulation_result import SimulationResult
+from utils.solvers import SolverSettings
+
+
+class TestBuildDrivetrain(unittest.TestCase):
+
+    def test_configures_simulators_from_arguments(self):
+        args = default_arguments()
+        drivetrain = build_drivetrain(args)
+
+        self.assertEqual(
+            drivetrain.load_simulator.car_mass,
+            args.vehicle_weight + args.driver_weight,
+        )
+        self.assertEqual(
+            drivetrain.primary_simulator.flyweight_mass, args.flyweight_mass
+        )
+        self.assertEqual(
+            drivetrain.secondary_simulator.initial_rotation,
+            deg_to_rad(args.secondary_rotational_spring_pretension),
+        )
+        self.assertIs(
+            drivetrain.cvt_shift.engine_simulator, drivetrain.engine_simulator
+        )
+        self.assertIs(
+            drivetrain.cvt_shift.primary_simulator, drivetrain.primary_simulator
+        )
+
+    def test_ramp_resolution_bakes_ramps(self):
+        drivetrain = build_drivetrain(default_arguments(), ramp_resolution=16)
+        self.assertIsInstance(drivetrain.primary_simulator.ramp, BakedRamp)
+        self.assertIsInstance(drivetrain.secondary_simulator.ramp, BakedRamp)
+
+    def test_array_arguments(self):
+        args = default_arguments()
+        args.flyweight_mass = np.array([0.4, 0.6])
+        drivetrain = build_drivetrain(args)
+        np.testing.assert_array_equal(
+            drivetrain.primary_simulator.flyweight_mass, [0.4, 0.6]
+        )
+
+
+class TestRunSimulation(unittest.TestCase):
+
+    def test_runs_without_side_effects(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cwd = os.getcwd()
+            os.chdir(directory)
+            try:
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    result = run_simulation(
+                        default_arguments(),
+                        options=SimulationOptions(total_sim_time=0.05),
+                    )
+                self.assertEqual(os.listdir(directory), [])
+            finally:
+                os.chdir(cwd)
+
+        self.assertEqual(output.getvalue(), "")
+        self.assertIsInstance(result, SimulationResult)
+        self.assertAlmostEqual(result.time[-1], 0.05)
+        self.assertGreater(result.states[-1].car_position, 0)
+
+    def test_implicit_methods_match_explicit(self):
+        # Long enough for the shift to be released from its engaged end-stop
+        explicit = run_simulation(
+            default_arguments(), options=SimulationOptions(total_sim_time=0.3)
+        )
+        self.assertGreater(explicit.states[-1].shift_distance, 0)
+
+        for method in ["Radau", "BDF"]:
+            implicit = run_simulation(
+                default_arguments(),
+                options=SimulationOptions(
+                    total_sim_time=0.3,
+                    phase1_solver=SolverSettings(method, rtol=1e-4, atol=1e-6),
+                ),
+            )
+            self.assertAlmostEqual(implicit.time[-1], 0.3)
+            self.assertAlmostEqual(
+                implicit.states[-1].car_velocity,
+                explicit.states[-1].car_velocity,
+                places=4,
+            )
+            self.assertAlmostEqual(
+                implicit.states[-1].shift_distance,
+                explicit.states[-1].shift_distance,
+                delta=2e-5,
+            )
+
+    def test_shift_stays_between_end_stops(self):
+        result = run_simulation(
+            default_arguments(), options=SimulationOptions(total_sim_time=0.3)
+        )
+        shift_distance = np.array([state.shift_distance for state in result.states])
+        self.assertGreaterEqual(shift_distance.min(), 0)
+        self.assertLessEqual(shift_distance.max(), MAX_SHIFT)
+        # The shift rests against the engaged end-stop until it is released
+        self.assertEqual(shift_distance[0], 0)
+        self.assertEqual(result.states[0].shift_velocity, 0)
+
+    def test_dense_output_matches_fixed_samples(self):
+        sampled = run_simulation(
+            default_arguments(), options=SimulationOptions(total_sim_time=0.3)
+        )
+        dense = run_simulation(
+            default_arguments(),
+            options=SimulationOptions(total_sim_time=0.3, dense_output=True),
+        )
+        # The run is stored at the steps of the solver, which are far fewer
+        self.assertLess(len(dense.time), len(sampled.time))
+        np.testing.assert_allclose(
+            dense.trajectory(sampled.time),
+            np.array([state.to_array() for state in sampled.states]).T,
+            atol=1e-12,
+        )
+        self.assertEqual(len(dense.resample(50).time), 50)
+        with self.assertRaises(ValueError):
+            sampled.resample(50)
+
+    def test_writes_requested_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "output.csv")
+            run_simulation(
+                default_arguments(),
+                options=SimulationOptions(total_sim_time=0.05, output_path=path),
+            )
+            self.assertTrue(os.path.exists(path))
+
+    def test_writes_binary_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "output.npy")
+            result = run_simulation(
+                default_arguments(),
+                options=SimulationOptions(total_sim_time=0.05, output_path=path),
+            )
+            read_back = SimulationResult.from_npy(path, mmap=False)
+        np.testing.assert_array_equal(read_back.y, result.y)
+
+    def test_writes_formatted_output_from_memory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "front_end_output.csv")
+            result = run_simulation(
+                default_arguments(),
+                options=SimulationOptions(
+                    total_sim_time=0.05, formatted_output_path=path
+                ),
+            )
+            self.assertEqual(os.listdir(directory), ["front_end_output.csv"])
+            df = pd.read_csv(path)
+        self.assertEqual(len(df), len(result.time))
+        self.assertIn("engine_angular_velocity", df.columns)
+
+    def test_streams_the_same_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            written = os.path.join(directory, "written.csv")
+            streamed = os.path.join(directory, "streamed.csv")
+            run_simulation(
+                default_arguments(),
+                options=SimulationOptions(total_sim_time=0.3, output_path=written),
+            )
+            result = run_simulation(
+                default_arguments(),
+                options=SimulationOptions(
+                    total_sim_time=0.3,
+                    output_path=streamed,
+                    formatted_output_path=os.path.join(directory, "front.npy"),
+                    stream_chunk_size=100,
+                ),
+            )
+            with open(written) as file:
+                expected = file.read()
+            with open(streamed) as file:
+                self.assertEqual(file.read(), expected)
+            formatted = SimulationResult.from_npy(
+                os.path.join(directory, "front.npy"), mmap=False
+            )
+        np.testing.assert_array_equal(formatted.y, result.y)
+
+    def test_publishes_progress(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cwd = os.getcwd()
+            os.chdir(directory)
+            try:
+                run_simulation(
+                    default_arguments(),
+                    options=SimulationOptions(
+                        total_sim_time=0.05, progress_run_id="test"
+                    ),
+                )
+                status = read_progress("test")
+            finally:
+                os.chdir(cwd)
+        self.assertEqual(status["state"], "finished")
+        self.assertAlmostEqual(status["sim_time"], 0.05)
+        self.assertGreater(status["nfev"], 0)
+
+    def test_result_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            options = SimulationOptions(total_sim_time=0.05, result_cache_dir=directory)
+            simulated = run_simulation(default_arguments(), options=options)
+            self.assertEqual(len(os.listdir(directory)), 2)
+            cached = run_simulation(default_arguments(), options=options)
+            np.testing.assert_array_equal(cached.y, simulated.y)
+            self.assertEqual(cached.solver_stats, simulated.solver_stats)
+
+            # Dense output keeps interpolants, so it is always simulated
+            dense = run_simulation(
+                default_arguments(),
+                options=SimulationOptions(
+                    total_sim_time=0.05, result_cache_dir=directory, dense_output=True
+                ),
+            )
+            self.assertIsNotNone(dense.trajectory)
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+    def test_resumes_from_checkpoints(self):
+        options = SimulationOptions(total_sim_time=1.0)
+        full = run_simulation(default_arguments(), options=options)
+        self.assertGreater(len(full.checkpoints), 0)
+        for checkpoint in full.checkpoints:
+            resumed = run_simulation(
+                default_arguments(),
+                options=SimulationOptions(total_sim_time=1.0, resume_from=checkpoint),
+            )
+            # The remainder of the run is reproduced exactly
+            start = np.searchsorted(full.time, checkpoint.time, side="right")
+            np.testing.assert_array_equal(resumed.time, full.time[start:])
+            np.testing.assert_array_equal(resumed.y, full.y[:, start:])
+
+    def test_quasi_static_follows_dynamic_model(self):
+        dynamic = run_simulation(
+            default_arguments(), options=SimulationOptions(total_sim_time=2.0)
+        )
+        quasi_static = run_simulation(
+            default_arguments(),
+            options=SimulationOptions(total_sim_time=2.0, quasi_static=True),
+        )
+        self.assertEqual(quasi_static.y.shape, (4, 1000))
+        self.assertEqual(list(quasi_static.solver_stats), ["quasi_static"])
+        for name, tolerance in [("car_velocity", 0.05), ("shift_distance", 0.005)]:
+            np.testing.assert_allclose(
+                np.interp(dynamic.time, quasi_static.time, getattr(quasi_static, name)),
+                getattr(dynamic, name),
+                atol=tolerance,
+            )
+        with self.assertRaises(ValueError):
+            run_simulation(
+                default_arguments(),
+                options=SimulationOptions(
+                    total_sim_time=0.1, quasi_static=True, dense_output=True
+                ),
+            )
+
+    def test_main_arguments(self):
+        args, main_options = get_main_arguments(["--flyweight_mass", "0.5"])
+        self.assertEqual(args.flyweight_mass, 0.5)
+        self.assertEqual(main_options.output, "both")
+        self.assertFalse(main_options.binary)
+        self.assertIsNone(main_options.stream)
+        _, main_options = get_main_arguments(
+            ["--output", "none", "--binary", "--stream"]
+        )
+        self.assertEqual(main_options.output, "none")
+        self.assertTrue(main_options.binary)
+        self.assertEqual(main_options.stream, 500)
+        self.assertIsNone(main_options.run_id)
+        self.assertFalse(main_options.no_cache)
+        self.assertFalse(main_options.quasi_static)
+        _, main_options = get_main_arguments(["--no-cache", "--quasi_static"])
+        self.assertTrue(main_options.no_cache)
+        self.assertTrue(main_options.quasi_static)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+
+from simulations.drivetrain import build_drivetrain
+from simulations.quasi_static_shift import QuasiStaticShift
+from constants.car_specs import MAX_SHIFT
+from utils.argument_parser import default_arguments
+
+
+class TestQuasiStaticShift(unittest.TestCase):
+
+    def setUp(self):
+        self.shift = QuasiStaticShift(build_drivetrain(default_arguments()).cvt_shift)
+        self.friction = self.shift.cvt_shift.raw_friction
+
+    def test_friction_holds_the_shift(self):
+        # Pulled towards the engaged end-stop, at which it rests
+        self.assertLess(self.shift.net_radial_force(0.0, 2.0), -self.friction)
+        self.assertEqual(self.shift.equilibrium(2.0, 0.0), 0.0)
+        # Balanced within the friction, it stays where it is
+        held = self.shift.equilibrium(6.0, 0.0)
+        self.assertEqual(self.shift.equilibrium(6.0, held), held)
+
+    def test_moves_to_where_friction_balances(self):
+        self.assertGreater(self.shift.net_radial_force(0.01, 6.0), self.friction)
+        upshifted = self.shift.equilibrium(6.0, 0.01)
+        self.assertGreater(upshifted, 0.01)
+        self.assertAlmostEqual(
+            self.shift.net_radial_force(upshifted, 6.0), self.friction, places=3
+        )
+        downshifted = self.shift.equilibrium(6.0, MAX_SHIFT)
+        self.assertLess(downshifted, MAX_SHIFT)
+        self.assertAlmostEqual(
+            self.shift.net_radial_force(downshifted, 6.0), -self.friction, places=3
+        )
+
+    def test_stops_at_full_shift(self):
+        self.assertGreater(self.shift.net_radial_force(MAX_SHIFT, 19.0), self.friction)
+        self.assertEqual(self.shift.equilibrium(19.0, 0.01), MAX_SHIFT)
+
+    def test_arrays(self):
+        car_velocity = np.array([2.0, 6.0, 6.0, 19.0])
+        previous = np.array([0.0, MAX_SHIFT, 0.01, 0.01])
+        np.testing.assert_allclose(
+            self.shift.equilibrium(car_velocity, previous),
+            [self.shift.equilibrium(*pair) for pair in zip(car_velocity, previous)],
+            atol=1e-8,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,12 @@
 import unittest
 from unittest.mock import patch
-from utils.argument_parser import get_arguments, SimulationArgs
+from utils.argument_parser import (
+    get_arguments,
+    default_arguments,
+    parse_sweep_values,
+    expand_argument_grid,
+    SimulationArgs,
+)
 
 
 class TestArgumentParser(unittest.TestCase):
@@ -84,6 +90,37 @@ class TestArgumentParser(unittest.TestCase):
             setattr(args, key, value)
         self.assertEqual(args, SimulationArgs(**custom_args))
 
+    @patch("sys.argv", ["program_name", "--flyweight_mass", "0.9"])
+    def test_default_arguments_ignore_command_line(self):
+        self.assertEqual(default_arguments(), SimulationArgs(**self.default_args))
+
+    def test_parse_sweep_values(self):
+        self.assertEqual(parse_sweep_values(["0.5", "1"]), [0.5, 1.0])
+        self.assertEqual(parse_sweep_values(["0:1:3", "2"]), [0.0, 0.5, 1.0, 2.0])
+
+    def test_parse_sweep_values_invalid_range(self):
+        with self.assertRaises(ValueError):
+            parse_sweep_values(["0:1"])
+        with self.assertRaises(ValueError):
+            parse_sweep_values(["0:1:0"])
+
+    def test_expand_argument_grid(self):
+        base = SimulationArgs(**self.default_args)
+        grid = expand_argument_grid(
+            base, {"flyweight_mass": [0.5, 0.7], "primary_spring_rate": [50, 60, 70]}
+        )
+        self.assertEqual(len(grid), 6)
+        self.assertEqual(grid[0].flyweight_mass, 0.5)
+        self.assertEqual(grid[0].primary_spring_rate, 50)
+        self.assertEqual(grid[-1].flyweight_mass, 0.7)
+        self.assertEqual(grid[-1].primary_spring_rate, 70)
+        self.assertEqual(grid[-1].vehicle_weight, base.vehicle_weight)
+
+    def test_expand_argument_grid_unknown_field(self):
+        base = SimulationArgs(**self.default_args)
+        with self.assertRaises(ValueError):
+            expand_argument_grid(base, {"not_an_argument": [1.0]})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+import utils.baked_ramp as baked_ramp
+from utils.baked_ramp import BakedRamp, bake_ramp, ramp_cache_key
+from utils.ramp_representation import CircularSegment, LinearSegment, PiecewiseRamp
+
+
+def make_ramp(slope=-0.5):
+    ramp = PiecewiseRamp()
+    ramp.add_segment(LinearSegment(x_start=0, x_end=0.01, slope=slope))
+    ramp.add_segment(
+        CircularSegment(
+            x_start=0.01,
+            x_end=0.03,
+            radius=0.07,
+            theta_start=1,
+            theta_end=np.pi / 2 - 0.4,
+        )
+    )
+    return ramp
+
+
+class TestBakedRamp(unittest.TestCase):
+
+    def setUp(self):
+        self.ramp = make_ramp()
+        self.baked = BakedRamp.from_ramp(self.ramp, resolution=128)
+        self.cache_dir = tempfile.mkdtemp()
+        baked_ramp._baked_ramps.clear()
+
+    def test_reports_resolution_and_error(self):
+        self.assertEqual(self.baked.resolution, 128)
+        self.assertEqual(len(self.baked.x_starts), 2 * 128)
+        for name in ["height", "slope"]:
+            self.assertLess(self.baked.max_error[name], 1e-8)
+        self.assertIn("128 per segment", str(self.baked))
+
+    def test_matches_ramp(self):
+        x = np.linspace(0, 0.03, 997)
+        np.testing.assert_allclose(
+            self.baked.height_array(x), self.ramp.height_array(x), atol=1e-10
+        )
+        np.testing.assert_allclose(
+            self.baked.slope_array(x), self.ramp.slope_array(x), atol=1e-8
+        )
+        for value in x[::50]:
+            self.assertAlmostEqual(self.baked.slope(value), self.ramp.slope(value))
+
+    def test_derivatives_match_ramp(self):
+        x = np.linspace(0.001, 0.029, 57)
+        np.testing.assert_allclose(
+            self.baked.height_derivative(x),
+            [self.ramp.height_derivative(value) for value in x],
+            atol=1e-6,
+        )
+        np.testing.assert_allclose(
+            self.baked.slope_derivative(x),
+            [self.ramp.slope_derivative(value) for value in x],
+            rtol=1e-4,
+        )
+        self.assertAlmostEqual(
+            self.baked.slope_derivative(0.02), self.ramp.slope_derivative(0.02), 3
+        )
+
+    def test_keeps_segment_boundaries(self):
+        # The slope jumps between segments, the earlier segment wins
+        self.assertAlmostEqual(self.baked.slope(0.01), 0.5)
+        self.assertAlmostEqual(self.baked.slope(0.0100001), self.ramp.slope(0.0100001))
+
+    def test_out_of_range(self):
+        with self.assertRaises(ValueError):
+            self.baked.height(0.031)
+        with self.assertRaises(ValueError):
+            self.baked.slope_array(np.array([-0.001, 0.0]))
+
+    def test_cache_key(self):
+        self.assertEqual(
+            ramp_cache_key(make_ramp(), 64), ramp_cache_key(make_ramp(), 64)
+        )
+        self.assertNotEqual(
+            ramp_cache_key(make_ramp(), 64), ramp_cache_key(make_ramp(), 128)
+        )
+        self.assertNotEqual(
+            ramp_cache_key(make_ramp(), 64), ramp_cache_key(make_ramp(-0.4), 64)
+        )
+
+    def test_disk_cache(self):
+        baked = bake_ramp(self.ramp, 64, cache_dir=self.cache_dir)
+        self.assertIs(bake_ramp(self.ramp, 64, cache_dir=self.cache_dir), baked)
+        files = os.listdir(self.cache_dir)
+        self.assertEqual(files, [f"{ramp_cache_key(self.ramp, 64)}.npz"])
+
+        # A new process finds the table on disk
+        baked_ramp._baked_ramps.clear()
+        loaded = bake_ramp(self.ramp, 64, cache_dir=self.cache_dir)
+        self.assertIsNot(loaded, baked)
+        np.testing.assert_array_equal(loaded.coefficients, baked.coefficients)
+        self.assertEqual(loaded.max_error, baked.max_error)
+
+    def test_unreadable_cache_is_rebuilt(self):
+        path = os.path.join(self.cache_dir, f"{ramp_cache_key(self.ramp, 32)}.npz")
+        with open(path, "w") as file:
+            file.write("not a table")
+        baked = bake_ramp(self.ramp, 32, cache_dir=self.cache_dir)
+        self.assertEqual(baked.resolution, 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
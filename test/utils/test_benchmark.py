@@ -0,0 +1,81 @@
+import unittest
+
+from benchmark import (
+    SolverRun,
+    compare_with_default,
+    measure_startup,
+    parse_import_time,
+    run_quasi_static_benchmark,
+    run_solver_benchmark,
+)
+
+IMPORT_TIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     numpy
+import time:       300 |        400 |   utils.system_state
+import time:       500 |       1000 | main
+"""
+
+
+class TestStartupBenchmark(unittest.TestCase):
+
+    def test_parse_import_time(self):
+        seconds, imported = parse_import_time(IMPORT_TIME_OUTPUT, "main")
+        self.assertAlmostEqual(seconds, 0.001)
+        self.assertEqual(imported, {"numpy", "utils.system_state", "main"})
+
+    def test_parse_import_time_requires_module(self):
+        with self.assertRaises(ValueError):
+            parse_import_time(IMPORT_TIME_OUTPUT, "sweep")
+
+    def test_main_imports_lazily(self):
+        result = measure_startup("main", repeats=1)
+        self.assertEqual(result.eager_modules, [])
+        self.assertGreater(result.seconds, 0)
+
+
+class TestSolverBenchmark(unittest.TestCase):
+
+    def test_reports_each_method(self):
+        runs = run_solver_benchmark(
+            ["RK45", "RK4"], ["default"], total_sim_time=0.005, measure_memory=False
+        )
+        self.assertEqual([run.method for run in runs], ["RK45", "RK4"])
+        for run in runs:
+            self.assertEqual(run.final_time, 0.005)
+            self.assertTrue(run.completed)
+            self.assertGreater(run.nfev, 0)
+            self.assertLess(run.velocity_error, 1e-3)
+
+    def test_compares_with_rk45(self):
+        def run(tuning, method, wall_time, nfev, completed=True):
+            return SolverRun(
+                tuning, method, wall_time, nfev, 0, 1.0, completed, 0.0, 0.0, 0.0
+            )
+
+        runs = [
+            run("default", "RK45", 1.0, 100),
+            run("default", "Radau", 4.0, 300),
+            run("default", "LSODA", 0.1, 10, completed=False),
+            run("incline", "RK45", 3.0, 100),
+            run("incline", "Radau", 4.0, 500),
+        ]
+        # The incomplete run is not compared
+        ((method, time_ratio, nfev_ratio),) = compare_with_default(runs)
+        self.assertEqual(method, "Radau")
+        self.assertAlmostEqual(time_ratio, 2.0)
+        self.assertAlmostEqual(nfev_ratio, 4.0)
+
+
+class TestQuasiStaticBenchmark(unittest.TestCase):
+
+    def test_reports_accuracy(self):
+        (run,) = run_quasi_static_benchmark(["default"], total_sim_time=0.5)
+        self.assertEqual(run.tuning, "default")
+        self.assertGreater(run.speedup, 0)
+        self.assertLess(run.velocity_error, 0.05)
+        self.assertLess(run.shift_distance_error, 0.005)
+        self.assertLessEqual(run.engine_speed_rms_error, run.engine_speed_error)
+
+
+if __name__ == "__main__":
+    unittest.main()
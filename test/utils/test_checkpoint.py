@@ -0,0 +1,28 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from utils.checkpoint import Checkpoint, load_checkpoints, save_checkpoints
+
+
+class TestCheckpoints(unittest.TestCase):
+
+    def test_round_trip(self):
+        checkpoints = [
+            Checkpoint(0.1, np.array([0.3, 1 / 3, 0.0, 0.0]), 0.0),
+            Checkpoint(4.7304, np.array([1e-17, 2.5, 0.0253, -0.1]), None),
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "checkpoints.json")
+            save_checkpoints(filename, checkpoints)
+            loaded = load_checkpoints(filename)
+        self.assertEqual(len(loaded), len(checkpoints))
+        for read_back, checkpoint in zip(loaded, checkpoints):
+            self.assertEqual(read_back.time, checkpoint.time)
+            np.testing.assert_array_equal(read_back.y, checkpoint.y)
+            self.assertEqual(read_back.pinned_at, checkpoint.pinned_at)
+
+
+if __name__ == "__main__":
+    unittest.main()
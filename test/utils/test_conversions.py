@@ -1,5 +1,6 @@
 import unittest
 import math
+import numpy as np
 
 from utils.conversions import (
     rpm_to_rad_s,
@@ -8,6 +9,7 @@ from utils.conversions import (
     deg_to_rad,
     circumference,
     inch_to_meter,
+    meter_s_to_km_h,
 )
 
 
@@ -43,6 +45,11 @@ class TestConversions(unittest.TestCase):
         self.assertAlmostEqual(inch_to_meter(0), 0)
         self.assertAlmostEqual(inch_to_meter(10), 0.254)
 
+    def test_arrays(self):
+        np.testing.assert_allclose(rad_s_to_rpm(np.array([0, 2 * math.pi])), [0, 60])
+        np.testing.assert_allclose(meter_s_to_km_h(np.array([1.0, 10.0])), [3.6, 36])
+        np.testing.assert_allclose(rad_to_deg(np.array([math.pi, 0])), [180, 0])
+
 
 if __name__ == "__main__":
     unittest.main()
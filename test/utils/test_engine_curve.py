@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+from scipy.interpolate import interp1d
+
+from utils.engine_curve import EngineCurve
+
+
+class TestEngineCurve(unittest.TestCase):
+
+    def setUp(self):
+        self.x = [250.0, 270.0, 295.0, 315.0, 335.0, 355.0, 375.0, 420.0]
+        self.y = [25.1, 24.5, 23.6, 22.5, 20.9, 19.7, 18.3, 0.0]
+        self.curve = EngineCurve(self.x, self.y)
+        self.reference = interp1d(
+            self.x, self.y, kind="cubic", fill_value="extrapolate"
+        )
+
+    def test_matches_interp1d(self):
+        # Includes extrapolation on both sides of the data
+        x = np.linspace(150, 500, 1001)
+        np.testing.assert_allclose(self.curve(x), self.reference(x), atol=1e-9)
+
+    def test_scalar_returns_float(self):
+        for x in [150.0, 250.0, 300, np.float64(333.3), 420.0, 500.0]:
+            value = self.curve(x)
+            self.assertIsInstance(value, float)
+            self.assertAlmostEqual(value, float(self.reference(x)), places=9)
+
+    def test_derivative_matches_finite_differences(self):
+        x = np.linspace(200, 450, 101)
+        step = 1e-4
+        expected = (self.curve(x + step) - self.curve(x - step)) / (2 * step)
+        np.testing.assert_allclose(self.curve.derivative(x), expected, atol=1e-6)
+        for value, slope in zip(x[::10], expected[::10]):
+            self.assertAlmostEqual(self.curve.derivative(float(value)), slope, places=6)
+
+    def test_passes_through_data(self):
+        for x, y in zip(self.x, self.y):
+            self.assertAlmostEqual(self.curve(x), y, places=12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from constants.car_specs import GEARBOX_RATIO, MAX_SHIFT, WHEEL_RADIUS
+from utils.binary_format import read_columns
+from utils.conversions import meter_s_to_km_h, rad_s_to_rpm, rad_to_deg
+from utils.frontend_output import FormattedSimulationResult
+from utils.theoretical_models import TheoreticalModels as tm
+
+
+class TestFormattedSimulationResult(unittest.TestCase):
+
+    def setUp(self):
+        self.time = np.linspace(0, 2, 21)
+        car_velocity = 2 + self.time
+        shift_distance = np.linspace(0, MAX_SHIFT, 21)
+        y = np.vstack([car_velocity, np.zeros(21), np.zeros(21), shift_distance])
+        self.result = FormattedSimulationResult(time=self.time, y=y)
+
+    def test_matches_per_sample_computation(self):
+        result = self.result
+        engine_angle = 0.0
+        secondary_angle = 0.0
+        for i, state in enumerate(result.states):
+            cvt_ratio = tm.current_cvt_ratio(state.shift_distance)
+            engine_velocity = (
+                state.car_velocity * cvt_ratio * GEARBOX_RATIO / WHEEL_RADIUS
+            )
+            if i > 0:
+                previous = result.states[i - 1]
+                previous_ratio = tm.current_cvt_ratio(previous.shift_distance)
+                previous_velocity = (
+                    previous.car_velocity
+                    * previous_ratio
+                    * GEARBOX_RATIO
+                    / WHEEL_RADIUS
+                )
+                dt = self.time[i] - self.time[i - 1]
+                engine_angle += (engine_velocity + previous_velocity) / 2 * dt
+                secondary_angle += (
+                    (engine_velocity / cvt_ratio + previous_velocity / previous_ratio)
+                    / 2
+                    * dt
+                )
+
+            self.assertAlmostEqual(
+                result.engine_angular_velocities[i], rad_s_to_rpm(engine_velocity)
+            )
+            self.assertAlmostEqual(
+                result.engine_angular_positions[i], rad_to_deg(engine_angle)
+            )
+            self.assertAlmostEqual(
+                result.secondary_angular_positions[i], rad_to_deg(secondary_angle)
+            )
+            self.assertAlmostEqual(
+                result.car_velocities[i], meter_s_to_km_h(state.car_velocity)
+            )
+            self.assertAlmostEqual(
+                result.shift_distance_percents[i], state.shift_distance / MAX_SHIFT
+            )
+
+    def test_empty_result(self):
+        result = FormattedSimulationResult(time=np.empty(0), y=np.empty((4, 0)))
+        self.assertEqual(result.engine_angular_positions.size, 0)
+        self.assertEqual(result.secondary_angular_positions.size, 0)
+
+    def test_write_formatted_csv(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "front_end_output.csv")
+            self.result.write_formatted_csv(path)
+            df = pd.read_csv(path)
+        self.assertEqual(
+            list(df.columns),
+            [
+                "time",
+                "car_velocity",
+                "car_position",
+                "shift_distance",
+                "engine_angular_position",
+                "secondary_angular_position",
+                "engine_angular_velocity",
+            ],
+        )
+        self.assertEqual(len(df), len(self.time))
+
+    def test_write_formatted_npy(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "front_end_output.npy")
+            self.result.write_formatted_npy(path)
+            data, header = read_columns(path)
+            self.assertEqual(header["units"]["engine_angular_velocity"], "rpm")
+            np.testing.assert_array_equal(
+                data[header["columns"].index("engine_angular_velocity")],
+                self.result.engine_angular_velocities,
+            )
+
+            read_back = FormattedSimulationResult.from_npy(path)
+            np.testing.assert_array_equal(read_back.y, self.result.y)
+            np.testing.assert_array_equal(
+                read_back.engine_angular_positions,
+                self.result.engine_angular_positions,
+            )
+            del data, read_back
+
+
+if __name__ == "__main__":
+    unittest.main()
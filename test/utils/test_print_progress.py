@@ -0,0 +1,106 @@
+import io
+import os
+import tempfile
+import unittest
+
+from utils.print_progress import (
+    ProgressChannel,
+    ProgressReporter,
+    progress_path,
+    read_progress,
+)
+
+
+class TestProgressReporter(unittest.TestCase):
+
+    def test_throttles_writes(self):
+        stream = io.StringIO()
+        reporter = ProgressReporter(total_time=10, interval=60, stream=stream)
+        for t in [1, 2, 3, 4]:
+            reporter.update(t)
+        # Only the first update falls outside the interval
+        self.assertEqual(stream.getvalue().count("Progress"), 1)
+        self.assertIn("10.0%", stream.getvalue())
+
+    def test_reports_furthest_time(self):
+        stream = io.StringIO()
+        reporter = ProgressReporter(total_time=10, interval=0, stream=stream)
+        reporter.update(5)
+        reporter.update(2)  # A rejected trial step
+        self.assertEqual(reporter.sim_time, 5)
+        self.assertTrue(
+            stream.getvalue().endswith("50.0% [" + "=" * 25 + " " * 25 + "]")
+        )
+
+    def test_wrap(self):
+        stream = io.StringIO()
+        reporter = ProgressReporter(total_time=10, stream=stream)
+        wrapped = reporter.wrap(lambda t, y: [t, y])
+        self.assertEqual(wrapped(4, 1), [4, 1])
+        self.assertEqual(reporter.sim_time, 4)
+        reporter.finish()
+        self.assertTrue(stream.getvalue().endswith("]\n"))
+
+    def test_status(self):
+        reporter = ProgressReporter(total_time=10, stream=io.StringIO())
+        self.assertIsNone(reporter.status()["eta"])
+        wrapped = reporter.wrap(lambda t, y: y)
+        for t in [1, 2, 5]:
+            wrapped(t, 0)
+        status = reporter.status()
+        self.assertEqual(status["state"], "running")
+        self.assertEqual(status["sim_time"], 5)
+        self.assertEqual(status["percent"], 50)
+        self.assertEqual(status["nfev"], 3)
+        self.assertAlmostEqual(status["eta"], status["wall_time"], delta=1e-3)
+        self.assertEqual(reporter.status("finished")["eta"], 0)
+
+
+class TestProgressChannel(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_publishes_per_run(self):
+        directory = self.directory.name
+        first = ProgressChannel("first", directory)
+        second = ProgressChannel("second", directory)
+        self.assertIsNone(read_progress("first", directory))
+
+        first.publish({"percent": 10.0})
+        second.publish({"percent": 20.0})
+        first.publish({"percent": 30.0}, final=True)
+        self.assertEqual(
+            read_progress("first", directory), {"run_id": "first", "percent": 30.0}
+        )
+        self.assertEqual(read_progress("second", directory)["percent"], 20.0)
+        # Only the status files are left behind
+        self.assertEqual(
+            sorted(os.listdir(directory)),
+            ["progress_first.json", "progress_second.json"],
+        )
+
+    def test_rejects_run_ids_that_are_not_file_names(self):
+        with self.assertRaises(ValueError):
+            progress_path("../run")
+
+    def test_reporter_publishes_status(self):
+        channel = ProgressChannel("run", self.directory.name)
+        stream = io.StringIO()
+        reporter = ProgressReporter(
+            total_time=10, interval=0, stream=stream, channel=channel, show=False
+        )
+        reporter.wrap(lambda t, y: y)(4, 0)
+        self.assertEqual(read_progress("run", self.directory.name)["sim_time"], 4)
+        reporter.finish()
+        status = read_progress("run", self.directory.name)
+        self.assertEqual(status["state"], "finished")
+        self.assertEqual(status["nfev"], 1)
+        self.assertEqual(stream.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+
+from utils.ramp_representation import CircularSegment, LinearSegment, PiecewiseRamp
+
+
+class TestPiecewiseRamp(unittest.TestCase):
+
+    def setUp(self):
+        self.ramp = PiecewiseRamp()
+        self.ramp.add_segment(LinearSegment(x_start=0, x_end=0.01, slope=-0.5))
+        self.ramp.add_segment(
+            CircularSegment(
+                x_start=0.01,
+                x_end=0.03,
+                radius=0.07,
+                theta_start=1,
+                theta_end=np.pi / 2 - 0.4,
+            )
+        )
+
+    def test_find_segment(self):
+        self.assertIs(self.ramp.find_segment(0.0), self.ramp.segments[0])
+        # The earlier segment wins on a shared boundary
+        self.assertIs(self.ramp.find_segment(0.01), self.ramp.segments[0])
+        self.assertIs(self.ramp.find_segment(0.02), self.ramp.segments[1])
+        self.assertIs(self.ramp.find_segment(0.03), self.ramp.segments[1])
+
+    def test_out_of_range(self):
+        for x in [-0.001, 0.031]:
+            with self.assertRaises(ValueError):
+                self.ramp.height(x)
+        with self.assertRaises(ValueError):
+            self.ramp.slope_array(np.array([0.0, 0.04]))
+
+    def test_continuity(self):
+        self.assertAlmostEqual(
+            self.ramp.segments[0].height(0.01), self.ramp.segments[1].height(0.01)
+        )
+
+    def test_array_matches_scalar(self):
+        x = np.linspace(0, 0.03, 301)
+        np.testing.assert_allclose(
+            self.ramp.height_array(x), [self.ramp.height(v) for v in x], rtol=1e-12
+        )
+        np.testing.assert_allclose(
+            self.ramp.slope_array(x), [self.ramp.slope(v) for v in x], rtol=1e-12
+        )
+
+    def test_derivatives_match_finite_differences(self):
+        step = 1e-7
+        for x in [0.0, 0.004, 0.015, 0.025]:
+            self.assertAlmostEqual(
+                self.ramp.height_derivative(x),
+                (self.ramp.height(x + step) - self.ramp.height(x)) / step,
+                places=5,
+            )
+            self.assertAlmostEqual(
+                self.ramp.slope_derivative(x),
+                (self.ramp.slope(x + step) - self.ramp.slope(x)) / step,
+                places=4,
+            )
+
+    def test_segments_must_be_ordered(self):
+        with self.assertRaises(ValueError):
+            self.ramp.add_segment(LinearSegment(x_start=0.005, x_end=0.02, slope=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
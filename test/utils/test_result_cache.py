@@ -0,0 +1,102 @@
+import os
+import tempfile
+import time
+import unittest
+from dataclasses import replace
+from unittest.mock import patch
+import numpy as np
+
+from utils.argument_parser import default_arguments
+from utils.checkpoint import Checkpoint
+from utils.result_cache import (
+    evict_results,
+    load_cached_result,
+    result_cache_key,
+    store_result,
+)
+from utils.simulation_result import SimulationResult
+
+SETTINGS = {"total_sim_time": 15, "ramp_resolution": 256}
+
+
+class TestResultCacheKey(unittest.TestCase):
+
+    def test_stable(self):
+        self.assertEqual(
+            result_cache_key(default_arguments(), SETTINGS),
+            result_cache_key(default_arguments(), dict(SETTINGS)),
+        )
+
+    def test_changes_with_what_the_result_depends_on(self):
+        key = result_cache_key(default_arguments(), SETTINGS)
+        tuned = replace(default_arguments(), flyweight_mass=0.61)
+        self.assertNotEqual(result_cache_key(tuned, SETTINGS), key)
+        longer = {**SETTINGS, "total_sim_time": 20}
+        self.assertNotEqual(result_cache_key(default_arguments(), longer), key)
+        with patch("constants.car_specs.GEARBOX_RATIO", 8.0):
+            self.assertNotEqual(result_cache_key(default_arguments(), SETTINGS), key)
+        with patch("utils.result_cache.MODEL_VERSION", 0):
+            self.assertNotEqual(result_cache_key(default_arguments(), SETTINGS), key)
+
+    def test_ignores_unsimulated_arguments(self):
+        key = result_cache_key(default_arguments(), SETTINGS)
+        farther = replace(default_arguments(), total_distance=100.0, traction=50.0)
+        self.assertEqual(result_cache_key(farther, SETTINGS), key)
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.directory.name, "results")
+        time_points = np.linspace(0, 1, 50)
+        self.result = SimulationResult(
+            time=time_points,
+            y=np.vstack([np.sin(time_points + i) for i in range(4)]),
+            solver_stats={"phase1": {"nfev": 10, "njev": 0, "nlu": 0}},
+            checkpoints=[
+                Checkpoint(0.25, np.array([0.1, 1.0, 0.0, 0.0]), 0.0),
+                Checkpoint(0.75, np.array([0.2, 2.0, 0.01, 0.5]), None),
+            ],
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        self.assertIsNone(load_cached_result(self.cache_dir, "missing"))
+        store_result(self.cache_dir, "key", self.result)
+        cached = load_cached_result(self.cache_dir, "key")
+        np.testing.assert_array_equal(cached.time, self.result.time)
+        np.testing.assert_array_equal(cached.y, self.result.y)
+        self.assertEqual(cached.solver_stats, self.result.solver_stats)
+        for cached_checkpoint, checkpoint in zip(
+            cached.checkpoints, self.result.checkpoints, strict=True
+        ):
+            self.assertEqual(cached_checkpoint.time, checkpoint.time)
+            np.testing.assert_array_equal(cached_checkpoint.y, checkpoint.y)
+            self.assertEqual(cached_checkpoint.pinned_at, checkpoint.pinned_at)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ["key.json", "key.npy"])
+
+    def test_evicts_least_recently_used(self):
+        for key in ["a", "b", "c"]:
+            store_result(self.cache_dir, key, self.result)
+        # Make the entries a, b and c used in that order, then use a again
+        for age, key in enumerate(["a", "b", "c"]):
+            for extension in [".npy", ".json"]:
+                path = os.path.join(self.cache_dir, key + extension)
+                os.utime(path, (time.time() - 100 + age,) * 2)
+        self.assertIsNotNone(load_cached_result(self.cache_dir, "a"))
+
+        entry_size = sum(
+            os.path.getsize(os.path.join(self.cache_dir, "a" + extension))
+            for extension in [".npy", ".json"]
+        )
+        evict_results(self.cache_dir, max_bytes=2 * entry_size)
+        self.assertIsNone(load_cached_result(self.cache_dir, "b"))
+        self.assertIsNotNone(load_cached_result(self.cache_dir, "a"))
+        self.assertIsNotNone(load_cached_result(self.cache_dir, "c"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from utils.result_stream import CsvResultStream, NpyResultStream, StepSampler
+from utils.simulation_result import COLUMN_UNITS, SimulationResult
+from utils.solvers import SolverSettings, with_step_callback
+
+
+def raw_columns(time, y):
+    return SimulationResult(time=time, y=y).columns()
+
+
+def oscillator(t, y):
+    return [-0.1 * y[0], y[0], y[3], -y[2]]
+
+
+class TestResultStream(unittest.TestCase):
+
+    def setUp(self):
+        self.time = np.linspace(0, 1, 23)
+        self.y = np.vstack([np.sin(self.time + i) for i in range(4)])
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def append_in_pieces(self, stream):
+        for start in range(0, 23, 4):
+            stream.append(self.time[start : start + 4], self.y[:, start : start + 4])
+
+    def test_csv_matches_write_csv(self):
+        with CsvResultStream(self.path("streamed.csv"), raw_columns, 5) as stream:
+            self.append_in_pieces(stream)
+        SimulationResult(time=self.time, y=self.y).write_csv(self.path("whole.csv"))
+        with open(self.path("streamed.csv")) as streamed:
+            with open(self.path("whole.csv")) as whole:
+                self.assertEqual(streamed.read(), whole.read())
+
+    def test_npy_is_readable_while_streaming(self):
+        path = self.path("streamed.npy")
+        stream = NpyResultStream(path, raw_columns, COLUMN_UNITS, chunk_size=10)
+        self.assertEqual(len(SimulationResult.from_npy(path, mmap=False).time), 0)
+
+        stream.append(self.time[:12], self.y[:, :12])
+        partial = SimulationResult.from_npy(path, mmap=False)
+        np.testing.assert_array_equal(partial.y, self.y[:, :12])
+
+        stream.append(self.time[12:], self.y[:, 12:])
+        stream.close()
+        read_back = SimulationResult.from_npy(path)
+        np.testing.assert_array_equal(read_back.time, self.time)
+        np.testing.assert_array_equal(read_back.y, self.y)
+        del read_back
+
+    def test_keeps_samples_when_the_run_fails(self):
+        path = self.path("failed.csv")
+        with self.assertRaises(RuntimeError):
+            with CsvResultStream(path, raw_columns, 100) as stream:
+                stream.append(self.time[:5], self.y[:, :5])
+                raise RuntimeError("solver failed")
+        self.assertEqual(len(SimulationResult.from_csv(path).time), 5)
+
+
+class TestStepSampler(unittest.TestCase):
+
+    def stream(self, t_eval=None, start=None, **solve_ivp_kwargs):
+        samples = []
+        sampler = StepSampler(
+            lambda time, y: samples.append((np.array(time), y)), t_eval, start
+        )
+        solution = solve_ivp(
+            oscillator,
+            (0, 10),
+            [1.0, 0.0, 1.0, 0.0],
+            t_eval=t_eval,
+            **with_step_callback(SolverSettings().solve_ivp_options(), sampler),
+            **solve_ivp_kwargs,
+        )
+        self.assertLess(sampler.passed, len(solution.t))  # Streamed while solving
+        sampler.finish(solution.t, solution.y)
+        time = np.concatenate([time for time, _ in samples])
+        y = np.hstack([y for _, y in samples])
+        return solution, time, y
+
+    def test_passes_samples_in_order(self):
+        solution, time, y = self.stream(t_eval=np.linspace(0, 10, 200))
+        np.testing.assert_array_equal(time, solution.t)
+        np.testing.assert_array_equal(y, solution.y)
+
+    def test_stops_at_terminal_event(self):
+        def crossing(t, y):
+            return y[3] - 0.5
+
+        crossing.terminal = True
+        solution, time, y = self.stream(t_eval=np.linspace(0, 10, 200), events=crossing)
+        self.assertEqual(solution.status, 1)
+        np.testing.assert_array_equal(time, solution.t)
+        np.testing.assert_array_equal(y, solution.y)
+
+    def test_steps_with_start(self):
+        solution, time, y = self.stream(start=(0.0, np.array([1.0, 0.0, 1.0, 0.0])))
+        np.testing.assert_array_equal(time, solution.t)
+        np.testing.assert_array_equal(y, solution.y)
+
+
+if __name__ == "__main__":
+    unittest.main()
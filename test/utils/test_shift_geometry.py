@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+
+from constants.car_specs import MAX_SHIFT
+from utils.shift_geometry import (
+    ShiftGeometryTable,
+    exact_shift_geometry,
+    shift_geometry,
+    shift_geometry_derivative,
+    use_geometry_table,
+)
+from utils.theoretical_models import TheoreticalModels as tm
+
+
+class TestShiftGeometry(unittest.TestCase):
+
+    def tearDown(self):
+        use_geometry_table(False)
+
+    def test_exact_matches_theoretical_models(self):
+        for d in [0.0, 0.005, 0.0123, MAX_SHIFT]:
+            geometry = exact_shift_geometry(d)
+            self.assertEqual(geometry.outer_prim_radius, tm.outer_prim_radius(d))
+            self.assertEqual(geometry.outer_sec_radius, tm.outer_sec_radius(d))
+            self.assertAlmostEqual(geometry.cvt_ratio, tm.current_cvt_ratio(d))
+            self.assertAlmostEqual(
+                geometry.primary_wrap_angle, tm.primary_wrap_angle(d)
+            )
+            self.assertAlmostEqual(
+                geometry.secondary_wrap_angle, tm.secondary_wrap_angle(d)
+            )
+
+    def test_derivative_matches_finite_differences(self):
+        step = 1e-8
+        for d in [0.001, 0.005, 0.0123, MAX_SHIFT]:
+            derivative = shift_geometry_derivative(d)
+            above = exact_shift_geometry(d + step)
+            below = exact_shift_geometry(d - step)
+            for name in derivative._fields:
+                self.assertAlmostEqual(
+                    getattr(derivative, name),
+                    (getattr(above, name) - getattr(below, name)) / (2 * step),
+                    places=4,
+                )
+
+    def test_table_within_tolerance(self):
+        table = ShiftGeometryTable(tolerance=1e-9)
+        self.assertLessEqual(table.max_error, 1e-9)
+
+        d = np.linspace(-0.001, MAX_SHIFT + 0.001, 2001)
+        approximate = table.lookup(d)
+        exact = exact_shift_geometry(d)
+        for name in exact._fields:
+            np.testing.assert_allclose(
+                getattr(approximate, name), getattr(exact, name), rtol=1e-8
+            )
+
+    def test_scalar_lookup_matches_array_lookup(self):
+        table = ShiftGeometryTable()
+        d = np.array([0.0, 0.004, 0.0123, MAX_SHIFT, MAX_SHIFT + 0.001])
+        array_geometry = table.lookup(d)
+        for i, value in enumerate(d):
+            scalar_geometry = table.lookup(float(value))
+            for name in scalar_geometry._fields:
+                self.assertAlmostEqual(
+                    getattr(scalar_geometry, name),
+                    getattr(array_geometry, name)[i],
+                    places=12,
+                )
+
+    def test_switch_falls_back_to_exact(self):
+        self.assertIsNone(use_geometry_table(False))
+        self.assertEqual(shift_geometry(0.0123), exact_shift_geometry(0.0123))
+
+        table = use_geometry_table(True)
+        self.assertIsInstance(table, ShiftGeometryTable)
+        self.assertIs(use_geometry_table(True), table)
+        self.assertEqual(shift_geometry(0.0123), table.lookup(0.0123))
+
+
+if __name__ == "__main__":
+    unittest.main()
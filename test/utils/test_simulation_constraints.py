@@ -0,0 +1,66 @@
+import unittest
+
+from simulations.drivetrain import build_drivetrain
+from constants.car_specs import MAX_SHIFT
+from utils.argument_parser import default_arguments
+from utils.simulation_constraints import (
+    RELEASE_ACCELERATION,
+    get_shift_release_event,
+    is_pinned,
+    pinned_state,
+    release_margin,
+    shift_lower_stop_event,
+    shift_upper_stop_event,
+)
+from utils.system_state import SystemState
+
+
+class TestShiftEndStops(unittest.TestCase):
+
+    def setUp(self):
+        self.cvt_shift = build_drivetrain(default_arguments()).cvt_shift
+
+    def test_pinned_state(self):
+        y = [5.0, 1.0, -0.2, MAX_SHIFT + 1e-4]
+        self.assertEqual(list(pinned_state(y, MAX_SHIFT)), [5.0, 1.0, 0.0, MAX_SHIFT])
+        # The original state is left alone
+        self.assertEqual(y[2], -0.2)
+
+    def test_stop_events(self):
+        self.assertLess(shift_lower_stop_event(0, [5.0, 0.0, -0.1, -1e-4]), 0)
+        self.assertGreater(shift_lower_stop_event(0, [5.0, 0.0, 0.1, 1e-4]), 0)
+        self.assertGreater(
+            shift_upper_stop_event(0, [5.0, 0.0, 0.1, MAX_SHIFT + 1e-4]), 0
+        )
+        self.assertEqual(shift_lower_stop_event.direction, -1)
+        self.assertEqual(shift_upper_stop_event.direction, 1)
+        self.assertTrue(shift_lower_stop_event.terminal)
+        self.assertTrue(shift_upper_stop_event.terminal)
+
+    def test_engaged_shift_is_pinned_at_low_speed(self):
+        # Below the engagement speed the flyweights cannot move the shift
+        y = pinned_state([2.0, 0.0, 0.0, 0.0], 0.0)
+        self.assertTrue(is_pinned(self.cvt_shift, y, 0.0))
+
+    def test_release_event_follows_release_margin(self):
+        event = get_shift_release_event(self.cvt_shift, 0.0)
+        self.assertTrue(event.terminal)
+        self.assertEqual(event.direction, 1)
+        for car_velocity in [2.0, 6.0]:
+            y = [car_velocity, 0.0, 0.0, 0.0]
+            self.assertEqual(event(0, y), release_margin(self.cvt_shift, y, 0.0))
+
+    def test_release_margin_is_directed_away_from_the_stop(self):
+        y = [6.0, 0.0, 0.0, 0.0]
+        # Leaving full shift, friction acts as if the shift velocity were negative
+        state = SystemState.from_array(pinned_state(y, MAX_SHIFT))
+        state.shift_velocity = -1.0
+        acceleration = self.cvt_shift.calculate_shift_acceleration(state)
+        self.assertAlmostEqual(
+            release_margin(self.cvt_shift, y, MAX_SHIFT),
+            -acceleration - RELEASE_ACCELERATION,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
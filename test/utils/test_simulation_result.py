@@ -1,44 +1,57 @@
+import os
+import tempfile
 import unittest
 import numpy as np
 import pandas as pd
 from unittest.mock import patch
 
 from scipy.integrate import solve_ivp
-from utils.simulation_result import SimulationResult
-from utils.system_state import SystemState
+from utils.binary_format import read_columns
+from utils.simulation_result import SimulationResult, read_csv_columns
+from utils.system_state import STATE_FIELDS, SystemState
 
 
 class TestSimulationResult(unittest.TestCase):
 
     def setUp(self):
-        # Define a simple ODE system for testing
+        # Define a simple ODE system for testing, with the four state variables
         def simple_ode(t, y):
-            return [y[1], -0.1 * y[1] - y[0]]
+            return [-0.1 * y[0], y[0], y[3], -0.1 * y[3] - y[2]]
 
         # Solve the ODE system
-        y0 = [1.0, 0.0]
+        y0 = [1.0, 0.0, 1.0, 0.0]
         t_span = (0, 10)
         t_eval = np.linspace(*t_span, 100)
         self.solution = solve_ivp(simple_ode, t_span, y0, t_eval=t_eval)
 
-        # Mock SystemState.from_array to return a simple object
-        self.original_from_array = SystemState.from_array
-        SystemState.from_array = lambda arr: SystemState(
-            car_velocity=arr[0],
-            car_position=arr[1],
-            shift_velocity=arr[0],
-            shift_distance=arr[1],
-        )
-
-    def tearDown(self):
-        # Restore the original SystemState.from_array method
-        SystemState.from_array = self.original_from_array
-
     def test_parse_solution(self):
         result = SimulationResult(self.solution)
         self.assertEqual(len(result.states), len(self.solution.t))
         self.assertIsInstance(result.states[0], SystemState)
 
+    def test_columns(self):
+        result = SimulationResult(self.solution)
+        np.testing.assert_array_equal(result.car_velocity, self.solution.y[0])
+        np.testing.assert_array_equal(result.shift_distance, self.solution.y[3])
+        np.testing.assert_array_equal(result.column("car_position"), self.solution.y[1])
+        self.assertTrue(result.car_velocity.flags["C_CONTIGUOUS"])
+        with self.assertRaises(ValueError):
+            result.column("engine_velocity")
+
+    def test_states_view(self):
+        result = SimulationResult(self.solution)
+        state = result.states[-1]
+        self.assertEqual(state.car_position, self.solution.y[1, -1])
+        self.assertEqual(len(result.states[10:20]), 10)
+        self.assertEqual(
+            [s.shift_velocity for s in result.states], list(self.solution.y[2])
+        )
+
+    def test_from_states(self):
+        states = [SystemState(1.0, 2.0, 3.0, 4.0), SystemState(5.0, 6.0, 7.0, 8.0)]
+        result = SimulationResult(time=[0.0, 1.0], states=states)
+        np.testing.assert_array_equal(result.y, [[1, 5], [2, 6], [3, 7], [4, 8]])
+
     def test_write_csv(self):
         result = SimulationResult(self.solution)
         result.write_csv("test_output.csv")
@@ -47,6 +60,47 @@ class TestSimulationResult(unittest.TestCase):
         self.assertIn("time", df.columns)
         self.assertIn("car_position", df.columns)
 
+        read_back = SimulationResult.from_csv("test_output.csv")
+        np.testing.assert_allclose(read_back.y, self.solution.y)
+
+    def test_read_csv_columns(self):
+        result = SimulationResult(self.solution)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "output.csv")
+            result.write_csv(path)
+            columns = read_csv_columns(path, ["time", "shift_distance"])
+            chunked = read_csv_columns(path, chunksize=7)
+            read_back = SimulationResult.from_csv(path, chunksize=30)
+
+        self.assertEqual(list(columns), ["time", "shift_distance"])
+        self.assertEqual(columns["time"].dtype, np.float64)
+        np.testing.assert_allclose(columns["shift_distance"], self.solution.y[3])
+        self.assertEqual(list(chunked), ["time", *STATE_FIELDS])
+        np.testing.assert_array_equal(chunked["car_position"], read_back.car_position)
+        np.testing.assert_allclose(read_back.y, self.solution.y)
+
+    def test_write_npy(self):
+        result = SimulationResult(self.solution, solver_stats={"phase1": {"nfev": 3}})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "output.npy")
+            result.write_npy(path, metadata={"arguments": {"flyweight_mass": 0.6}})
+            self.assertTrue(os.path.exists(os.path.join(directory, "output.json")))
+
+            read_back = SimulationResult.from_npy(path)
+            # Exact, unlike the CSV, and mapped rather than read
+            np.testing.assert_array_equal(read_back.time, result.time)
+            np.testing.assert_array_equal(read_back.y, result.y)
+            self.assertFalse(read_back.y.flags.writeable)
+            self.assertEqual(read_back.solver_stats, {"phase1": {"nfev": 3}})
+            del read_back
+
+            _, header = read_columns(path)
+            self.assertEqual(header["units"]["car_velocity"], "m/s")
+            self.assertEqual(header["metadata"]["arguments"], {"flyweight_mass": 0.6})
+
+            with self.assertRaises(ValueError):
+                result.write_npy(os.path.join(directory, "output.csv"))
+
     @patch.object(SimulationResult, "plot")
     def test_plot(self, mock_plot):
         result = SimulationResult(self.solution)
@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from utils.solvers import FixedStepRK4, SolverSettings, with_step_callback
+
+
+def decay(t, y):
+    return -y
+
+
+class TestFixedStepRK4(unittest.TestCase):
+
+    def solve(self, step, **kwargs):
+        return solve_ivp(decay, (0, 1), [1.0], method=FixedStepRK4, step=step, **kwargs)
+
+    def test_fourth_order_convergence(self):
+        errors = [abs(self.solve(step).y[0, -1] - np.exp(-1)) for step in [0.1, 0.05]]
+        self.assertAlmostEqual(errors[0] / errors[1], 16, delta=1)
+
+    def test_ends_on_bound(self):
+        solution = self.solve(0.3)
+        self.assertEqual(solution.t[-1], 1)
+        np.testing.assert_allclose(solution.t, [0, 0.3, 0.6, 0.9, 1.0])
+        # One evaluation to start, then k2, k3, k4 and the end slope per step
+        self.assertEqual(solution.nfev, 1 + 4 * 4)
+
+    def test_dense_output(self):
+        t_eval = np.linspace(0, 1, 37)
+        solution = self.solve(0.01, t_eval=t_eval)
+        np.testing.assert_allclose(solution.y[0], np.exp(-t_eval), rtol=1e-7)
+
+    def test_rejects_non_positive_step(self):
+        with self.assertRaises(ValueError):
+            self.solve(0)
+
+
+class TestSolverSettings(unittest.TestCase):
+
+    def test_rejects_unknown_method(self):
+        with self.assertRaises(ValueError):
+            SolverSettings("Euler")
+
+    def test_solve_ivp_options(self):
+        def jacobian(t, y):
+            return -np.eye(len(y))
+
+        self.assertEqual(
+            SolverSettings(rtol=1e-4).solve_ivp_options(jacobian),
+            {"method": "RK45", "rtol": 1e-4, "atol": 1e-6},
+        )
+        self.assertIs(
+            SolverSettings("BDF").solve_ivp_options(jacobian)["jac"], jacobian
+        )
+        self.assertEqual(
+            SolverSettings("RK4", step=0.01).solve_ivp_options(jacobian),
+            {"method": FixedStepRK4, "step": 0.01},
+        )
+
+
+class TestWithStepCallback(unittest.TestCase):
+
+    def test_observes_accepted_steps(self):
+        for settings in [SolverSettings("RK45"), SolverSettings("RK4", step=0.25)]:
+            steps = []
+            options = with_step_callback(
+                settings.solve_ivp_options(),
+                lambda solver: steps.append((solver.t_old, solver.t)),
+            )
+            solution = solve_ivp(decay, (0, 1), [1.0], **options)
+            self.assertEqual([t for _, t in steps], list(solution.t[1:]))
+            self.assertEqual([t_old for t_old, _ in steps], list(solution.t[:-1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
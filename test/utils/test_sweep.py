@@ -0,0 +1,71 @@
+import math
+import unittest
+from dataclasses import replace
+from functools import partial
+from unittest.mock import patch
+import numpy as np
+
+from main import SimulationOptions
+from sweep import run_sweep, summarize_result
+from utils.argument_parser import default_arguments
+from utils.simulation_result import SimulationResult
+
+
+def make_result(time, car_position, car_velocity):
+    zeros = np.zeros(len(time))
+    return SimulationResult(
+        time=np.array(time, dtype=float),
+        y=np.array([car_velocity, car_position, zeros, zeros], dtype=float),
+    )
+
+
+class TestSummarizeResult(unittest.TestCase):
+
+    def setUp(self):
+        self.args = replace(default_arguments(), total_distance=10.0)
+
+    def test_interpolates_time_to_distance(self):
+        result = make_result([0, 1, 2, 3], [0, 4, 8, 12], [4, 5, 6, 5])
+        summary = summarize_result(self.args, result)
+        # 10 m is halfway between the samples at 2 s and 3 s
+        self.assertAlmostEqual(summary["time_to_distance"], 2.5)
+        self.assertEqual(summary["final_time"], 3)
+        self.assertEqual(summary["final_position"], 12)
+        self.assertEqual(summary["final_velocity"], 5)
+        self.assertEqual(summary["top_velocity"], 6)
+        self.assertEqual(summary["total_distance"], 10.0)
+
+    def test_distance_never_reached(self):
+        result = make_result([0, 1, 2], [0, 3, 6], [3, 3, 3])
+        summary = summarize_result(self.args, result)
+        self.assertTrue(math.isnan(summary["time_to_distance"]))
+
+    def test_distance_reached_at_first_sample(self):
+        result = make_result([0.5, 1.0, 1.5], [10, 12, 14], [4, 4, 4])
+        summary = summarize_result(self.args, result)
+        self.assertEqual(summary["time_to_distance"], 0.5)
+
+
+class TestRunSweep(unittest.TestCase):
+
+    def test_rows_follow_grid(self):
+        total_sim_time = 0.05
+        grid = [
+            replace(default_arguments(), flyweight_mass=mass) for mass in (0.5, 0.7)
+        ]
+        # Shortened runs, simulated in this process with max_workers=1
+        short_options = partial(SimulationOptions, total_sim_time=total_sim_time)
+        with patch("sweep.SimulationOptions", short_options):
+            rows = run_sweep(grid, max_workers=1, use_cache=False)
+
+        self.assertEqual([row["flyweight_mass"] for row in rows], [0.5, 0.7])
+        for row in rows:
+            self.assertAlmostEqual(row["final_time"], total_sim_time)
+            self.assertGreater(row["final_position"], 0)
+            self.assertGreaterEqual(row["top_velocity"], row["final_velocity"])
+            # 200 m are far out of reach in the shortened runs
+            self.assertTrue(math.isnan(row["time_to_distance"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
+import numpy as np
 
-from utils.system_state import SystemState
+from utils.system_state import StateView, SystemState
 
 
 class TestSystemState(unittest.TestCase):
@@ -35,6 +36,47 @@ class TestSystemState(unittest.TestCase):
         self.assertEqual(state.shift_velocity, 5.0)
         self.assertEqual(state.shift_distance, 2.0)
 
+    def test_has_no_instance_dict(self):
+        state = SystemState()
+        self.assertFalse(hasattr(state, "__dict__"))
+        with self.assertRaises(AttributeError):
+            state.engine_velocity = 1.0
+
+    def test_from_array_copies_state(self):
+        array = np.array([30.0, 10.0, 5.0, 2.0])
+        state = SystemState.from_array(array)
+        state.shift_distance = 0.0
+        self.assertEqual(array[3], 2.0)
+
+    def test_from_batched_array(self):
+        array = np.arange(8.0).reshape(4, 2)
+        state = SystemState.from_array(array)
+        np.testing.assert_array_equal(state.car_position, [2.0, 3.0])
+        np.testing.assert_array_equal(state.shift_distance, [6.0, 7.0])
+
+
+class TestStateView(unittest.TestCase):
+
+    def test_reads_array_without_copying(self):
+        array = np.array([30.0, 10.0, 5.0, 2.0])
+        view = StateView(array)
+        self.assertEqual(view.car_velocity, 30.0)
+        self.assertEqual(view.shift_distance, 2.0)
+        array[0] = 31.0
+        self.assertEqual(view.car_velocity, 31.0)
+        self.assertIs(view.to_array(), array)
+
+    def test_writes_array(self):
+        array = np.array([30.0, 10.0, 5.0, 2.0])
+        StateView(array).shift_velocity = 0.0
+        self.assertEqual(array[2], 0.0)
+
+    def test_batched_fields_are_rows(self):
+        array = np.arange(8.0).reshape(4, 2)
+        view = StateView(array)
+        np.testing.assert_array_equal(view.shift_velocity, [4.0, 5.0])
+        self.assertTrue(np.shares_memory(view.shift_velocity, array))
+
 
 if __name__ == "__main__":
     unittest.main()
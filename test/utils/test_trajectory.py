@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from utils.simulation_result import SimulationResult
+from utils.trajectory import Trajectory
+
+
+def rising(t, y):
+    return [1.0, 0.0, 0.0, 0.0]
+
+
+def falling(t, y):
+    return [-1.0, 0.0, 0.0, 0.0]
+
+
+class TestTrajectory(unittest.TestCase):
+
+    def setUp(self):
+        # Rises to 1 over the first second, then jumps to 5 and falls
+        first = solve_ivp(rising, (0, 1), [0.0, 0, 0, 0], dense_output=True)
+        second = solve_ivp(falling, (1, 3), [5.0, 0, 0, 0], dense_output=True)
+        self.trajectory = Trajectory([0, 1, 3], [first.sol, second.sol])
+
+    def test_stitches_segments(self):
+        y = self.trajectory([0.0, 0.5, 2.0, 3.0])
+        self.assertEqual(y.shape, (4, 4))
+        np.testing.assert_allclose(y[0], [0.0, 0.5, 4.0, 3.0])
+
+    def test_breakpoint_belongs_to_later_segment(self):
+        self.assertAlmostEqual(self.trajectory(1.0)[0], 5.0)
+
+    def test_scalar_time(self):
+        self.assertEqual(self.trajectory(0.25).shape, (4,))
+
+    def test_rejects_times_outside_run(self):
+        with self.assertRaises(ValueError):
+            self.trajectory([0.5, 3.5])
+
+    def test_resample(self):
+        result = self.trajectory.resample(7)
+        self.assertIsInstance(result, SimulationResult)
+        np.testing.assert_allclose(result.time, np.linspace(0, 3, 7))
+        self.assertAlmostEqual(result.states[1].car_velocity, 0.5)
+        self.assertIs(result.trajectory, self.trajectory)
+
+    def test_breakpoints_must_match_interpolants(self):
+        with self.assertRaises(ValueError):
+            Trajectory([0, 1], [])
+
+
+if __name__ == "__main__":
+    unittest.main()